@@ -1,8 +1,8 @@
 import time
 import random
 import json
-import csv
 import os
+import threading
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
@@ -11,16 +11,335 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 import logging
+from urllib.parse import parse_qsl, quote_plus, urlencode, urlsplit, urlunsplit
 from webdriver_manager.chrome import ChromeDriverManager
 
+from browser_profile import get_profile
+from dedup import DedupIndex
+from exporters import open_exporter
+from metrics import Instrumentation, timed_stage
+from page_parser import parse_search_page
+from process_stats import kill_process_tree, process_tree_rss
+from waits import (
+    DEFAULT_PACER, DEFAULT_WAIT_POLICIES, WaitRecorder, wait_until,
+    card_count_stable, element_present, page_changed, results_rendered, scroll_height_changed,
+)
+
+# Site root; override (e.g. with a local fixture server) through AlibabaSupplierScraper(base_url=...)
+DEFAULT_BASE_URL = "https://www.alibaba.com"
+
+# Product card selectors on the search results page (current layout first, legacy fallback second)
+CARD_SELECTOR = ".fy23-search-card.searchx-offer-item"
+FALLBACK_CARD_SELECTOR = ".organic-offer-wrapper .organic-offer-item"
+
+# Browser-side version of extract_card_info: collects every field of every card in a single
+# execute_script round trip. The returned dicts use the same keys, key order and "N/A"
+# fallbacks as extract_card_info so both extraction modes produce identical records.
+# (Escapes in the JS are doubled: this is a plain Python string.)
+BATCH_EXTRACT_SCRIPT = """
+const primary = arguments[0], fallback = arguments[1];
+let selector = primary;
+let cards = document.querySelectorAll(primary);
+if (!cards.length) {
+    selector = fallback;
+    cards = document.querySelectorAll(fallback);
+}
+const text = (el) => (el ? (el.innerText || '').trim() : '');
+const results = [];
+for (const card of cards) {
+    const info = {};
+
+    const titleSpan = card.querySelector('h2.search-card-e-title a span');
+    const titleLink = titleSpan ? titleSpan.closest('a') : null; // Innermost link, as ./ancestor::a[1]
+    if (titleSpan && titleLink) {
+        info.product_title = text(titleSpan);
+        info.product_url = titleLink.getAttribute('href') === null ? null : titleLink.href;
+    } else {
+        info.product_title = 'N/A';
+        info.product_url = 'N/A';
+    }
+
+    const price = card.querySelector('.search-card-e-price-main');
+    info.price = price ? text(price) : 'N/A';
+
+    const company = card.querySelector('a.search-card-e-company');
+    if (company) {
+        info.company_name = text(company);
+        info.company_url = company.getAttribute('href') === null ? null : company.href;
+    } else {
+        info.company_name = 'N/A';
+        info.company_url = 'N/A';
+    }
+
+    const location = card.querySelector('.search-card-e-supplier__year span:last-of-type');
+    if (location) {
+        const parts = text(location).split('\\n');
+        if (parts.length === 2) {
+            info.years_on_alibaba_search_page = parts[0].trim();
+            info.location_search_page = parts[1].trim();
+        } else {
+            info.years_on_alibaba_search_page = 'N/A';
+            info.location_search_page = text(location);
+        }
+    } else {
+        info.years_on_alibaba_search_page = 'N/A';
+        info.location_search_page = 'N/A';
+    }
+
+    const moq = card.querySelector('.search-card-m-sale-features__item');
+    info.min_order = moq ? text(moq) : 'N/A';
+
+    const certs = [];
+    for (const img of card.querySelectorAll('.search-card-e-icon__certification-wrapper img')) {
+        const alt = (img.getAttribute('alt') || '').trim();
+        if (alt && !certs.includes(alt)) certs.push(alt);
+    }
+    for (const el of card.querySelectorAll('.enhance-certs___certification-wrapper.certified')) {
+        const value = text(el);
+        if (value && !certs.includes(value)) certs.push(value);
+    }
+    if (card.querySelector('a[class*="verified-supplier-icon__wrapper"] img[class*="verified-supplier-icon"]')
+            && !certs.includes('Verified Supplier')) {
+        certs.push('Verified Supplier');
+    }
+    info.certifications = certs;
+
+    const review = card.querySelector('.search-card-e-review');
+    info.response_rate = review ? text(review) : 'N/A';
+
+    results.push(info);
+}
+return {selector: selector, cards: results};
+"""
+
+# Where the resolved chromedriver path is remembered between runs
+CHROMEDRIVER_CACHE_FILE = os.environ.get(
+    'CHROMEDRIVER_CACHE_FILE', os.path.join(os.path.expanduser('~'), '.cache', 'gcsm', 'chromedriver.json')
+)
+CHROMEDRIVER_EXECUTABLE = "chromedriver.exe" if os.name == 'nt' else "chromedriver"
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+def _is_executable(path):
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+def _executable_from_download(raw_path):
+    """
+    webdriver-manager sometimes returns a sibling file (e.g. THIRD_PARTY_NOTICES.chromedriver)
+    instead of the executable; pick the platform's chromedriver binary next to it.
+    """
+    if os.path.basename(raw_path) == CHROMEDRIVER_EXECUTABLE:
+        return raw_path
+    return os.path.join(os.path.dirname(raw_path), CHROMEDRIVER_EXECUTABLE)
+
+def resolve_chromedriver_path(explicit_path=None):
+    """
+    Find the chromedriver executable without touching the network when possible:
+    1. an explicit path (argument or CHROMEDRIVER_PATH environment variable)
+    2. the path resolved by a previous run (CHROMEDRIVER_CACHE_FILE)
+    3. a webdriver-manager download, whose result is then cached for the next run
+    The result is also memoized for the life of the process.
+    """
+    global _chromedriver_path
+    logger = logging.getLogger(__name__)
+
+    explicit_path = explicit_path or os.environ.get('CHROMEDRIVER_PATH')
+    if explicit_path:
+        if not _is_executable(explicit_path):
+            raise FileNotFoundError(f"Configured chromedriver is not an executable file: {explicit_path}")
+        return explicit_path
+
+    with _chromedriver_lock:
+        if _chromedriver_path and _is_executable(_chromedriver_path):
+            return _chromedriver_path
+
+        try:
+            with open(CHROMEDRIVER_CACHE_FILE, encoding='utf-8') as f:
+                cached_path = json.load(f).get('path')
+            if _is_executable(cached_path):
+                logger.info(f"Using cached ChromeDriver path: {cached_path}")
+                _chromedriver_path = cached_path
+                return cached_path
+        except (OSError, ValueError):
+            pass # No usable cache yet
+
+        raw_downloaded_path = ChromeDriverManager().install()
+        logger.info(f"webdriver_manager initially returned path: {raw_downloaded_path}")
+        resolved_path = _executable_from_download(raw_downloaded_path)
+        logger.info(f"Using corrected ChromeDriver path: {resolved_path}")
+
+        try:
+            os.makedirs(os.path.dirname(CHROMEDRIVER_CACHE_FILE), exist_ok=True)
+            with open(CHROMEDRIVER_CACHE_FILE, 'w', encoding='utf-8') as f:
+                json.dump({"path": resolved_path, "resolved_at": time.time()}, f)
+        except OSError as e:
+            logger.warning(f"Could not cache ChromeDriver path: {e}")
+
+        _chromedriver_path = resolved_path
+        return resolved_path
+
+def search_page_url(keyword, base_url=DEFAULT_BASE_URL, page_number=1):
+    """URL of result page page_number of a keyword search on base_url"""
+    search_url = f"{base_url}/trade/search?fsb=y&IndexArea=product_en&CatId=&SearchText={quote_plus(keyword)}"
+    return AlibabaSupplierScraper.build_page_url(search_url, page_number)
+
 class AlibabaSupplierScraper:
-    def __init__(self, headless=True):
-        """Initialize the scraper with Chrome options"""
+    # Supported values for extraction_mode
+    EXTRACTION_MODES = ("batch", "page_source", "per_card")
+
+    # Supported values for pagination
+    PAGINATION_MODES = ("direct", "button")
+
+    def __init__(self, headless=True, extraction_mode="batch", card_delay=False, pagination="direct",
+                 lazy=False, chromedriver_path=None, wait_policies=None, pacer=None, browser_profile=None,
+                 base_url=DEFAULT_BASE_URL):
+        """Initialize the scraper with Chrome options
+
+        extraction_mode: "batch" reads every card on a page with one browser-side script call,
+                         "page_source" fetches the HTML once and parses it in-process (page_parser),
+                         "per_card" queries each card field through WebDriver (original behaviour).
+        card_delay: sleep 0.5-1s after each extracted card (only meaningful for per-card extraction).
+        pagination: "direct" loads page N from a built URL (falling back to the Next button if the
+                    site ignores it), "button" always clicks through with the Next button.
+        lazy: defer launching Chrome until the driver is first used.
+        chromedriver_path: explicit chromedriver executable (skips resolution and download).
+        wait_policies: {step: WaitPolicy} overrides for DEFAULT_WAIT_POLICIES (floor/ceiling per step).
+        pacer: HostPacer spacing out navigations per host (default: shared process-wide DEFAULT_PACER).
+        browser_profile: BrowserProfile or profile name ("lite", "full"); default "lite" when headless.
+        base_url: site root search URLs are built from (benchmarks point this at a local fixture server).
+        """
         self.setup_logging()
-        self.driver = self.setup_driver(headless)
-        self.suppliers_data = [] # This initializes the list to an empty state
+        if extraction_mode not in self.EXTRACTION_MODES:
+            raise ValueError(f"extraction_mode must be one of {self.EXTRACTION_MODES}, got {extraction_mode!r}")
+        if pagination not in self.PAGINATION_MODES:
+            raise ValueError(f"pagination must be one of {self.PAGINATION_MODES}, got {pagination!r}")
+        self.extraction_mode = extraction_mode
+        self.card_delay = card_delay
+        self.pagination = pagination
+        self.headless = headless
+        self.base_url = base_url.rstrip("/")
+        self.browser_profile = get_profile(browser_profile, headless)
+        self.chromedriver_path = chromedriver_path
+        self.wait_policies = {**DEFAULT_WAIT_POLICIES, **(wait_policies or {})}
+        self.pacer = pacer or DEFAULT_PACER
+        self.wait_recorder = WaitRecorder()
+        # Stage timings and WebDriver command counts, exported through metrics.REGISTRY
+        self.instrumentation = Instrumentation()
+        # Browser lifecycle: pages loaded by the current browser, across all browsers, and restarts
+        self.pages_loaded = 0
+        self.total_pages_loaded = 0
+        self.browser_restarts = 0
+        self._browser_started_at = None
+        self._driver = None
+        if not lazy:
+            self._start_browser()
+        self.suppliers_data = [] # This initializes the list to an empty state (and the seen index with it)
+        self.reached_last_page = False
+        self.crawl_error = None # Why the last crawl ended before max_pages (None if it did not fail)
+        self.first_page_signature = None # page_signature() of page 1 in the last crawl that started there
         self.logger.debug(f"DEBUG: Initializing scraper. suppliers_data length: {len(self.suppliers_data)}")
         
+    @property
+    def driver(self):
+        """The Chrome driver, launched on first access when the scraper was created lazily"""
+        if self._driver is None:
+            self._start_browser()
+        return self._driver
+
+    @driver.setter
+    def driver(self, value):
+        self._driver = value
+
+    @property
+    def suppliers_data(self):
+        """Suppliers accumulated by search_suppliers; self.seen holds the listings it contains"""
+        return self._suppliers_data
+
+    @suppliers_data.setter
+    def suppliers_data(self, value):
+        # Replacing the list (e.g. clearing it between searches) rebuilds the seen index to match,
+        # so listings dropped from the list are accepted again by the next search
+        self._suppliers_data = value
+        self.seen = DedupIndex()
+        self.seen.filter(value)
+
+    def reset_results(self):
+        """Forget the suppliers of earlier searches (a pooled scraper's next user starts empty)"""
+        self.suppliers_data = []
+
+    @property
+    def browser_started(self):
+        return self._driver is not None
+
+    def _start_browser(self):
+        self._driver = self.instrumentation.wrap_driver(self.setup_driver(self.headless))
+        self._browser_started_at = time.time()
+        self.pages_loaded = 0
+
+    def browser_pid(self):
+        """PID of the chromedriver process (the root of the browser's process tree), if running"""
+        process = getattr(getattr(self._driver, "service", None), "process", None)
+        return getattr(process, "pid", None)
+
+    def browser_rss(self):
+        """Resident memory in bytes of chromedriver plus Chrome and all its child processes"""
+        return process_tree_rss(self.browser_pid()) if self._driver else None
+
+    def browser_age(self):
+        """Seconds since the current browser was started"""
+        return time.time() - self._browser_started_at if self._driver else None
+
+    def is_responsive(self, timeout=10):
+        """
+        Round trip to the browser with a deadline. False when the session is dead (chromedriver or
+        Chrome crashed) or hung (the command does not return within timeout).
+        """
+        if self._driver is None:
+            return True # Nothing to check; a fresh browser is launched on first use
+        result = {}
+
+        def ping():
+            try:
+                result["ok"] = self._driver.execute_script("return 1;") == 1
+            except Exception as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=ping, daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            self.logger.warning(f"Browser did not answer within {timeout}s.")
+            return False
+        if "error" in result:
+            self.logger.warning(f"Browser session is dead: {result['error']}")
+        return result.get("ok", False)
+
+    def restart_browser(self, reason, force=False):
+        """Close the current browser; a fresh one is launched on next use"""
+        self.logger.info(f"Recycling browser ({reason}) after {self.pages_loaded} pages.")
+        self.close(force=force)
+        self.browser_restarts += 1
+
+    def browser_stats(self):
+        """Memory, age and page counts of this scraper's browser"""
+        rss = self.browser_rss()
+        age = self.browser_age()
+        return {
+            "running": self.browser_started,
+            "pid": self.browser_pid(),
+            "profile": self.browser_profile.name,
+            "rss_mb": round(rss / (1024 * 1024), 1) if rss is not None else None,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "pages_loaded": self.pages_loaded,
+            "total_pages_loaded": self.total_pages_loaded,
+            "restarts": self.browser_restarts,
+        }
+
+    def _count_page(self):
+        self.pages_loaded += 1
+        self.total_pages_loaded += 1
+
     def setup_logging(self):
         """Setup logging configuration"""
         logging.basicConfig(
@@ -35,14 +354,19 @@ class AlibabaSupplierScraper:
         """Setup Chrome driver with options to avoid detection"""
         chrome_options = Options()
         
+        # A specific Chrome build (e.g. Chrome for Testing in CI); otherwise the one on PATH
+        if os.environ.get('CHROME_BINARY'):
+            chrome_options.binary_location = os.environ['CHROME_BINARY']
+
         if headless:
-            chrome_options.add_argument("--headless")
+            chrome_options.add_argument("--headless=new") # Modern headless: same engine as headful Chrome
             
         # Anti-detection options
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
+        # Window size, blocked resource types and resource budget
+        self.browser_profile.apply_options(chrome_options)
         chrome_options.add_argument("--disable-blink-features=AutomationControlled")
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
@@ -55,30 +379,15 @@ class AlibabaSupplierScraper:
         ]
         chrome_options.add_argument(f"--user-agent={random.choice(user_agents)}")
         
-        # --- FIX START: Correcting ChromeDriver Path ---
-        # Use webdriver-manager to install the correct ChromeDriver version.
-        # However, it might return a path to a non-executable file (like a NOTICE file)
-        # instead of the actual chromedriver.exe on Windows.
-        raw_downloaded_path = ChromeDriverManager().install()
-        self.logger.info(f"webdriver_manager initially returned path: {raw_downloaded_path}")
-
-        # Correct the path:
-        # 1. Use os.path.dirname() to get the directory part of the returned path.
-        #    This effectively removes any trailing file name (like THIRD_PARTY_NOTICES.chromedriver).
-        # 2. Use os.path.join() to combine this directory with the actual executable name "chromedriver.exe".
-        #    This creates the correct, runnable path for the ChromeDriver executable.
-        base_dir_for_exe = os.path.dirname(raw_downloaded_path)
-        correct_chromedriver_path = os.path.join(base_dir_for_exe, "chromedriver.exe")
-        self.logger.info(f"Using corrected ChromeDriver path: {correct_chromedriver_path}")
-
-        # Setup driver service with the corrected path
-        service = Service(correct_chromedriver_path)
-        # --- FIX END ---
+        # Resolved once per process and cached on disk across runs (see resolve_chromedriver_path)
+        service = Service(resolve_chromedriver_path(self.chromedriver_path))
         
         driver = webdriver.Chrome(service=service, options=chrome_options)
         
         # Execute script to remove webdriver property
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        self.browser_profile.apply_driver(driver)
+        self.logger.info(f"Chrome started with the {self.browser_profile.name!r} browser profile.")
         
         return driver
     
@@ -86,28 +395,138 @@ class AlibabaSupplierScraper:
         """Add random delay to mimic human behavior"""
         delay = random.uniform(min_seconds, max_seconds)
         time.sleep(delay)
+
+    def wait_for(self, step, condition):
+        """Wait for condition under the step's WaitPolicy and record the time actually spent"""
+        satisfied, waited = wait_until(self.driver, condition, self.wait_policies[step])
+        self.wait_recorder.record(step, waited, satisfied)
+        if not satisfied:
+            self.instrumentation.wait_timed_out(step)
+        return satisfied
+
+    def pace(self, url):
+        """Honour the per-host pacing policy before hitting url"""
+        waited = self.pacer.wait(url)
+        self.wait_recorder.record("pacing", waited)
+
+    @timed_stage("navigation")
+    def navigate(self, url):
+        """Paced driver.get"""
+        self.pace(url)
+        self.driver.get(url)
+        self._count_page()
         
-    def search_suppliers(self, keyword, max_pages=3):
-        """Search for suppliers based on keyword"""
-        self.logger.debug(f"DEBUG: Starting search_suppliers. Current suppliers_data length: {len(self.suppliers_data)}")
+    def build_search_url(self, keyword):
+        """Search results URL (page 1) for keyword"""
+        return search_page_url(keyword, self.base_url)
+
+    @staticmethod
+    def build_page_url(search_url, page_number):
+        """URL of result page page_number for a search URL (page 1 is the search URL itself)"""
+        if page_number <= 1:
+            return search_url
+        parts = urlsplit(search_url)
+        query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != 'page']
+        query.append(('page', str(page_number)))
+        return urlunsplit(parts._replace(query=urlencode(query)))
+
+    @timed_stage("results_wait")
+    def wait_for_results(self):
+        """Wait until product cards are rendered; returns False on timeout"""
+        # Using the `search-card-e-title` which is inside each product card for a more reliable wait.
+        return self.wait_for("results", results_rendered(".search-card-e-title a"))
+
+    def page_signature(self):
+        """Product links of the first few cards; identifies which result page is displayed"""
+        return tuple(self.driver.execute_script(
+            "return Array.from(document.querySelectorAll(arguments[0] + ' h2.search-card-e-title a'))"
+            ".slice(0, 5).map(a => a.href);",
+            CARD_SELECTOR,
+        ) or ())
+
+    def scrape_page(self, page_url):
+        """
+        Load one result page directly by URL and extract it.
+        Returns (suppliers, signature); ([], ()) if no results rendered.
+        """
+        self.logger.info(f"Loading result page: {page_url}")
+        self.navigate(page_url)
+        if not self.wait_for_results():
+            self.logger.info("No search results rendered on this page.")
+            return [], ()
+        signature = self.page_signature()
+        self.scroll_page()
+        return self.extract_supplier_data(), signature
+
+    @timed_stage("pagination")
+    def go_to_page_url(self, search_url, page_number, previous_signature):
+        """
+        Navigate straight to result page page_number. Returns False (leaving the browser on an
+        unknown page) if no results render or the site served the previous page again.
+        """
+        self.navigate(self.build_page_url(search_url, page_number))
+        if not self.wait_for_results():
+            return False
+        signature = self.page_signature()
+        if not signature or signature == previous_signature:
+            self.logger.info(f"Direct URL for page {page_number} did not advance the results.")
+            return False
+        self.logger.info(f"Navigated directly to page {page_number}.")
+        return True
+
+    def iter_supplier_pages(self, keyword, max_pages=3, stop_event=None, pagination=None, start_page=1,
+                            first_signature=None, resume_url=None):
+        """
+        Crawl search results for keyword, yielding (page_number, suppliers) as soon as each
+        page is extracted. Nothing is accumulated here, so memory does not grow with max_pages.
+
+        stop_event: optional threading.Event; when set, the crawl stops before the next page
+        pagination: overrides self.pagination for this crawl
+        start_page: first page to extract, loaded by its direct URL (resuming a checkpointed crawl)
+        first_signature: page 1's signature from the earlier run; if the direct URL of start_page
+            shows page 1 again, the crawl clicks Next from page 1 to reach start_page instead
+        resume_url: URL of page start_page - 1, already crawled; the crawl loads it and clicks Next
+            to reach start_page, and keeps to the Next button (site known to ignore page URLs)
+
+        After the crawl, self.reached_last_page tells whether it ended because there was no next page,
+        self.crawl_error holds the error that ended it early (None otherwise), and self.wait_recorder
+        holds how long each step waited.
+        """
+        self.reached_last_page = False
+        self.crawl_error = None
+        self.first_page_signature = None
+        self.wait_recorder.reset()
         try:
             # Construct search URL
-            search_url = f"https://www.alibaba.com/trade/search?fsb=y&IndexArea=product_en&CatId=&SearchText={keyword.replace(' ', '+')}"
-            self.logger.info(f"Searching for: {keyword}")
+            search_url = self.build_search_url(keyword)
+            self.logger.info(f"Searching for: {keyword}" + (f" (from page {start_page})" if start_page > 1 else ""))
             
-            self.driver.get(search_url)
-            self.random_delay(2, 4)
+            self.navigate(resume_url or self.build_page_url(search_url, start_page))
             
-            # --- UPDATED: Wait for new product cards to load using a more robust selector ---
-            # Wait for search results to load.
-            # Using the `search-card-e-title` which is inside each product card for a more reliable wait.
-            WebDriverWait(self.driver, 20).until( # Increased timeout
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".search-card-e-title a"))
-            )
+            # Wait for search results to load (returns as soon as the cards render)
+            if not self.wait_for_results():
+                raise TimeoutException("No product cards rendered on the search results page")
             self.logger.info("Search results page loaded.")
-            # --- END UPDATED ---
 
-            page_count = 0
+            use_direct_urls = (pagination or self.pagination) == "direct"
+            if resume_url:
+                use_direct_urls = False
+                if not self.go_to_next_page():
+                    self.reached_last_page = True
+                    return
+            elif start_page == 1:
+                self.first_page_signature = self.page_signature()
+            elif first_signature and self.page_signature() == tuple(first_signature):
+                self.logger.info(f"Direct URL for page {start_page} showed page 1. Clicking through from page 1 instead.")
+                use_direct_urls = False
+                self.navigate(search_url)
+                if not self.wait_for_results():
+                    raise TimeoutException("No product cards rendered on the search results page")
+                for _ in range(start_page - 1):
+                    if not self.go_to_next_page():
+                        self.reached_last_page = True
+                        return
+            page_count = start_page - 1
             while page_count < max_pages:
                 self.logger.info(f"Scraping page {page_count + 1}")
                 
@@ -116,24 +535,76 @@ class AlibabaSupplierScraper:
                 
                 # Extract supplier data from current page
                 suppliers = self.extract_supplier_data() # This extracts data from the current search results page
-                self.suppliers_data.extend(suppliers)
-                self.logger.info(f"Extracted {len(suppliers)} suppliers from page {page_count + 1}. Total in list: {len(self.suppliers_data)}")
+                yield page_count + 1, suppliers
+
+                if stop_event is not None and stop_event.is_set():
+                    self.logger.info("Stop requested. Ending crawl early.")
+                    break
                 
-                # Try to go to next page
+                if page_count + 1 >= max_pages:
+                    break
+
+                # Try to go to next page: built URL first, Next button as the fallback
+                if use_direct_urls:
+                    current_url = self.driver.current_url
+                    signature = self.page_signature()
+                    if self.go_to_page_url(search_url, page_count + 2, signature):
+                        page_count += 1
+                        continue
+                    self.logger.info("Direct page URLs not honoured. Falling back to Next button navigation.")
+                    use_direct_urls = False
+                    self.navigate(current_url)
+                    if not self.wait_for_results():
+                        break
+
                 if not self.go_to_next_page():
                     self.logger.info(f"DEBUG: No next page found or navigation failed. Breaking loop.")
+                    self.reached_last_page = True
                     break
                     
                 page_count += 1
-                self.random_delay(3, 5) # Increased delay for pagination
                 
-        except TimeoutException:
+        except TimeoutException as e:
+            self.instrumentation.error("search", e)
+            self.crawl_error = f"Timeout: {e.msg or e}"
             self.logger.error("Timeout waiting for search results to load (check internet or selectors).")
         except Exception as e:
+            self.instrumentation.error("search", e)
+            self.crawl_error = str(e)
             self.logger.error(f"Error during search: {str(e)}", exc_info=True) # exc_info=True to print full traceback
+        finally:
+            self.logger.info(f"Wait time by step: {self.wait_recorder.summary()}")
+
+    def search_suppliers(self, keyword, max_pages=3, on_page=None, stop_event=None):
+        """
+        Search for suppliers based on keyword.
+        Returns the suppliers found by this call; they are also appended to self.suppliers_data.
+        Listings repeated across pages (promoted cards) are dropped: results holds each listing
+        once, and suppliers_data never receives a listing it already holds from an earlier search
+        (use reset_results() or assign a new list to start over; mutate it in place and self.seen
+        no longer matches).
+
+        on_page: optional callback(page_number, suppliers) invoked after each page is extracted
+        stop_event: optional threading.Event; when set, the crawl stops before the next page
+        """
+        self.logger.debug(f"DEBUG: Starting search_suppliers. Current suppliers_data length: {len(self.suppliers_data)}")
+        results = []
+        seen = DedupIndex()
+        for page_number, suppliers in self.iter_supplier_pages(keyword, max_pages, stop_event):
+            extracted = len(suppliers)
+            suppliers = seen.filter(suppliers)
+            results.extend(suppliers)
+            self.suppliers_data.extend(self.seen.filter(suppliers))
+            self.logger.info(f"Extracted {extracted} suppliers from page {page_number} ({extracted - len(suppliers)} repeats dropped). Total in list: {len(results)}")
+            if on_page:
+                on_page(page_number, suppliers)
+        if self.crawl_error:
+            self.logger.warning(f"Crawl for '{keyword}' ended early ({self.crawl_error}); returning the {len(results)} suppliers extracted so far")
             
         self.logger.debug(f"DEBUG: Exiting search_suppliers. Final suppliers_data length: {len(self.suppliers_data)}")
+        return results
 
+    @timed_stage("scroll")
     def scroll_page(self, scroll_attempts=2):
         """Scroll page to load dynamic content"""
         # Scroll in increments to trigger more lazy loading
@@ -141,33 +612,43 @@ class AlibabaSupplierScraper:
         last_height = self.driver.execute_script("return document.body.scrollHeight")
         for _ in range(scroll_attempts):
             self.driver.execute_script("window.scrollBy(0, window.innerHeight * 0.8);")
-            self.random_delay(1, 2)
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height: # If no new content loaded, break
+            # Wait for lazy loading to grow the page; if it doesn't, there is nothing more to load
+            if not self.wait_for("scroll_step", scroll_height_changed(last_height)):
                 self.logger.info("Reached end of scrollable content or no more lazy loaded items.")
                 break
-            last_height = new_height
+            last_height = self.driver.execute_script("return document.body.scrollHeight")
 
-        # Final scroll to bottom
+        # Final scroll to bottom, then wait for the card count to settle
         self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        self.random_delay(1, 2)
+        self.wait_for("scroll_settle", card_count_stable(CARD_SELECTOR))
         
+    @timed_stage("extraction")
     def extract_supplier_data(self):
         """
         Extracts supplier information from search results page (product cards).
         This version extracts all visible data from the search result card itself.
         """
+        try:
+            if self.extraction_mode == "batch":
+                return self.extract_supplier_data_batch()
+            if self.extraction_mode == "page_source":
+                return self.extract_supplier_data_from_source()
+        except Exception as e:
+            # Fall back to per-card extraction if the fast path fails (e.g. page navigated mid-call)
+            self.instrumentation.error("extraction", e)
+            self.logger.warning(f"{self.extraction_mode} extraction failed, falling back to per-card extraction: {str(e)}")
+
         suppliers = []
         
         try:
             # --- PRIMARY SELECTOR FOR INDIVIDUAL PRODUCT CARDS ---
             # Based on the new HTML (alibabaHTML2.txt), the most reliable selector is:
             # `.fy23-search-card.searchx-offer-item`
-            product_cards = self.driver.find_elements(By.CSS_SELECTOR, ".fy23-search-card.searchx-offer-item")
+            product_cards = self.driver.find_elements(By.CSS_SELECTOR, CARD_SELECTOR)
             
             if not product_cards:
-                self.logger.warning("No product cards found with '.fy23-search-card.searchx-offer-item'. Trying old selectors as fallback.")
-                product_cards = self.driver.find_elements(By.CSS_SELECTOR, ".organic-offer-wrapper .organic-offer-item")
+                self.logger.warning(f"No product cards found with '{CARD_SELECTOR}'. Trying old selectors as fallback.")
+                product_cards = self.driver.find_elements(By.CSS_SELECTOR, FALLBACK_CARD_SELECTOR)
             
             if not product_cards:
                 self.logger.warning("Still no product cards found after trying all known selectors on this search page.")
@@ -178,7 +659,8 @@ class AlibabaSupplierScraper:
                     supplier_info = self.extract_card_info(card)
                     if supplier_info:
                         suppliers.append(supplier_info)
-                        self.random_delay(0.5, 1)
+                        if self.card_delay:
+                            self.random_delay(0.5, 1)
                 except StaleElementReferenceException:
                     self.logger.warning("StaleElementReferenceException encountered. Skipping this card.")
                     continue
@@ -191,6 +673,28 @@ class AlibabaSupplierScraper:
             
         return suppliers
     
+    def extract_supplier_data_batch(self):
+        """
+        Extracts all product cards on the current page in a single WebDriver round trip.
+        Returns records with exactly the same schema as extract_card_info.
+        """
+        result = self.driver.execute_script(BATCH_EXTRACT_SCRIPT, CARD_SELECTOR, FALLBACK_CARD_SELECTOR) or {}
+        suppliers = result.get('cards') or []
+
+        if result.get('selector') == FALLBACK_CARD_SELECTOR:
+            self.logger.warning(f"No product cards found with '{CARD_SELECTOR}'. Used old selectors as fallback.")
+        if not suppliers:
+            self.logger.warning("Still no product cards found after trying all known selectors on this search page.")
+
+        return suppliers
+
+    def extract_supplier_data_from_source(self):
+        """
+        Fetches the page HTML once and parses every card in-process with page_parser.
+        Returns records with the same schema as extract_card_info.
+        """
+        return parse_search_page(self.driver.page_source, base_url=self.driver.current_url)
+
     def extract_card_info(self, card):
         """Extract information from individual supplier card on search results page"""
         supplier_info = {}
@@ -201,7 +705,8 @@ class AlibabaSupplierScraper:
             try:
                 title_element = card.find_element(By.CSS_SELECTOR, "h2.search-card-e-title a span") # Get the span text
                 supplier_info['product_title'] = title_element.text.strip()
-                supplier_info['product_url'] = title_element.find_element(By.XPATH, "./ancestor::a").get_attribute('href') # Get URL from parent <a>
+                # Nearest enclosing <a> (cards may sit inside a card-wide link), as closest('a') in the batch script
+                supplier_info['product_url'] = title_element.find_element(By.XPATH, "./ancestor::a[1]").get_attribute('href')
             except NoSuchElementException:
                 supplier_info['product_title'] = "N/A"
                 supplier_info['product_url'] = "N/A"
@@ -303,13 +808,13 @@ class AlibabaSupplierScraper:
             self.logger.warning(f"Error extracting individual card: {str(e)}", exc_info=True)
             return None
     
+    @timed_stage("pagination")
     def go_to_next_page(self):
         """Navigate to next page if available"""
         try:
             # Wait for pagination to be present
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".next-pagination-item"))
-            )
+            if not self.wait_for("pagination_ready", element_present(".next-pagination-item")):
+                raise TimeoutException("Pagination controls did not appear")
             
             next_button = None
             try:
@@ -334,20 +839,28 @@ class AlibabaSupplierScraper:
 
             if next_button:
                 WebDriverWait(self.driver, 5).until(EC.element_to_be_clickable(next_button))
+                previous_signature = self.page_signature()
+                self.pace(self.driver.current_url)
                 self.driver.execute_script("arguments[0].click();", next_button) # Use JS click for robustness
-                self.random_delay(2, 4)
+                self._count_page()
+                # Done as soon as different results are displayed
+                if not self.wait_for("pagination", page_changed(self.page_signature, previous_signature)):
+                    self.logger.warning("Results did not change after clicking Next.")
+                    return False
                 self.logger.info("Navigated to the next page.")
                 return True
             else:
                 self.logger.info("No next page button found or it is disabled.")
                 return False
-        except TimeoutException:
+        except TimeoutException as e:
+            self.instrumentation.error("pagination", e)
             self.logger.warning("Timeout waiting for pagination elements. Likely end of pages or page structure changed.")
             return False
         except NoSuchElementException:
             self.logger.warning("Next page button not found using XPATH or CSS selectors. Likely end of pages or pagination structure changed.")
             return False
         except Exception as e:
+            self.instrumentation.error("pagination", e)
             self.logger.error(f"Error navigating to next page: {str(e)}", exc_info=True)
             return False
     
@@ -359,36 +872,17 @@ class AlibabaSupplierScraper:
         self.logger.info(f"Data saved to {filename}")
     
     def save_to_csv(self, filename):
-        """Save scraped data to CSV file"""
+        """Save scraped data to CSV file (fixed column order, see exporters.EXPORT_FIELDS; .gz is compressed)"""
         self.logger.debug(f"DEBUG: Saving to CSV. suppliers_data length: {len(self.suppliers_data)}")
         if not self.suppliers_data:
             self.logger.warning("No data to save")
             return
-            
-        # Dynamically collect all possible keys from all scraped dictionaries
-        all_keys = set()
-        for item in self.suppliers_data:
-            all_keys.update(item.keys())
-        
-        # Sort keys for consistent CSV header order (optional but good practice)
-        fieldnames = sorted(list(all_keys)) 
-        
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            for row in self.suppliers_data:
-                # Create a clean row copy to handle complex fields and missing keys
-                cleaned_row = {}
-                for key in fieldnames:
-                    value = row.get(key)
-                    if isinstance(value, (list, dict)):
-                        # For lists and dictionaries, convert to JSON string
-                        cleaned_row[key] = json.dumps(value, ensure_ascii=False)
-                    else:
-                        # For other types, use the value directly (or default to empty string if None)
-                        cleaned_row[key] = value if value is not None else ""
-                writer.writerow(cleaned_row)
-        
+        self.export(filename, "csv.gz" if filename.endswith(".gz") else "csv")
+
+    def export(self, filename, fmt):
+        """Save scraped data with one of the streaming exporters ("ndjson", "csv", "csv.gz", "parquet")"""
+        with open_exporter(filename, fmt) as exporter:
+            exporter.write(self.suppliers_data)
         self.logger.info(f"Data saved to {filename}")
     
     def get_supplier_count(self):
@@ -397,10 +891,21 @@ class AlibabaSupplierScraper:
         self.logger.debug(f"DEBUG: get_supplier_count called. Returning: {count}")
         return count
     
-    def close(self):
-        """Close the browser driver"""
-        if self.driver: # Check if driver exists before quitting
-            self.driver.quit()
+    def close(self, force=False):
+        """Close the browser driver; force kills its processes instead of asking it to quit (hung browser)"""
+        if self._driver: # Check if driver exists before quitting (without launching a lazy one)
+            pid = self.browser_pid()
+            driver, self._driver = self._driver, None
+            if force:
+                kill_process_tree(pid)
+            else:
+                try:
+                    driver.quit()
+                except Exception as e:
+                    self.logger.warning(f"Browser did not quit cleanly ({str(e)}); killing it.")
+                    kill_process_tree(pid)
+            self._browser_started_at = None
+            self.pages_loaded = 0
             self.logger.info("Browser driver closed.")
         else:
             self.logger.info("Browser driver was not initialized or already closed.")
@@ -411,9 +916,12 @@ def main():
     scraper = AlibabaSupplierScraper(headless=False) # Keep False for debugging
     
     try:
-        # Search for suppliers
+        # Search for suppliers, appending each page to an NDJSON file as soon as it is scraped
         search_keyword = "corn grain"
-        scraper.search_suppliers(search_keyword, max_pages=2) # Adjust max_pages as needed
+        ndjson_filename = f"{search_keyword.replace(' ', '_')}_suppliers.ndjson"
+        with open_exporter(ndjson_filename, "ndjson") as exporter:
+            scraper.search_suppliers(search_keyword, max_pages=2, # Adjust max_pages as needed
+                                     on_page=lambda page_number, suppliers: exporter.write(suppliers))
         
         # Print results summary
         print(f"\n--- Scrape Summary ---")
@@ -422,9 +930,7 @@ def main():
         print(f"Found {scraper.get_supplier_count()} suppliers for '{search_keyword}'")
         
         # Save results
-        json_filename = f"{search_keyword.replace(' ', '_')}_suppliers.json"
-        csv_filename = f"{search_keyword.replace(' ', '_')}_suppliers.csv"
-        scraper.save_to_json(json_filename)
+        csv_filename = f"{search_keyword.replace(' ', '_')}_suppliers.csv.gz"
         scraper.save_to_csv(csv_filename)
         
         # Print first few results (if available)
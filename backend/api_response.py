@@ -0,0 +1,140 @@
+"""
+Response encoding for the Flask API.
+
+- JSON is encoded compactly with orjson (falls back to the standard library encoder without
+  indentation or spaces when orjson is not installed); NDJSON stream lines use the same dumps.
+- Field projection: ?fields=product_title,price (or "fields" in a JSON payload) limits each
+  supplier in a response to those keys.
+- Conditional GETs: JSON responses to GET requests carry a weak ETag of their body and are
+  answered with 304 Not Modified when the client's If-None-Match matches, so re-polling an
+  unchanged job, batch or query costs no body.
+- Compression: bodies are brotli (if the brotli package is installed) or gzip encoded when the
+  client accepts it. Streamed responses are compressed chunk by chunk with a flush after each
+  chunk, so NDJSON lines still reach the client as soon as they are produced.
+"""
+import gzip
+import json
+import zlib
+
+from flask import request
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError: # orjson is optional; the standard library encoder is used without it
+    orjson = None
+
+try:
+    import brotli
+except ImportError: # brotli is optional; gzip is offered without it
+    brotli = None
+
+# Bodies smaller than this are sent as is (compression would barely save a packet)
+MIN_COMPRESS_BYTES = 512
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/x-ndjson", "text/csv", "text/plain", "text/html"}
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5 # Close to gzip -6 in speed, noticeably smaller output
+
+
+def dumps(obj):
+    """Compact JSON text"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+class CompactJSONProvider(JSONProvider):
+    """Flask JSON provider (jsonify, request.get_json) backed by dumps()"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None:
+            return orjson.loads(s)
+        return json.loads(s)
+
+
+def parse_fields(value, allowed):
+    """
+    'product_title, price' or ['product_title', 'price'] -> ('product_title', 'price'); None or ''
+    -> None (all fields). Raises ValueError naming any field not in allowed.
+    """
+    if not value:
+        return None
+    names = value.split(",") if isinstance(value, str) else value
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        raise ValueError("'fields' must be a comma-separated string or a list of field names")
+    fields = tuple(dict.fromkeys(name.strip() for name in names if name.strip()))
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields {unknown}; available: {list(allowed)}")
+    return fields or None
+
+
+def project(record, fields):
+    """record (dict) restricted to fields, in their order; fields None keeps everything"""
+    if fields is None:
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+
+def _encoding(request):
+    offered = ["br", "gzip"] if brotli is not None else ["gzip"]
+    return request.accept_encodings.best_match(offered)
+
+
+def _compress_stream(chunks, encoding):
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk.encode("utf-8") if isinstance(chunk, str) else chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) # wbits 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        yield data + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def finalize_response(request, response):
+    """after_request hook: ETag / 304 for GETs of JSON, then compression"""
+    if response.status_code != 200 or response.headers.get("Content-Encoding"):
+        return response
+
+    if request.method == "GET" and not response.is_streamed and response.mimetype == "application/json":
+        response.add_etag(weak=True)
+        response.headers["Cache-Control"] = "no-cache" # Browsers revalidate instead of reusing stale copies
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = _encoding(request)
+    if not encoding:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < MIN_COMPRESS_BYTES:
+            return response
+        if encoding == "br":
+            response.set_data(brotli.compress(data, quality=BROTLI_QUALITY))
+        else:
+            response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_app(app):
+    """Install the compact JSON provider and the ETag / compression hook on app"""
+    app.json = CompactJSONProvider(app)
+    app.after_request(lambda response: finalize_response(request, response))
@@ -1,66 +1,954 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS # Import CORS for cross-origin requests
+import atexit
 import os
+import signal
 import sys
+import threading
+import time
+from contextlib import contextmanager
 
 # Add the directory containing your scraper to the Python path
 # This assumes alibaba_scraper2.py is in the same directory as app.py
 sys.path.append(os.path.dirname(__file__))
 
-from alibaba_scraper import AlibabaSupplierScraper
+from alibaba_scraper import DEFAULT_BASE_URL, resolve_chromedriver_path, search_page_url
+from api_response import dumps, init_app, parse_fields, project
+from batches import BatchScheduler
+from checkpoints import CheckpointStore
+from dedup import DedupIndex, seen_fraction
+from driver_pool import ScraperPool, PoolTimeout
+from enrichment import DEFAULT_ALLOWED_HOSTS, CompanyEnricher
+from exporters import available_formats, get_exporter_class, stream_export
+from jobs import JobManager
+from metrics import CONTENT_TYPE, REGISTRY, SIZE_BUCKETS, RequestTrace
+from page_crawl import CrawlInterrupted, open_page_crawl
+from result_cache import ResultCache
+from search_index import SupplierIndex
+from snapshots import SnapshotStore
+from supplier_record import PARSED_FIELDS, RAW_FIELDS, SupplierRecord
+from supplier_store import SupplierStore
+from waits import HostPacer
 
 app = Flask(__name__)
 CORS(app) # Enable CORS for all routes, allowing your frontend to access it
+# Compact orjson encoding, ETag / 304 on GETs and gzip/brotli compression of every response
+init_app(app)
 
-# Initialize the scraper globally or within the request context
-# It's better to initialize it once if it's stateless, or per request if stateful
-# For simplicity, we'll initialize it once here.
-# Consider using a queue or background tasks for long-running scraping jobs in production.
-scraper = AlibabaSupplierScraper(headless=False) # Set to True for production, False for debugging
+def env_flag(name, default=False):
+    """Read a boolean setting from the environment"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
 
-@app.route('/scrape', methods=['POST'])
-def scrape_alibaba():
+def env_number(name, default, cast=int):
+    """Read a numeric setting from the environment; an empty value means None"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return cast(value) if value.strip() else None
+
+# Local state (result cache etc.) lives here unless overridden per store
+DATA_DIR = os.environ.get('SCRAPER_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+# Site every crawl runs against, e.g. a local fixture server
+BASE_URL = os.environ.get('SCRAPER_BASE_URL', DEFAULT_BASE_URL)
+
+# Each request checks out its own scraper (and browser) from a bounded pool, so concurrent
+# /scrape calls never share a driver or a results list. Browsers are started on first use.
+scraper_pool = ScraperPool(
+    size=env_number('SCRAPER_POOL_SIZE', 2),
+    checkout_timeout=env_number('SCRAPER_CHECKOUT_TIMEOUT', 120, float), # Seconds a request may queue for a browser
+    max_waiting=env_number('SCRAPER_MAX_WAITING', 8), # Queued requests beyond this are rejected immediately
+    # Browsers are recycled after this many pages or above this much memory (empty value = never)
+    max_pages_per_browser=env_number('SCRAPER_MAX_PAGES_PER_BROWSER', 200),
+    max_browser_rss_mb=env_number('SCRAPER_MAX_BROWSER_RSS_MB', 1500),
+    health_check_timeout=env_number('SCRAPER_HEALTH_CHECK_TIMEOUT', 10, float),
+    headless=env_flag('SCRAPER_HEADLESS', False), # Set to True for production, False for debugging
+    browser_profile=os.environ.get('SCRAPER_BROWSER_PROFILE') or None, # "lite" (default when headless) or "full"
+    base_url=BASE_URL,
+    # One pacer per pooled browser: each browser spaces out its own navigations to a host, so
+    # parallel page crawls and batches load up to SCRAPER_POOL_SIZE pages per interval
+    pacer_factory=lambda: HostPacer(
+        min_interval=env_number('SCRAPE_HOST_INTERVAL', 2.0, float),
+        jitter=env_number('SCRAPE_HOST_JITTER', 1.0, float),
+    ),
+)
+
+# Scraped result pages are cached on disk per (normalized keyword, page) so repeated searches
+# are answered without driving a browser. Set SCRAPE_CACHE_ENABLED=false to turn it off.
+CACHE_MAX_MB = env_number('SCRAPE_CACHE_MAX_MB', 256, float)
+result_cache = ResultCache(
+    os.environ.get('SCRAPE_CACHE_PATH', os.path.join(DATA_DIR, 'result_cache.sqlite3')),
+    ttl=env_number('SCRAPE_CACHE_TTL', 6 * 3600, float), # Seconds a cached page is fresh
+    stale_ttl=env_number('SCRAPE_CACHE_STALE_TTL', 7 * 24 * 3600, float), # Extra seconds it may be served with allow_stale
+    max_bytes=CACHE_MAX_MB * 1024 * 1024 if CACHE_MAX_MB is not None else None, # Empty = no size cap
+) if env_flag('SCRAPE_CACHE_ENABLED', True) else None
+
+# Every scraped record is also persisted in an indexed store that backs GET /suppliers
+supplier_store = SupplierStore(os.environ.get('SUPPLIER_STORE_PATH', os.path.join(DATA_DIR, 'suppliers.sqlite3')))
+
+# Background jobs checkpoint every crawled page to an append-only JSONL file, so a job cut short by
+# a timeout, a crashed browser or a restart resumes from its last good page instead of page 1.
+# Set SCRAPE_CHECKPOINTS=false to turn it off.
+checkpoint_store = CheckpointStore(
+    os.environ.get('SCRAPE_CHECKPOINT_DIR', os.path.join(DATA_DIR, 'checkpoints')),
+    fsync=env_flag('SCRAPE_CHECKPOINT_FSYNC', True), # Force each page to disk before the next one
+    max_age=env_number('SCRAPE_CHECKPOINT_MAX_AGE', 7 * 24 * 3600, float), # Seconds an abandoned checkpoint is kept
+) if env_flag('SCRAPE_CHECKPOINTS', True) else None
+# Times a failing job is resumed from its checkpoint before it is marked failed
+JOB_RESUME_ATTEMPTS = env_number('SCRAPE_JOB_RESUME_ATTEMPTS', 3)
+
+# Every stored supplier is also kept in an in-memory full-text index behind GET /search/local.
+# It is filled from the store in the background at startup and updated as pages are scraped.
+search_index = SupplierIndex()
+search_index_state = {"loading": True, "error": None}
+
+def load_search_index():
+    start = time.perf_counter()
+    try:
+        for keyword, record, scraped_at in supplier_store.iter_records():
+            search_index.add(keyword, [record], scraped_at)
+        app.logger.info(f"Indexed {len(search_index)} stored suppliers in {time.perf_counter() - start:.1f}s")
+    except Exception as e:
+        search_index_state["error"] = str(e)
+        app.logger.exception(f"Loading the search index failed: {e}")
+    finally:
+        search_index_state["loading"] = False
+
+threading.Thread(target=load_search_index, name="search-index-load", daemon=True).start()
+
+# The last crawl of each keyword, diffed against by POST /scrape/changes and incremental crawls
+snapshot_store = SnapshotStore(os.environ.get('SNAPSHOT_STORE_PATH', os.path.join(DATA_DIR, 'snapshots.sqlite3')))
+# An incremental crawl stops after a page with at least this share of listings already in the snapshot
+INCREMENTAL_SEEN_RATIO = env_number('SCRAPE_INCREMENTAL_SEEN_RATIO', 0.9, float)
+
+# Company profile pages are fetched over plain keep-alive HTTP (no browser) for 'enrich' requests
+company_enricher = CompanyEnricher(
+    workers=env_number('ENRICH_WORKERS', 8),
+    per_host_limit=env_number('ENRICH_HOST_CONCURRENCY', 4), # Concurrent profile fetches per site
+    timeout=env_number('ENRICH_TIMEOUT', 15, float),
+    cache_ttl=env_number('ENRICH_CACHE_TTL', 24 * 3600, float), # Seconds a company's profile is reused
+    # Only https company URLs on these hosts (and subdomains) are fetched, e.g. "alibaba.com,127.0.0.1"
+    allowed_hosts=[host.strip() for host in os.environ.get('ENRICH_ALLOWED_HOSTS', ','.join(DEFAULT_ALLOWED_HOSTS)).split(',')
+                   if host.strip()],
+    allow_http=env_flag('ENRICH_ALLOW_HTTP'), # Plain http too (local fixture server)
+)
+MAX_ENRICH_RECORDS = env_number('ENRICH_MAX_RECORDS', 2000)
+
+# Startup never blocks on Chrome: browsers are launched on first use, or pre-warmed in a
+# background thread (SCRAPER_PREWARM browsers) while /health already answers.
+startup_state = {"ready": False, "chromedriver": None, "prewarmed": 0, "error": None, "started_at": time.time()}
+
+def warm_up():
+    try:
+        startup_state["chromedriver"] = resolve_chromedriver_path()
+        startup_state["prewarmed"] = scraper_pool.warm(env_number('SCRAPER_PREWARM', 1))
+        startup_state["ready"] = True
+        app.logger.info(f"Scraper warm-up finished in {time.time() - startup_state['started_at']:.1f}s")
+    except Exception as e:
+        startup_state["error"] = str(e)
+        app.logger.exception(f"Scraper warm-up failed: {e}")
+
+def start_warm_up():
+    """Resolve chromedriver and pre-warm browsers without blocking the server from starting"""
+    threading.Thread(target=warm_up, name="scraper-warm-up", daemon=True).start()
+
+# Request-level metrics, exported with the scraper's stage metrics at GET /metrics
+REQUEST_SECONDS = REGISTRY.histogram(
+    "scrape_request_seconds", "Latency of scrape requests, by endpoint and cache status", ("endpoint", "cache"))
+IN_FLIGHT = REGISTRY.gauge("scrapes_in_flight", "Scrape requests currently being served", ("endpoint",))
+REQUEST_ERRORS = REGISTRY.counter(
+    "scrape_request_errors_total", "Failed scrape requests (busy = no browser available)", ("endpoint", "kind"))
+PAGES_SCRAPED = REGISTRY.counter("scraper_pages_total", "Result pages scraped with a browser (rate() gives pages/sec)")
+SUPPLIERS_PER_PAGE = REGISTRY.histogram(
+    "scraper_suppliers_per_page", "Suppliers extracted per scraped result page", buckets=SIZE_BUCKETS)
+DUPLICATES_DROPPED = REGISTRY.counter(
+    "scraper_duplicate_listings_total", "Listings dropped because an earlier page of the same crawl had them")
+INCREMENTAL_STOPS = REGISTRY.counter(
+    "scraper_incremental_stops_total", "Incremental crawls that stopped early on an already-seen page")
+JOB_RESUMES = REGISTRY.counter(
+    "scrape_job_resumes_total", "Jobs resumed from a checkpoint (after an error or a restart)", ("reason",))
+LOCAL_SEARCH_SECONDS = REGISTRY.histogram(
+    "local_search_seconds", "Latency of in-memory supplier searches (GET /search/local)",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+POOL_BROWSERS = REGISTRY.gauge("scraper_pool_browsers", "Pooled browsers by state", ("state",))
+POOL_BROWSERS.set_function(lambda: {
+    (state,): value for state, value in scraper_pool.stats().items() if state in ("idle", "in_use", "waiting")
+})
+
+@contextmanager
+def track_scrape(endpoint):
     """
-    API endpoint to initiate the scraping process.
-    Expects a JSON payload with 'keyword' and optional 'max_pages'.
+    Count a scrape request as in flight and record its latency and failures. The caller stores
+    the cache status in the yielded dict for the latency label.
     """
-    data = request.get_json()
+    IN_FLIGHT.inc(endpoint=endpoint)
+    outcome = {"cache": "none"}
+    start = time.perf_counter()
+    try:
+        yield outcome
+    except PoolTimeout:
+        REQUEST_ERRORS.inc(endpoint=endpoint, kind="busy")
+        raise
+    except Exception:
+        REQUEST_ERRORS.inc(endpoint=endpoint, kind="error")
+        raise
+    finally:
+        IN_FLIGHT.dec(endpoint=endpoint)
+        REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint, cache=outcome["cache"])
+
+def request_trace(data):
+    """A RequestTrace if the payload asks for one ('trace': true) and the app runs in debug mode"""
+    return RequestTrace() if app.debug and data.get('trace') else None
+
+# Result pages fetched at once per crawl (each in its own pooled browser, via direct page URLs).
+# 1 keeps the sequential single-browser crawl.
+PARALLEL_PAGES = env_number('SCRAPE_PARALLEL_PAGES', scraper_pool.size)
+
+def crawl_search_pages(keyword, max_pages, stop_event=None, trace=None, incremental=False, changes=None, checkpoint=None):
+    """
+    Crawl with pooled scrapers. Each page is parsed into SupplierRecords once, listings already
+    seen on an earlier page of the crawl are dropped, and the rest is written to the supplier store
+    and result cache (with parsed fields, so cache hits skip parsing). A crawl that runs to the end
+    replaces the keyword's snapshot.
+
+    incremental: stop after the first page made up almost entirely (INCREMENTAL_SEEN_RATIO) of
+    listings already in the keyword's snapshot or on earlier pages
+    changes: optional dict, filled with the diff against the previous snapshot once the crawl is done
+    checkpoint: optional checkpoints.CrawlCheckpoint. Its pages are replayed first and the crawl
+    continues after them, appending each new page. An error before max_pages then raises
+    CrawlInterrupted instead of ending the crawl quietly, so the caller can resume it.
+    """
+    seen = DedupIndex()
+    known = snapshot_store.known_keys(keyword) if incremental else None
+    crawled, last_page, stopped_early, reached_last_page = [], 0, False, False
+    if checkpoint is not None:
+        for page_number, records in checkpoint.pages():
+            last_page = page_number
+            crawled.extend(seen.filter(records))
+            yield page_number, records
+        reached_last_page = checkpoint.reached_last_page
+        if last_page:
+            app.logger.info(f"Resuming crawl of '{keyword}' after checkpointed page {last_page} of {max_pages}")
+    if checkpoint is None or not checkpoint.done:
+        first_signature = checkpoint.first_signature if checkpoint is not None else None
+        with open_page_crawl(scraper_pool, keyword, max_pages, PARALLEL_PAGES, stop_event, trace,
+                             last_page + 1, first_signature) as crawl:
+            for page_number, suppliers in crawl:
+                last_page = page_number
+                fraction = seen_fraction(suppliers, known | seen.keys) if known else 0.0
+                records = store_page(keyword, page_number, suppliers, seen)
+                if checkpoint is not None:
+                    next_url = search_page_url(keyword, BASE_URL, page_number + 1) if page_number < max_pages else None
+                    checkpoint.append(page_number, records, next_url, signature=crawl.first_signature if page_number == 1 else None)
+                crawled.extend(records)
+                yield page_number, records
+                if fraction >= INCREMENTAL_SEEN_RATIO and page_number < max_pages:
+                    app.logger.info(f"Page {page_number} of '{keyword}' is {fraction:.0%} already seen; stopping incremental crawl")
+                    INCREMENTAL_STOPS.inc()
+                    stopped_early = True
+                    break
+            reached_last_page = crawl.reached_last_page and not stopped_early
+            error = None if stopped_early else crawl.error
+        if checkpoint is not None:
+            if reached_last_page:
+                checkpoint.mark(reached_last_page=True)
+            if error:
+                raise CrawlInterrupted(f"Crawl of '{keyword}' stopped after page {last_page} of {max_pages}: {error}")
+    if reached_last_page and last_page:
+        mark_last_page(keyword, last_page)
+    if last_page:
+        diff = snapshot_store.update(keyword, crawled, last_page, exhaustive=reached_last_page)
+        if changes is not None:
+            changes.update(diff, pages=last_page, stopped_early=stopped_early)
+
+def store_page(keyword, page_number, suppliers, seen=None):
+    """
+    Parse a freshly scraped page into SupplierRecords and write it to the store, search index and cache.
+    seen: optional DedupIndex of the crawl; listings it already holds are dropped (and added otherwise)
+    """
+    PAGES_SCRAPED.inc()
+    SUPPLIERS_PER_PAGE.observe(len(suppliers))
+    records = [SupplierRecord.from_dict(supplier) for supplier in suppliers]
+    if seen is not None:
+        duplicates = seen.duplicates
+        records = seen.filter(records)
+        DUPLICATES_DROPPED.inc(seen.duplicates - duplicates)
+    supplier_store.add(keyword, records)
+    search_index.add(keyword, records)
+    if result_cache:
+        result_cache.put(keyword, page_number, [record.to_dict() for record in records])
+    return records
+
+def mark_last_page(keyword, page_number):
+    if result_cache:
+        result_cache.mark_last(keyword, page_number)
+
+def cached_pages(keyword, max_pages, allow_stale=False):
+    """Cached pages as ([(page_number, [SupplierRecord])], "hit" or "stale"), or None on a miss"""
+    if not result_cache:
+        return None
+    cached = result_cache.lookup(keyword, max_pages, allow_stale=allow_stale)
+    if not cached:
+        return None
+    pages, stale = cached
+    seen = DedupIndex() # Pages cached before de-duplication may still repeat listings
+    pages = [(page_number, seen.filter([SupplierRecord.from_dict(supplier) for supplier in suppliers]))
+             for page_number, suppliers in pages]
+    return pages, ("stale" if stale else "hit")
 
+def search_pages(keyword, max_pages, refresh=False, allow_stale=False, enrich=False, stop_event=None, trace=None,
+                 checkpoint=None):
+    """
+    Resolve a search through the result cache, falling back to a browser crawl.
+    Returns (iterable of (page_number, [SupplierRecord]), cache_status) where cache_status is
+    "hit", "stale", "miss", "refresh" or "disabled".
+    enrich: merge each company's profile into the records, page by page (company_enricher)
+    checkpoint: CrawlCheckpoint a crawl resumes from and appends to (see crawl_search_pages)
+    """
+    if not result_cache:
+        pages, cache_status = crawl_search_pages(keyword, max_pages, stop_event, trace, checkpoint=checkpoint), "disabled"
+    elif refresh:
+        pages, cache_status = crawl_search_pages(keyword, max_pages, stop_event, trace, checkpoint=checkpoint), "refresh"
+    else:
+        pages, cache_status = cached_pages(keyword, max_pages, allow_stale) or (
+            crawl_search_pages(keyword, max_pages, stop_event, trace, checkpoint=checkpoint), "miss")
+    if enrich:
+        pages = company_enricher.enrich_pages(pages)
+    return pages, cache_status
+
+def run_scrape_job(keyword, max_pages, on_page, stop_event, job_id=None, refresh=False, allow_stale=False, enrich=False):
+    """
+    Job runner: waits for a pooled scraper (re-queueing on timeouts) and crawls with progress updates.
+    Every crawled page is checkpointed under the job id. A crawl that fails part-way is resumed
+    from its last checkpointed page (up to JOB_RESUME_ATTEMPTS times), and the checkpoint is kept
+    when the job fails or is stopped by a shutdown, for POST /jobs/<id>/resume or the next start.
+    """
+    checkpoint = None
+    if checkpoint_store and job_id:
+        options = {"refresh": refresh, "allow_stale": allow_stale, "enrich": enrich}
+        checkpoint = checkpoint_store.open(job_id, keyword, max_pages, options)
+    delivered = 0 # Pages passed to on_page; a resumed attempt replays the checkpointed ones first
+    failures = 0
+    finished = False
+    try:
+        while not stop_event.is_set():
+            try:
+                with track_scrape('job') as tracked:
+                    pages, tracked["cache"] = search_pages(
+                        keyword, max_pages, refresh, allow_stale, enrich, stop_event, checkpoint=checkpoint)
+                    for page_number, suppliers in pages:
+                        if page_number > delivered:
+                            on_page(page_number, suppliers)
+                            delivered = page_number
+                finished = not stop_event.is_set() or checkpoint is None or checkpoint.done
+                return
+            except PoolTimeout as e:
+                app.logger.info(f"Job for '{keyword}' still waiting for a browser: {e}")
+                time.sleep(1)
+            except Exception as e:
+                failures += 1
+                if checkpoint is None or failures > JOB_RESUME_ATTEMPTS:
+                    if checkpoint is not None:
+                        checkpoint.mark(error=e)
+                    raise
+                app.logger.warning(f"Job for '{keyword}' failed after page {checkpoint.last_page} ({e}); "
+                                   f"resuming from the checkpoint (attempt {failures} of {JOB_RESUME_ATTEMPTS})")
+                JOB_RESUMES.inc(reason="error")
+                stop_event.wait(min(2 ** failures, 30)) # Back off before loading the site again
+    finally:
+        if checkpoint is not None:
+            # Completed crawls need no checkpoint; interrupted ones keep it for a later resume
+            if finished:
+                checkpoint_store.discard(job_id)
+            else:
+                checkpoint_store.release(job_id)
+
+# Background crawls for POST /jobs; workers share the scraper pool with synchronous /scrape calls
+job_manager = JobManager(
+    run_scrape_job,
+    workers=env_number('SCRAPE_JOB_WORKERS', scraper_pool.size),
+    max_finished=env_number('SCRAPE_JOB_HISTORY', 200), # Finished jobs kept for GET /jobs/<id>
+)
+
+# Multi-keyword batches: (keyword, page) units interleaved across pooled browsers
+batch_scheduler = BatchScheduler(
+    scraper_pool,
+    store_page,
+    lookup_cached=cached_pages,
+    mark_last=mark_last_page,
+    snapshot=snapshot_store.update,
+    base_url=BASE_URL,
+    workers=env_number('SCRAPE_BATCH_WORKERS', scraper_pool.size),
+    per_host_limit=env_number('SCRAPE_HOST_CONCURRENCY', None), # Concurrent page loads per site (empty = pool size)
+    max_finished=env_number('SCRAPE_BATCH_HISTORY', 50),
+)
+MAX_BATCH_KEYWORDS = env_number('SCRAPE_BATCH_MAX_KEYWORDS', 100)
+
+def resume_checkpointed_jobs():
+    """Re-queue, under their old ids, the jobs a previous process left unfinished"""
+    if not checkpoint_store:
+        return
+    pruned = checkpoint_store.prune()
+    if pruned:
+        app.logger.info(f"Deleted {pruned} abandoned crawl checkpoints")
+    for checkpoint in checkpoint_store.pending():
+        app.logger.info(f"Resuming job {checkpoint.crawl_id} for '{checkpoint.keyword}' after page {checkpoint.last_page}")
+        job_manager.submit(checkpoint.keyword, checkpoint.max_pages, job_id=checkpoint.crawl_id, **checkpoint.options)
+        JOB_RESUMES.inc(reason="restart")
+
+def parse_scrape_request(data):
+    """
+    Validate a scrape payload. Returns (params, error_response) where params holds
+    keyword, max_pages and the cache flags refresh / allow_stale.
+    """
     if not data:
-        return jsonify({"error": "Invalid JSON payload"}), 400
+        return None, (jsonify({"error": "Invalid JSON payload"}), 400)
 
     keyword = data.get('keyword')
     max_pages = data.get('max_pages', 2) # Default to 2 pages if not provided
 
     if not keyword:
-        return jsonify({"error": "Missing 'keyword' in request payload"}), 400
+        return None, (jsonify({"error": "Missing 'keyword' in request payload"}), 400)
+    if not isinstance(max_pages, int) or max_pages < 1:
+        return None, (jsonify({"error": "'max_pages' must be a positive integer"}), 400)
+
+    params = {
+        "keyword": keyword,
+        "max_pages": max_pages,
+        "refresh": bool(data.get('refresh', False)), # Ignore cached pages and re-crawl
+        "allow_stale": bool(data.get('allow_stale', False)), # Accept cached pages past their TTL
+        "enrich": bool(data.get('enrich', False)), # Add each company's profile page details
+    }
+    return params, None
+
+# Keys a 'fields' projection may name: the supplier record plus what the store and enrichment add
+RESPONSE_FIELDS = RAW_FIELDS + PARSED_FIELDS + ('company_profile', 'id', 'keyword', 'scraped_at')
+
+def parse_fields_request(data=None):
+    """
+    'fields' projection from the query string (?fields=product_title,price) or the JSON payload.
+    Returns (fields or None for all, error_response).
+    """
+    try:
+        return parse_fields(request.args.get('fields') or (data or {}).get('fields'), RESPONSE_FIELDS), None
+    except ValueError as e:
+        return None, (jsonify({"error": str(e)}), 400)
+
+@app.route('/scrape', methods=['POST'])
+def scrape_alibaba():
+    """
+    API endpoint to initiate the scraping process.
+    Expects a JSON payload with 'keyword', optional 'max_pages' and optional cache flags
+    'refresh' (bypass the cache) and 'allow_stale' (accept expired cache entries).
+    'enrich': true adds a 'company_profile' to each supplier (fetched once per company, no browser).
+    'fields' (list, or ?fields=a,b) limits each supplier to those keys.
+    In debug mode, 'trace': true adds a per-stage timeline of the request to the response.
+    """
+    data = request.get_json(silent=True)
+    params, error = parse_scrape_request(data)
+    if error:
+        return error
+    fields, error = parse_fields_request(data)
+    if error:
+        return error
+    keyword, max_pages = params['keyword'], params['max_pages']
+    trace = request_trace(data)
 
     app.logger.info(f"Received scrape request for keyword: '{keyword}', max_pages: {max_pages}")
 
     try:
-        # Clear previous data before a new scrape
-        scraper.suppliers_data = [] 
-        scraper.search_suppliers(keyword, max_pages=max_pages)
-        
-        scraped_data = scraper.suppliers_data
+        with track_scrape('scrape') as tracked:
+            # Results are returned per call, so nothing is shared with other in-flight requests
+            pages, cache_status = search_pages(**params, trace=trace)
+            tracked["cache"] = cache_status
+            scraped_data = [record.to_dict(fields=fields) for _, records in pages for record in records]
         
         # You can choose to save to file here, or just return the data
         # For an API, returning the data directly is usually preferred.
         # If you need to save, consider making it an option in the request.
 
-        app.logger.info(f"Scraped {len(scraped_data)} suppliers for '{keyword}'")
-        return jsonify({"status": "success", "data": scraped_data}), 200
+        app.logger.info(f"Scraped {len(scraped_data)} suppliers for '{keyword}' (cache: {cache_status})")
+        body = {"status": "success", "cache": cache_status, "data": scraped_data}
+        if trace:
+            body["trace"] = trace.to_dict()
+        return jsonify(body), 200
 
+    except PoolTimeout as e:
+        app.logger.warning(f"No browser available for keyword '{keyword}': {e}")
+        return jsonify({"status": "error", "message": f"All scrapers are busy, please retry later ({e})"}), 503
     except Exception as e:
         app.logger.exception(f"Error during scraping for keyword '{keyword}': {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@app.route('/scrape/stream', methods=['POST'])
+def scrape_alibaba_stream():
+    """
+    Streaming variant of /scrape. Same payload; the response is NDJSON with one line per
+    result page as soon as it is extracted:
+        {"type": "page", "page": 1, "data": [...]}
+    followed by a final {"type": "done", "pages": N, "total": M, "cache": ...} or {"type": "error", "message": ...}.
+    In debug mode, 'trace': true adds the request's stage timeline to the "done" line.
+    """
+    data = request.get_json(silent=True)
+    params, error = parse_scrape_request(data)
+    if error:
+        return error
+    fields, error = parse_fields_request(data)
+    if error:
+        return error
+    keyword, max_pages = params['keyword'], params['max_pages']
+    trace = request_trace(data)
+
+    app.logger.info(f"Received streaming scrape request for keyword: '{keyword}', max_pages: {max_pages}")
+
+    def generate():
+        pages = total = 0
+        try:
+            with track_scrape('scrape_stream') as tracked:
+                # On a cache miss the browser stays checked out until the stream ends or the client disconnects
+                page_iter, cache_status = search_pages(**params, trace=trace)
+                tracked["cache"] = cache_status
+                for page_number, records in page_iter:
+                    pages, total = page_number, total + len(records)
+                    data = [record.to_dict(fields=fields) for record in records]
+                    yield dumps({"type": "page", "page": page_number, "data": data}) + "\n"
+            app.logger.info(f"Streamed {total} suppliers over {pages} pages for '{keyword}' (cache: {cache_status})")
+            done = {"type": "done", "pages": pages, "total": total, "cache": cache_status}
+            if trace:
+                done["trace"] = trace.to_dict()
+            yield dumps(done) + "\n"
+        except PoolTimeout as e:
+            yield dumps({"type": "error", "message": f"All scrapers are busy, please retry later ({e})"}) + "\n"
+        except Exception as e:
+            app.logger.exception(f"Error during streaming scrape for keyword '{keyword}': {e}")
+            yield dumps({"type": "error", "message": str(e)}) + "\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}, # Keep proxies from buffering the stream
+    )
+
+@app.route('/scrape/changes', methods=['POST'])
+def scrape_changes():
+    """
+    Re-crawl a keyword and return only what changed since its last snapshot (its previous crawl):
+        {"status": "success", "pages": N, "stopped_early": bool, "previous_snapshot_at": ...,
+         "removals_checked": bool, "unchanged": M, "changes": {"new": [...], "removed": [...], "price_changed": [...]}}
+    Same payload as /scrape (the cache is bypassed) plus 'incremental' (default true): stop at the
+    first page made up almost entirely of listings already seen. 'removed' is only filled in when
+    the crawl covered the previous snapshot's pages (removals_checked); listings on pages an early
+    stop did not visit are kept. The first call for a keyword reports every listing as new.
+    """
+    data = request.get_json(silent=True)
+    params, error = parse_scrape_request(data)
+    if error:
+        return error
+    fields, error = parse_fields_request(data)
+    if error:
+        return error
+    keyword, max_pages = params['keyword'], params['max_pages']
+    incremental = bool(data.get('incremental', True))
+    trace = request_trace(data)
+
+    app.logger.info(f"Received changes request for keyword: '{keyword}', max_pages: {max_pages}, incremental: {incremental}")
+    changes = {}
+    try:
+        with track_scrape('changes') as tracked:
+            tracked["cache"] = "refresh"
+            for _ in crawl_search_pages(keyword, max_pages, trace=trace, incremental=incremental, changes=changes):
+                pass
+    except PoolTimeout as e:
+        app.logger.warning(f"No browser available for keyword '{keyword}': {e}")
+        return jsonify({"status": "error", "message": f"All scrapers are busy, please retry later ({e})"}), 503
+    except Exception as e:
+        app.logger.exception(f"Error during changes scrape for keyword '{keyword}': {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+    body = {
+        "status": "success",
+        "pages": changes.get('pages', 0),
+        "stopped_early": changes.get('stopped_early', False),
+        "previous_snapshot_at": changes.get('previous_snapshot_at'),
+        "removals_checked": changes.get('removals_checked', False),
+        "unchanged": changes.get('unchanged', 0),
+        "changes": {
+            "new": [project(record, fields) for record in changes.get('new', [])],
+            "removed": [project(record, fields) for record in changes.get('removed', [])],
+            "price_changed": [{**project(record, fields), "previous_price": record["previous_price"]}
+                              for record in changes.get('price_changed', [])],
+        },
+    }
+    if trace:
+        body["trace"] = trace.to_dict()
+    return jsonify(body), 200
+
+@app.route('/export', methods=['POST'])
+def export_suppliers():
+    """
+    Download the results of a search as a file. Same payload as /scrape plus 'format'
+    ("ndjson" (default), "csv", "csv.gz" or "parquet"). The file is streamed: each result page
+    is encoded and sent as soon as it is available (from the cache or the browser).
+    """
+    data = request.get_json(silent=True)
+    params, error = parse_scrape_request(data)
+    if error:
+        return error
+    fmt = data.get('format', 'ndjson')
+    if fmt not in available_formats():
+        return jsonify({"error": f"'format' must be one of {available_formats()}"}), 400
+    exporter_class = get_exporter_class(fmt)
+
+    app.logger.info(f"Received export request for keyword: '{params['keyword']}', format: {fmt}")
+    params['enrich'] = False # The export schema has no profile columns
+    try:
+        # Fetch the first page before the response starts, so a busy pool or failed crawl still gets a status code
+        page_iter, cache_status = search_pages(**params)
+        page_iter = iter(page_iter)
+        first_page = next(page_iter, None)
+    except PoolTimeout as e:
+        app.logger.warning(f"No browser available for export of '{params['keyword']}': {e}")
+        return jsonify({"status": "error", "message": f"All scrapers are busy, please retry later ({e})"}), 503
+    except Exception as e:
+        app.logger.exception(f"Error during export for keyword '{params['keyword']}': {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+    def batches():
+        if first_page is None:
+            return
+        yield first_page[1]
+        for _, records in page_iter:
+            yield records
+
+    filename = f"{params['keyword'].strip().replace(' ', '_')}_suppliers.{exporter_class.extension}"
+    return Response(
+        stream_with_context(stream_export(fmt, batches())),
+        mimetype=exporter_class.mimetype,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Cache": cache_status,
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+@app.route('/enrich', methods=['POST'])
+def enrich_suppliers():
+    """
+    Add company profiles to suppliers already scraped, without a browser. Payload:
+        {"data": [suppliers as returned by /scrape]}
+    Returns {"status": "success", "companies": N, "data": [...]} where each supplier carries a
+    'company_profile' (business type, year established, employees, revenue, main products and
+    markets, or an 'error'). Each company is fetched once, however many of its products are listed.
+    Only https company URLs on ENRICH_ALLOWED_HOSTS are fetched; others get an 'error' profile.
+    """
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get('data'), list):
+        return jsonify({"error": "'data' must be a list of suppliers"}), 400
+    if len(data['data']) > MAX_ENRICH_RECORDS:
+        return jsonify({"error": f"At most {MAX_ENRICH_RECORDS} suppliers per request"}), 400
+    if not all(isinstance(supplier, dict) for supplier in data['data']):
+        return jsonify({"error": "Each supplier must be an object"}), 400
+    if not all(isinstance(supplier.get('company_url'), (str, type(None))) for supplier in data['data']):
+        return jsonify({"error": "'company_url' must be a string"}), 400
+    fields, error = parse_fields_request(data)
+    if error:
+        return error
+
+    try:
+        records = company_enricher.enrich(data['data'])
+    except Exception as e:
+        app.logger.exception(f"Error during enrichment: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+    companies = len({record.company_url for record in records if record.company_profile is not None})
+    return jsonify({"status": "success", "companies": companies, "data": [record.to_dict(fields=fields) for record in records]}), 200
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """
+    Enqueue a background scrape. Same payload as /scrape; returns the job id immediately.
+    Poll GET /jobs/<id> for status, progress and partial results.
+    """
+    params, error = parse_scrape_request(request.get_json(silent=True))
+    if error:
+        return error
+
+    job = job_manager.submit(**params)
+    return jsonify({"status": "queued", "job_id": job.id, "job": job.to_dict(include_data=False)}), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Job status and progress. Pass ?include_data=false to omit the (partial) supplier list, or
+    ?fields=a,b to limit each supplier to those keys. Re-polls with If-None-Match get a 304 while nothing changed.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"Unknown job '{job_id}'"}), 404
+    fields, error = parse_fields_request()
+    if error:
+        return error
+    include_data = request.args.get('include_data', 'true').lower() not in ('0', 'false', 'no')
+    return jsonify(job.to_dict(include_data=include_data, fields=fields)), 200
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a queued or running job; a running crawl stops before its next page. Its checkpoint is dropped."""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"Unknown job '{job_id}'"}), 404
+    if checkpoint_store:
+        checkpoint_store.discard(job_id)
+    return jsonify(job.to_dict(include_data=False)), 200
+
+@app.route('/jobs/<job_id>/checkpoint', methods=['GET'])
+def get_job_checkpoint(job_id):
+    """Crawl checkpoint of a job: last completed page, next page URL and records saved so far."""
+    checkpoint = checkpoint_store.get(job_id) if checkpoint_store else None
+    if checkpoint is None:
+        return jsonify({"status": "error", "message": f"No checkpoint for job '{job_id}'"}), 404
+    return jsonify(checkpoint.to_dict()), 200
+
+@app.route('/jobs/<job_id>/resume', methods=['POST'])
+def resume_job(job_id):
+    """
+    Re-queue a failed or interrupted job from its checkpoint, under the same id: the checkpointed
+    pages are reported again without being re-crawled and the crawl continues after the last one.
+    """
+    checkpoint = checkpoint_store.get(job_id) if checkpoint_store else None
+    if checkpoint is None:
+        return jsonify({"status": "error", "message": f"No checkpoint for job '{job_id}'"}), 404
+    try:
+        job = job_manager.submit(checkpoint.keyword, checkpoint.max_pages, job_id=job_id, **checkpoint.options)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 409
+    JOB_RESUMES.inc(reason="request")
+    return jsonify({"status": "queued", "job_id": job.id, "resume_after_page": checkpoint.last_page,
+                    "job": job.to_dict(include_data=False)}), 202
+
+def parse_batch_request(data):
+    """
+    Validate a batch payload. Returns ([(keyword, max_pages)], options, error_response).
+    'keywords' items are strings or {"keyword": ..., "max_pages": ...}; 'max_pages' is the default.
+    """
+    if not data or not isinstance(data.get('keywords'), list) or not data['keywords']:
+        return None, None, (jsonify({"error": "'keywords' must be a non-empty list"}), 400)
+    if len(data['keywords']) > MAX_BATCH_KEYWORDS:
+        return None, None, (jsonify({"error": f"At most {MAX_BATCH_KEYWORDS} keywords per batch"}), 400)
+
+    default_pages = data.get('max_pages', 2)
+    keywords = []
+    for item in data['keywords']:
+        if isinstance(item, str):
+            item = {"keyword": item}
+        if not isinstance(item, dict):
+            return None, None, (jsonify({"error": "Each keyword must be a string or an object"}), 400)
+        params, error = parse_scrape_request({"max_pages": default_pages, **item})
+        if error:
+            return None, None, error
+        keywords.append((params['keyword'], params['max_pages']))
+
+    options = {
+        "refresh": bool(data.get('refresh', False)),
+        "allow_stale": bool(data.get('allow_stale', False)),
+    }
+    return keywords, options, None
+
+@app.route('/batches', methods=['POST'])
+def create_batch():
+    """
+    Scrape many keywords together. Payload:
+        {"keywords": ["corn", {"keyword": "soybean", "max_pages": 4}], "max_pages": 2, "refresh": false, "allow_stale": false}
+    Returns the batch id immediately. Pages of all keywords are fetched interleaved across the
+    pooled browsers; GET /batches/<id> shows each keyword's results as soon as that keyword is done.
+    """
+    keywords, options, error = parse_batch_request(request.get_json(silent=True))
+    if error:
+        return error
+    batch = batch_scheduler.submit(keywords, **options)
+    return jsonify({"status": "queued", "batch_id": batch.id, "batch": batch.to_dict(include_data=False)}), 202
+
+@app.route('/batches/<batch_id>', methods=['GET'])
+def get_batch(batch_id):
+    """
+    Batch status with results keyed by keyword. Pass ?include_data=false to omit the supplier lists,
+    or ?fields=a,b to limit each supplier to those keys. Re-polls with If-None-Match get a 304 while nothing changed.
+    """
+    batch = batch_scheduler.get(batch_id)
+    if batch is None:
+        return jsonify({"status": "error", "message": f"Unknown batch '{batch_id}'"}), 404
+    fields, error = parse_fields_request()
+    if error:
+        return error
+    include_data = request.args.get('include_data', 'true').lower() not in ('0', 'false', 'no')
+    return jsonify(batch.to_dict(include_data=include_data, fields=fields)), 200
+
+@app.route('/batches/<batch_id>', methods=['DELETE'])
+def cancel_batch(batch_id):
+    """Cancel a batch; finished keywords keep their results, pages not started yet are dropped."""
+    batch = batch_scheduler.cancel(batch_id)
+    if batch is None:
+        return jsonify({"status": "error", "message": f"Unknown batch '{batch_id}'"}), 404
+    return jsonify(batch.to_dict(include_data=False)), 200
+
+def query_number(name, cast=float):
+    """Optional numeric query parameter; raises ValueError with a readable message if malformed"""
+    value = request.args.get(name, '').strip()
+    if not value:
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be a number")
+
+@app.route('/suppliers', methods=['GET'])
+def query_suppliers():
+    """
+    Query stored suppliers with the same filters as the frontend table, server-side.
+    Query parameters (all optional):
+        keyword, price_min, price_max, location (repeatable), years_min,
+        certification (repeatable, any-of), response_rate_min,
+        sort (scraped_at|price|years|rating|response_rate|location|company_name|product_title),
+        order (asc|desc), limit (1-500, default 50), cursor (next_cursor from the previous page),
+        fields (comma-separated keys to return per supplier)
+    """
+    fields, error = parse_fields_request()
+    if error:
+        return error
+    try:
+        limit = query_number('limit', int) or 50
+        result = supplier_store.query(
+            keyword=request.args.get('keyword'),
+            price_min=query_number('price_min'),
+            price_max=query_number('price_max'),
+            locations=request.args.getlist('location'),
+            years_min=query_number('years_min'),
+            certifications=request.args.getlist('certification'),
+            response_rate_min=query_number('response_rate_min'),
+            sort=request.args.get('sort', 'scraped_at'),
+            order=request.args.get('order', 'asc').lower(),
+            limit=max(1, min(limit, 500)),
+            cursor=request.args.get('cursor') or None,
+        )
+    except (ValueError, TypeError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    result['data'] = [project(record, fields) for record in result['data']]
+    return jsonify({"status": "success", **result}), 200
+
+@app.route('/search/local', methods=['GET'])
+def search_local():
+    """
+    Full-text search over every stored supplier, answered from memory instead of a browser crawl.
+    Query parameters:
+        q (required): matched against product title, company name, location and certifications;
+            every term must match, as a word or a word prefix ("yel" finds "yellow")
+        keyword (optional): only suppliers scraped for this keyword, e.g. q=yellow&keyword=corn grain
+        limit (1-500, default 50), offset, fields (comma-separated keys per supplier)
+    Returns {"status": "success", "total": N, "took_ms": ..., "indexing": bool, "data": [...]}, best
+    matches first; each supplier carries its "keyword", "scraped_at" and relevance "score".
+    "indexing" is true while stored suppliers are still being loaded at startup.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Missing 'q' query parameter"}), 400
+    fields, error = parse_fields_request()
+    if error:
+        return error
+    try:
+        limit = max(1, min(query_number('limit', int) or 50, 500))
+        offset = max(0, query_number('offset', int) or 0)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    start = time.perf_counter()
+    total, hits = search_index.search(query, keyword=request.args.get('keyword') or None, limit=limit, offset=offset)
+    data = []
+    for score, keyword, record, scraped_at in hits:
+        supplier = project({**record.to_dict(), "keyword": keyword, "scraped_at": scraped_at}, fields)
+        supplier["score"] = round(score, 4)
+        data.append(supplier)
+    took = time.perf_counter() - start
+    LOCAL_SEARCH_SECONDS.observe(took)
+    return jsonify({
+        "status": "success",
+        "total": total,
+        "took_ms": round(took * 1000, 3),
+        "indexing": search_index_state["loading"],
+        "data": data,
+    }), 200
+
+@app.route('/suppliers/facets', methods=['GET'])
+def supplier_facets():
+    """Available locations and certifications (with counts) for ?keyword=..., for filter dropdowns."""
+    return jsonify({"status": "success", **supplier_store.facets(request.args.get('keyword'))}), 200
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters and size of the result cache."""
+    if not result_cache:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **result_cache.stats()}), 200
+
+@app.route('/cache', methods=['DELETE'])
+def clear_cache():
+    """Invalidate cached pages for ?keyword=..., or the whole cache if no keyword is given."""
+    if not result_cache:
+        return jsonify({"enabled": False, "removed": 0}), 200
+    removed = result_cache.invalidate(request.args.get('keyword'))
+    return jsonify({"enabled": True, "removed": removed}), 200
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Simple health check endpoint."""
-    return jsonify({"status": "healthy"}), 200
+    """Liveness: the process is up and serving. Readiness is reported alongside but never fails this check."""
+    return jsonify({"status": "healthy", "ready": startup_state["ready"]}), 200
+
+@app.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: chromedriver is resolved and the pre-warmed browsers are up. 503 until then."""
+    body = {
+        "ready": startup_state["ready"],
+        "chromedriver": startup_state["chromedriver"],
+        "prewarmed": startup_state["prewarmed"],
+        "pool": scraper_pool.stats(),
+        "error": startup_state["error"],
+    }
+    return jsonify(body), 200 if startup_state["ready"] else 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: request latency and errors, in-flight scrapes, pages, per-stage and WebDriver timings."""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+@app.route('/browsers', methods=['GET'])
+def browser_stats():
+    """Pool occupancy plus memory, age and page counts of every pooled browser."""
+    return jsonify(scraper_pool.stats(browsers=True)), 200
+
+def shutdown():
+    """Stop background crawls and close every browser so no Chrome outlives the process"""
+    job_manager.shutdown()
+    batch_scheduler.shutdown()
+    company_enricher.close()
+    scraper_pool.close(force=True)
+
+atexit.register(shutdown)
+
+# WSGI servers import this module; start warming up as soon as it is loaded
+if __name__ != '__main__' and env_flag('SCRAPER_WARM_UP', True):
+    start_warm_up()
+if __name__ != '__main__' and env_flag('SCRAPE_RESUME_JOBS', True):
+    resume_checkpointed_jobs()
 
 if __name__ == '__main__':
     # When running locally, ensure your Chrome driver is correctly set up
     # The scraper already handles ChromeDriverManager, but ensure it's functional.
-    app.run(debug=True, port=5000) # Run in debug mode for development
\ No newline at end of file
+    # Only the reloader's serving process warms up; the file-watcher parent never needs browsers
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' and env_flag('SCRAPER_WARM_UP', True):
+        start_warm_up()
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' and env_flag('SCRAPE_RESUME_JOBS', True):
+        resume_checkpointed_jobs()
+    # Turn SIGTERM into a normal exit so the atexit shutdown runs and the browsers are closed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    # threaded=True lets concurrent requests each check out their own pooled scraper
+    app.run(debug=True, port=5000, threaded=True) # Run in debug mode for development
\ No newline at end of file
@@ -0,0 +1,345 @@
+"""
+Multi-keyword batch scraping.
+
+A batch is a list of keywords, each with its own max_pages. Instead of crawling keyword after
+keyword, every (keyword, page) pair becomes a work unit. Units are handed to a fixed set of
+workers, each checking out a pooled browser per unit, in breadth-first order: page 1 of every
+keyword, then page 2 of every keyword, and so on. Short keywords therefore finish early, and
+no keyword waits behind another keyword's whole crawl. A per-host limit caps how many browsers
+hit the same site at once, on top of the pool size.
+
+Each keyword completes on its own: as soon as its last page is in, its results are persisted
+(each listing once, however many of its pages repeat it) and visible in the batch status,
+while other keywords are still running.
+
+Pages are loaded through direct page URLs. A keyword whose page N turns out to be page 1 again
+(the site ignored the page parameter) is finished with one sequential Next-button crawl, starting
+from page N-1.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from dedup import DedupIndex
+from jobs import CANCELLED, COMPLETED, FAILED, FINISHED_STATES, QUEUED, RUNNING
+from result_cache import normalize_keyword
+from waits import HostLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class KeywordTask:
+    """One keyword of a batch; all mutation goes through the task's lock"""
+
+    def __init__(self, keyword, max_pages):
+        self.keyword = keyword
+        self.max_pages = max_pages
+        self.status = QUEUED
+        self.cache = None
+        self.error = None
+        self.pages = {} # page_number -> suppliers (dicts) fetched but not yet persisted
+        self.signatures = {}
+        self.last_page = None # Known end of the results (empty page or error), if any
+        self.reached_last_page = False
+        self.pending = 0 # Units queued or running for this keyword
+        self.sequential = False # Finishing with a Next-button crawl
+        self.results = [] # [(page_number, [SupplierRecord])] once completed
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def finish(self, status, error=None):
+        self.status = status
+        self.finished_at = time.time()
+        if error is not None:
+            self.error = error
+
+    def to_dict(self, include_data=True, fields=None):
+        with self._lock:
+            task = {
+                "keyword": self.keyword,
+                "max_pages": self.max_pages,
+                "status": self.status,
+                "cache": self.cache,
+                "pages": len(self.results) if self.finished else len(self.pages),
+                "suppliers": sum(len(records) for _, records in self.results),
+                "error": self.error,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+            if include_data:
+                task["data"] = [record.to_dict(fields=fields) for _, records in self.results for record in records]
+            return task
+
+
+class Batch:
+    def __init__(self, keywords, options=None):
+        """keywords: [(keyword, max_pages)]; repeated keywords (after normalization) are merged"""
+        self.id = uuid.uuid4().hex
+        self.options = options or {}
+        self.tasks = OrderedDict()
+        for keyword, max_pages in keywords:
+            key = normalize_keyword(keyword)
+            if key in self.tasks:
+                self.tasks[key].max_pages = max(self.tasks[key].max_pages, max_pages)
+            else:
+                self.tasks[key] = KeywordTask(keyword, max_pages)
+        self.created_at = time.time()
+        self.cancel_event = threading.Event()
+
+    @property
+    def status(self):
+        statuses = [task.status for task in self.tasks.values()]
+        if all(status == QUEUED for status in statuses):
+            return CANCELLED if self.cancel_event.is_set() else QUEUED
+        if not all(status in FINISHED_STATES for status in statuses):
+            return RUNNING
+        return CANCELLED if self.cancel_event.is_set() else COMPLETED
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def to_dict(self, include_data=True, fields=None):
+        """fields: optional tuple of supplier keys to include (SupplierRecord.to_dict)"""
+        tasks = [task.to_dict(include_data, fields) for task in self.tasks.values()]
+        counts = {}
+        for task in tasks:
+            counts[task["status"]] = counts.get(task["status"], 0) + 1
+        finished_at = [task["finished_at"] for task in tasks]
+        return {
+            "batch_id": self.id,
+            "status": self.status,
+            "options": dict(self.options),
+            "progress": {"keywords": len(tasks), **counts},
+            "created_at": self.created_at,
+            "finished_at": max(finished_at) if all(finished_at) else None,
+            "results": {task["keyword"]: task for task in tasks},
+        }
+
+
+class BatchScheduler:
+    def __init__(self, pool, store_page, lookup_cached=None, mark_last=None, snapshot=None,
+                 base_url="https://www.alibaba.com", workers=None, per_host_limit=None, max_finished=50):
+        """
+        pool: ScraperPool the units check browsers out of
+        store_page: callable(keyword, page_number, suppliers, seen) -> [SupplierRecord]; persists a fetched
+            page without the listings already in seen (a dedup.DedupIndex shared by the keyword's pages)
+        lookup_cached: optional callable(keyword, max_pages, allow_stale) -> ([(page_number, records)], cache_status) or None
+        mark_last: optional callable(keyword, page_number) recording that results end at that page
+        snapshot: optional callable(keyword, records, pages, reached_last_page) recording a completed crawl
+        base_url: site the batch crawls; its host is what per_host_limit applies to
+        workers: concurrent units (default: pool size)
+        per_host_limit: maximum concurrent page loads per host (None = only bounded by workers)
+        max_finished: finished batches kept for status queries
+        """
+        self.pool = pool
+        self._store_page = store_page
+        self._lookup_cached = lookup_cached
+        self._mark_last = mark_last
+        self._snapshot = snapshot
+        self.host = urlsplit(base_url).hostname or ""
+        self.limiter = HostLimiter(per_host_limit)
+        self._max_finished = max_finished
+        self._batches = OrderedDict()
+        self._units = [] # Heap of (page_number, sequence, kind, batch, task)
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._workers = []
+        for index in range(workers or pool.size):
+            worker = threading.Thread(target=self._work, name=f"batch-worker-{index + 1}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, keywords, refresh=False, allow_stale=False):
+        """Schedule a batch of [(keyword, max_pages)] and return it immediately"""
+        batch = Batch(keywords, {"refresh": refresh, "allow_stale": allow_stale})
+        with self._cond:
+            self._batches[batch.id] = batch
+            self._prune()
+
+        units = []
+        for task in batch.tasks.values():
+            cached = None
+            if self._lookup_cached and not refresh:
+                cached = self._lookup_cached(task.keyword, task.max_pages, allow_stale)
+            if cached:
+                pages, cache_status = cached
+                with task._lock:
+                    task.results, task.cache = list(pages), cache_status
+                    task.started_at = time.time()
+                    task.finish(COMPLETED)
+                continue
+            with task._lock:
+                task.cache = "refresh" if refresh else "miss"
+                task.pending = task.max_pages
+            units.extend((page_number, "page", task) for page_number in range(1, task.max_pages + 1))
+
+        with self._cond:
+            for page_number, kind, task in units:
+                heapq.heappush(self._units, (page_number, next(self._sequence), kind, batch, task))
+            self._cond.notify_all()
+        logger.info(f"Queued batch {batch.id}: {len(batch.tasks)} keywords, {len(units)} pages to fetch")
+        return batch
+
+    def get(self, batch_id):
+        with self._cond:
+            return self._batches.get(batch_id)
+
+    def cancel(self, batch_id):
+        """
+        Cancel a batch: units not started yet are dropped, keywords already completed keep their
+        results and keywords in progress keep the pages fetched so far. Returns the batch or None.
+        """
+        batch = self.get(batch_id)
+        if batch is not None:
+            batch.cancel_event.set()
+            for task in batch.tasks.values():
+                with task._lock:
+                    if task.status == QUEUED:
+                        task.finish(CANCELLED)
+        return batch
+
+    def stats(self):
+        with self._cond:
+            counts = {}
+            for batch in self._batches.values():
+                counts[batch.status] = counts.get(batch.status, 0) + 1
+            return {"queued_units": len(self._units), "workers": len(self._workers), "batches": counts}
+
+    def shutdown(self):
+        """Stop the workers after their current unit; batches in progress are cancelled"""
+        with self._cond:
+            self._closed = True
+            batches = list(self._batches.values())
+            self._cond.notify_all()
+        for batch in batches:
+            batch.cancel_event.set()
+
+    def _prune(self):
+        finished = [batch_id for batch_id, batch in self._batches.items() if batch.finished]
+        for batch_id in finished[:max(0, len(finished) - self._max_finished)]:
+            del self._batches[batch_id]
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._units and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                page_number, _, kind, batch, task = heapq.heappop(self._units)
+            try:
+                if kind == "page":
+                    self._run_page(batch, task, page_number)
+                else:
+                    self._run_sequential(batch, task, page_number)
+            except Exception as e:
+                logger.exception(f"Batch {batch.id} unit for '{task.keyword}' page {page_number} failed: {e}")
+                with task._lock:
+                    if not task.finished:
+                        task.finish(FAILED, error=str(e))
+
+    def _skip(self, batch, task, page_number):
+        """True if the unit is no longer needed (cancelled, keyword finished or past the known end)"""
+        with task._lock:
+            if batch.cancel_event.is_set() or task.finished:
+                return True
+            if task.last_page is not None and page_number > task.last_page:
+                return True
+            if task.status == QUEUED:
+                task.status = RUNNING
+                task.started_at = time.time()
+            return False
+
+    def _run_page(self, batch, task, page_number):
+        if not self._skip(batch, task, page_number):
+            try:
+                with self.limiter.slot(self.host), self.pool.checkout() as scraper:
+                    search_url = scraper.build_search_url(task.keyword)
+                    suppliers, signature = scraper.scrape_page(scraper.build_page_url(search_url, page_number))
+            except Exception as e:
+                if page_number == 1:
+                    raise
+                # Keep the pages before it, like the page crawls do on errors
+                logger.error(f"Error fetching page {page_number} of '{task.keyword}': {str(e)}")
+                suppliers, signature = None, None
+            with task._lock:
+                if suppliers:
+                    task.pages[page_number] = suppliers
+                    task.signatures[page_number] = signature
+                else:
+                    end = page_number - 1
+                    task.last_page = end if task.last_page is None else min(end, task.last_page)
+                    task.reached_last_page = task.reached_last_page or suppliers is not None
+        self._unit_done(batch, task)
+
+    def _run_sequential(self, batch, task, first_page):
+        if not self._skip(batch, task, first_page):
+            with self.limiter.slot(self.host), self.pool.checkout() as scraper:
+                # Pages before first_page loaded by their URLs; click Next from the last of them
+                resume_url = scraper.build_page_url(scraper.build_search_url(task.keyword), first_page - 1)
+                for page_number, suppliers in scraper.iter_supplier_pages(
+                        task.keyword, max_pages=task.max_pages, stop_event=batch.cancel_event, pagination="button",
+                        start_page=first_page, resume_url=resume_url):
+                    with task._lock:
+                        task.pages[page_number] = suppliers
+                with task._lock:
+                    task.reached_last_page = scraper.reached_last_page
+                    task.last_page = max(task.pages) if task.pages else 0
+        self._unit_done(batch, task)
+
+    def _unit_done(self, batch, task):
+        with task._lock:
+            task.pending -= 1
+            if task.pending > 0 or task.finished:
+                return
+            # Every unit of the keyword is done: keep the pages up to the first gap
+            pages = []
+            for page_number in range(1, task.max_pages + 1):
+                if page_number not in task.pages:
+                    break
+                pages.append(page_number)
+            first_signature = task.signatures.get(1)
+            repeated = next((page_number for page_number in pages[1:]
+                             if not task.sequential and task.signatures.get(page_number) == first_signature), None)
+            if repeated is not None and not batch.cancel_event.is_set():
+                # The site ignored the page parameter: fetch the rest with the Next button
+                logger.info(f"Page {repeated} of '{task.keyword}' repeated page 1. Falling back to Next button navigation.")
+                for page_number in pages[pages.index(repeated):]:
+                    del task.pages[page_number]
+                task.sequential = True
+                task.last_page = None
+                task.pending = 1
+                with self._cond:
+                    heapq.heappush(self._units, (repeated, next(self._sequence), "sequential", batch, task))
+                    self._cond.notify()
+                return
+            fetched = [(page_number, task.pages[page_number]) for page_number in pages]
+            task.pages = {}
+            reached_last_page = task.reached_last_page
+
+        # Persist outside the task lock (store and cache writes)
+        seen = DedupIndex()
+        results = [(page_number, self._store_page(task.keyword, page_number, suppliers, seen))
+                   for page_number, suppliers in fetched]
+        if self._mark_last and reached_last_page and results and not batch.cancel_event.is_set():
+            self._mark_last(task.keyword, results[-1][0])
+        if self._snapshot and results:
+            self._snapshot(task.keyword, [record for _, records in results for record in records],
+                           results[-1][0], reached_last_page)
+        with task._lock:
+            task.results = results
+            stopped_early = batch.cancel_event.is_set() and len(results) < task.max_pages and not reached_last_page
+            task.finish(CANCELLED if stopped_early else COMPLETED)
+        logger.info(f"Batch {batch.id}: '{task.keyword}' finished with {len(results)} pages")
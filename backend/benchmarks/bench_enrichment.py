@@ -0,0 +1,94 @@
+"""
+Offline benchmark of company-profile enrichment against the local fixture server.
+
+Parses a few synthetic search pages without a browser, then enriches the records with
+CompanyEnricher under several concurrency settings, reporting per setting:
+- wall time and companies per second
+- profile requests sent (each company should be fetched once) and TCP connections opened
+  (keep-alive: far fewer connections than requests)
+- a second pass over the same records, which should be answered from the cache
+
+Usage:
+    python benchmarks/bench_enrichment.py --pages 3 --delay-ms 100
+    python benchmarks/bench_enrichment.py --config 1:1 --config 8:4 --config 16:8
+"""
+import argparse
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+
+import urllib3
+
+# Make the backend modules importable when run from any directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enrichment import CompanyEnricher
+from fixture_server import FixtureServer
+from page_parser import parse_search_page
+
+
+def load_records(server, keyword, pages):
+    """Search result records of the first pages, parsed from plain HTTP responses"""
+    http = urllib3.PoolManager()
+    records = []
+    for page in range(1, pages + 1):
+        response = http.request("GET", f"{server.url}/trade/search", fields={"SearchText": keyword, "page": page})
+        records.extend(parse_search_page(response.data, base_url=server.url + "/"))
+    return records
+
+
+def run_config(server, records, workers, per_host):
+    enricher = CompanyEnricher(workers=workers, per_host_limit=per_host, cache_ttl=3600,
+                               allowed_hosts=(urlsplit(server.url).hostname,), allow_http=True)
+    try:
+        requests, connections = server.profile_requests, server.connections
+        start = time.perf_counter()
+        enriched = enricher.enrich(records)
+        wall_time = time.perf_counter() - start
+        fetched = server.profile_requests - requests
+        opened = server.connections - connections
+
+        start = time.perf_counter()
+        enricher.enrich(records)
+        cached_time = time.perf_counter() - start
+        refetched = server.profile_requests - requests - fetched
+    finally:
+        enricher.close()
+    companies = len({record.company_url for record in enriched})
+    return {
+        "records": len(enriched),
+        "companies": companies,
+        "with_profile": sum(1 for record in enriched if record.company_profile and "error" not in record.company_profile),
+        "wall_time_s": round(wall_time, 3),
+        "companies_per_s": round(companies / wall_time, 1) if wall_time else None,
+        "profile_requests": fetched,
+        "connections": opened,
+        "cached_pass_s": round(cached_time, 4),
+        "cached_pass_requests": refetched,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline company-profile enrichment benchmark")
+    parser.add_argument("--pages", type=int, default=3, help="Search result pages whose records are enriched")
+    parser.add_argument("--delay-ms", type=int, default=100, help="Latency of each profile response")
+    parser.add_argument("--config", action="append", default=None,
+                        help="workers:per_host pair to run (repeatable; default 1:1, 8:4, 16:8)")
+    args = parser.parse_args()
+    configs = [tuple(int(value) for value in config.split(":")) for config in (args.config or ["1:1", "8:4", "16:8"])]
+
+    with FixtureServer(pages=max(args.pages, 1), profile_delay_ms=args.delay_ms) as server:
+        records = load_records(server, "corn grain", args.pages)
+        print(f"{len(records)} records from {args.pages} pages, {args.delay_ms} ms per profile response\n")
+        print(f"{'workers:host':<14}{'companies':>10}{'profiles':>10}{'wall (s)':>10}{'comp/s':>9}"
+              f"{'requests':>10}{'conns':>7}{'cached (s)':>12}{'re-req':>8}")
+        for workers, per_host in configs:
+            result = run_config(server, records, workers, per_host)
+            print(f"{f'{workers}:{per_host}':<14}{result['companies']:>10}{result['with_profile']:>10}"
+                  f"{result['wall_time_s']:>10}{result['companies_per_s']:>9}{result['profile_requests']:>10}"
+                  f"{result['connections']:>7}{result['cached_pass_s']:>12}{result['cached_pass_requests']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark for search-page extraction.
+
+Loads one search results page and extracts it with each extraction mode, counting the
+WebDriver round trips (every command sent to chromedriver) and wall time per page.
+
+Usage:
+    python benchmarks/bench_extraction.py --keyword "corn grain"
+    python benchmarks/bench_extraction.py --url file:///path/to/saved_search_page.html --runs 5
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Make the backend modules importable when run from any directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alibaba_scraper import AlibabaSupplierScraper
+
+
+# (label, extraction_mode, card_delay) - the first entry is the behaviour before batch extraction
+MODES = [
+    ("per-card + delay (before)", "per_card", True),
+    ("per-card, no delay", "per_card", False),
+    ("batch (after)", "batch", False),
+    ("page source + lxml", "page_source", False),
+]
+
+
+def run_benchmark(scraper, runs):
+    # Round trips are the WebDriver commands the scraper's instrumentation counts
+    instrumentation = scraper.instrumentation
+    results = []
+    reference = None
+    for label, mode, delay in MODES:
+        scraper.extraction_mode = mode
+        scraper.card_delay = delay
+        timings, trips, suppliers = [], [], []
+        for _ in range(runs):
+            calls = instrumentation.webdriver_calls
+            start = time.perf_counter()
+            suppliers = scraper.extract_supplier_data()
+            timings.append(time.perf_counter() - start)
+            trips.append(instrumentation.webdriver_calls - calls)
+
+        if reference is None:
+            reference = suppliers
+        results.append({
+            "mode": label,
+            "cards": len(suppliers),
+            "round_trips_per_page": min(trips),
+            "wall_time_per_page_s": round(min(timings), 4),
+            "matches_reference": suppliers == reference,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-card vs batch vs page-source extraction")
+    parser.add_argument("--keyword", default="corn grain", help="Search keyword to load (ignored if --url is given)")
+    parser.add_argument("--url", help="Page to load instead of a live search (e.g. file:// URL of a saved page)")
+    parser.add_argument("--runs", type=int, default=3, help="Extraction runs per mode (best run is reported)")
+    parser.add_argument("--headful", action="store_true", help="Show the browser window")
+    args = parser.parse_args()
+
+    scraper = AlibabaSupplierScraper(headless=not args.headful)
+    try:
+        if args.url:
+            scraper.driver.get(args.url)
+        else:
+            scraper.navigate(scraper.build_search_url(args.keyword))
+            scraper.wait_for_results()
+        scraper.scroll_page()
+
+        results = run_benchmark(scraper, args.runs)
+        print(f"{'mode':<28}{'cards':>7}{'round trips':>14}{'wall time (s)':>16}  same output")
+        for row in results:
+            print(f"{row['mode']:<28}{row['cards']:>7}{row['round_trips_per_page']:>14}"
+                  f"{row['wall_time_per_page_s']:>16}  {row['matches_reference']}")
+        print(json.dumps(results, indent=2))
+    finally:
+        scraper.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Offline end-to-end benchmark of the scraper against the local fixture server.
+
+Runs full searches (navigation, scrolling, extraction, pagination) with a real Chrome against
+benchmarks/fixture_server.py instead of alibaba.com, and reports per run:
+- wall time per stage (the scraper's instrumented stages: navigation, results_wait, scroll,
+  extraction, pagination), taken from a metrics.RequestTrace of the run
+- WebDriver round trips (total and per stage)
+- peak RSS of the browser process tree and of this Python process
+- suppliers per second
+
+Results can be saved as a JSON baseline and later runs compared against it:
+
+    python benchmarks/bench_scraper.py --save benchmarks/baselines/main.json
+    python benchmarks/bench_scraper.py --compare benchmarks/baselines/main.json
+
+--compare exits with status 1 if a metric regressed by more than --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+# Make the backend modules importable when run from any directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alibaba_scraper import AlibabaSupplierScraper
+from metrics import RequestTrace
+from waits import HostPacer
+from fixture_server import FixtureServer
+
+# Metrics compared against a baseline, and whether higher is better
+COMPARED_METRICS = {
+    "wall_time_s": False,
+    "round_trips": False,
+    "peak_browser_rss_mb": False,
+    "suppliers_per_s": True,
+}
+
+
+class RssSampler:
+    """Samples the browser process tree's RSS in the background and keeps the peak"""
+
+    def __init__(self, scraper, interval=0.2):
+        self.scraper = scraper
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = self.scraper.browser_rss()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+
+def _mb(value):
+    return round(value / (1024 * 1024), 1) if value is not None else None
+
+
+def python_peak_rss():
+    """Peak RSS of this process in bytes (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_search(scraper, keyword, max_pages):
+    """One full search; returns its metrics"""
+    # Stage breakdown from the scraper's own instrumentation; nested stages count towards the
+    # outermost one (the navigation inside a pagination is pagination)
+    trace = RequestTrace()
+    scraper.instrumentation.trace = trace
+    calls = scraper.instrumentation.webdriver_calls
+    try:
+        with RssSampler(scraper) as sampler:
+            start = time.perf_counter()
+            suppliers = scraper.search_suppliers(keyword, max_pages)
+            wall_time = time.perf_counter() - start
+    finally:
+        scraper.instrumentation.trace = None
+    stages = trace.stage_totals()
+    return {
+        "suppliers": len(suppliers),
+        "wall_time_s": round(wall_time, 3),
+        "suppliers_per_s": round(len(suppliers) / wall_time, 2) if wall_time else None,
+        "round_trips": scraper.instrumentation.webdriver_calls - calls,
+        "stage_time_s": {stage: round(stats["seconds"], 3) for stage, stats in stages.items()},
+        "stage_round_trips": {stage: stats["webdriver_calls"] for stage, stats in stages.items()},
+        "peak_browser_rss_mb": _mb(sampler.peak),
+    }
+
+
+def run_benchmark(server_url, keyword, max_pages, runs, pagination_modes, extraction_mode, browser_profile, headless):
+    """Run each pagination mode runs times in a fresh browser; the fastest run of each mode is reported"""
+    results = {}
+    for pagination in pagination_modes:
+        scraper = AlibabaSupplierScraper(
+            headless=headless,
+            extraction_mode=extraction_mode,
+            pagination=pagination,
+            browser_profile=browser_profile,
+            base_url=server_url,
+            pacer=HostPacer(min_interval=0, jitter=0), # Measure the scraper, not the politeness delay
+        )
+        try:
+            scraper.search_suppliers(keyword, 1) # Warm-up: browser caches, JIT
+            runs_metrics = [run_search(scraper, keyword, max_pages) for _ in range(runs)]
+        finally:
+            scraper.close()
+        best = min(runs_metrics, key=lambda metrics: metrics["wall_time_s"])
+        best["runs_wall_time_s"] = [metrics["wall_time_s"] for metrics in runs_metrics]
+        best["peak_browser_rss_mb"] = max(
+            (metrics["peak_browser_rss_mb"] for metrics in runs_metrics if metrics["peak_browser_rss_mb"] is not None),
+            default=None,
+        )
+        results[f"{pagination}/{extraction_mode}"] = best
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print the change of each compared metric against the baseline; returns the list of regressions"""
+    regressions = []
+    print(f"\nCompared with baseline {baseline.get('commit')} ({baseline.get('timestamp')}):")
+    for label, metrics in results.items():
+        previous = baseline["results"].get(label)
+        if not previous:
+            print(f"  {label}: not in baseline")
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = previous.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = (change < -threshold) if higher_is_better else (change > threshold)
+            marker = "  REGRESSION" if regressed else ""
+            print(f"  {label:<24}{metric:<22}{old:>10} -> {new:<10}{change:+.1%}{marker}")
+            if regressed:
+                regressions.append((label, metric, old, new))
+    return regressions
+
+
+def print_results(results):
+    print(f"\n{'run':<24}{'suppliers':>10}{'wall (s)':>10}{'supp/s':>9}{'trips':>8}{'browser MB':>12}  stages (s)")
+    for label, metrics in results.items():
+        stages = ", ".join(f"{stage} {seconds}" for stage, seconds in metrics["stage_time_s"].items())
+        print(f"{label:<24}{metrics['suppliers']:>10}{metrics['wall_time_s']:>10}{metrics['suppliers_per_s']:>9}"
+              f"{metrics['round_trips']:>8}{str(metrics['peak_browser_rss_mb']):>12}  {stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scraper benchmark against local fixture pages")
+    parser.add_argument("--fixtures", help="Directory with saved page_N.html files (default: synthetic pages)")
+    parser.add_argument("--pages", type=int, default=3, help="Result pages per search")
+    parser.add_argument("--runs", type=int, default=3, help="Searches per configuration (fastest is reported)")
+    parser.add_argument("--pagination", nargs="+", default=list(AlibabaSupplierScraper.PAGINATION_MODES),
+                        choices=AlibabaSupplierScraper.PAGINATION_MODES)
+    parser.add_argument("--extraction", default="batch", choices=AlibabaSupplierScraper.EXTRACTION_MODES)
+    parser.add_argument("--profile", default=None, help="Browser profile (default: lite when headless)")
+    parser.add_argument("--headful", action="store_true", help="Show the browser window")
+    parser.add_argument("--save", help="Write the results as a JSON baseline to this path")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    with FixtureServer(args.fixtures, pages=max(args.pages, 1)) as server:
+        results = run_benchmark(server.url, "corn grain", args.pages, args.runs, args.pagination,
+                                args.extraction, args.profile, not args.headful)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            "pages": args.pages,
+            "runs": args.runs,
+            "extraction": args.extraction,
+            "profile": args.profile,
+            "fixtures": args.fixtures or "synthetic",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "python_peak_rss_mb": _mb(python_peak_rss()),
+        "results": results,
+    }
+    print_results(results)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+Local HTTP server replaying Alibaba search result pages, for offline benchmarks.
+
+Serves /trade/search?...&page=N the way the scraper expects to find it:
+- From saved pages: a fixtures directory containing page_1.html, page_2.html, ... (e.g. pages
+  saved from the browser with "Save page as, HTML only") is replayed verbatim, with the
+  ?page= parameter selecting the file.
+- Otherwise synthetic pages are rendered from a scraped records file (default
+  corn_grain_suppliers.json) using the same card markup as the live site: the first cards are
+  in the HTML, the rest are appended by script as the page is scrolled (lazy loading), and a
+  Next button (clickable as a whole, like the live site's) leads to the following page.
+
+Company links on synthetic pages point at /company/<name>/company_profile.html on the same
+server, which serves a profile page (fact table as on the live site) for company enrichment;
+with --fixtures, saved profiles are replayed from company/<name>.html when present.
+Connections are kept alive (HTTP/1.1), and requests and connections are counted.
+
+Usage:
+    python benchmarks/fixture_server.py --port 8765
+    python benchmarks/fixture_server.py --fixtures saved_pages/ --port 8765
+"""
+import argparse
+import html
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RECORDS_FILE = os.path.join(BACKEND_DIR, "corn_grain_suppliers.json")
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{keyword} - Alibaba fixture page {page}</title>
+<style>
+  .fy23-search-card {{ min-height: 320px; border-bottom: 1px solid #ddd; }}
+  .next-pagination-item.disabled {{ color: #999; }}
+</style>
+</head>
+<body>
+<div class="organic-list">
+{cards}
+</div>
+<div class="searchx-pagination">
+  <ul class="next-pagination-list">
+    {pagination}
+  </ul>
+</div>
+<script>
+  // Lazy loading: append the next batch of cards when the user scrolls near the bottom
+  const pending = {lazy_cards};
+  let loading = false;
+  window.addEventListener("scroll", () => {{
+    if (loading || !pending.length) return;
+    if (window.innerHeight + window.scrollY < document.body.scrollHeight - 600) return;
+    loading = true;
+    setTimeout(() => {{
+      const list = document.querySelector(".organic-list");
+      for (const card of pending.splice(0, {lazy_batch})) list.insertAdjacentHTML("beforeend", card);
+      loading = false;
+    }}, {lazy_delay_ms});
+  }});
+  // Pagination items react to clicks on the item itself, as on the live site (the scraper clicks the <li>)
+  for (const item of document.querySelectorAll(".next-pagination-item")) {{
+    item.addEventListener("click", (event) => {{
+      const link = item.querySelector("a");
+      if (link && !link.contains(event.target)) location.href = link.href;
+    }});
+  }}
+</script>
+</body>
+</html>
+"""
+
+
+PROFILE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>{company} - Company Profile</title></head>
+<body>
+<h1 class="company-name">{company}</h1>
+<table class="company-basicInfo">
+{rows}
+</table>
+</body>
+</html>
+"""
+
+
+def company_slug(company_url):
+    """'https://wylfoods.en.alibaba.com/company_profile.html' -> 'wylfoods'"""
+    host = urlsplit(company_url or "").hostname
+    return host.split(".")[0] if host else None
+
+
+def render_profile(record):
+    """Company profile page for the company of record, with facts derived from its card"""
+    years = "".join(ch for ch in record.get("years_on_alibaba_search_page", "") if ch.isdigit())
+    location = record.get("location_search_page", "N/A").replace(" Supplier", "")
+    facts = [
+        ("Business Type", "Manufacturer, Trading Company"),
+        ("Country / Region", location),
+        ("Main Products", record.get("product_title", "")),
+        ("Total Employees", "11 - 50 People"),
+        ("Year Established", str(time.gmtime().tm_year - int(years)) if years else "N/A"),
+        ("Total Annual Revenue", "US$1 Million - US$2.5 Million"),
+        ("Main Markets", "North America\nWestern Europe\nSoutheast Asia"),
+    ]
+    rows = "\n".join(f"<tr><th>{html.escape(label)}:</th><td>{_text_lines(value)}</td></tr>" for label, value in facts)
+    return PROFILE_TEMPLATE.format(company=html.escape(record.get("company_name", "")), rows=rows)
+
+
+def _text_lines(value):
+    """Escape value, turning newlines into <br> so innerText reproduces them"""
+    return "<br>".join(html.escape(line) for line in str(value).split("\n"))
+
+
+def render_card(record):
+    """One product card in the live site's markup (the parts extract_card_info reads)"""
+    certifications = [cert for cert in record.get("certifications", []) if cert != "Verified Supplier"]
+    verified = "Verified Supplier" in record.get("certifications", [])
+    cert_imgs = "".join(f'<img alt="{html.escape(cert)}">' for cert in certifications)
+    verified_html = (
+        '<a class="verified-supplier-icon__wrapper" href="#"><img class="verified-supplier-icon" alt=""></a>'
+        if verified else ""
+    )
+    review = record.get("response_rate", "N/A")
+    return (
+        '<div class="fy23-search-card searchx-offer-item">'
+        f'<h2 class="search-card-e-title"><a href="{html.escape(record["product_url"])}">'
+        f'<span>{html.escape(record["product_title"])}</span></a></h2>'
+        f'<div class="search-card-e-price-main">{html.escape(record.get("price", ""))}</div>'
+        f'<div class="search-card-m-sale-features__item">{html.escape(record.get("min_order", ""))}</div>'
+        f'<a class="search-card-e-company" href="{html.escape(record.get("company_url", ""))}">'
+        f'{html.escape(record.get("company_name", ""))}</a>'
+        '<div class="search-card-e-supplier__year"><span>supplier</span>'
+        f'<span>{html.escape(record.get("years_on_alibaba_search_page", ""))}<br>'
+        f'{html.escape(record.get("location_search_page", ""))}</span></div>'
+        f'<div class="search-card-e-icon__certification-wrapper">{cert_imgs}</div>{verified_html}'
+        + (f'<div class="search-card-e-review">{_text_lines(review)}</div>' if review != "N/A" else "")
+        + '</div>'
+    )
+
+
+class FixtureSite:
+    """Synthetic result pages built from scraped records, cycled so every page is full and unique"""
+
+    def __init__(self, records, pages=5, cards_per_page=48, initial_cards=16, lazy_batch=16, lazy_delay_ms=150):
+        if not records:
+            raise ValueError("Fixture site needs at least one record")
+        self.records = records
+        self.companies = {}
+        for record in records:
+            self.companies.setdefault(company_slug(record.get("company_url")), record)
+        self.pages = pages
+        self.cards_per_page = cards_per_page
+        self.initial_cards = initial_cards
+        self.lazy_batch = lazy_batch
+        self.lazy_delay_ms = lazy_delay_ms
+
+    def page_records(self, page):
+        records = []
+        for index in range(self.cards_per_page):
+            record = dict(self.records[((page - 1) * self.cards_per_page + index) % len(self.records)])
+            # Distinct product links per page, so page signatures differ like on the live site
+            url = record["product_url"]
+            record["product_url"] = f"{url}{'&' if '?' in url else '?'}fixture={page}-{index}"
+            slug = company_slug(record.get("company_url"))
+            if slug:
+                record["company_url"] = f"/company/{slug}/company_profile.html"
+            records.append(record)
+        return records
+
+    def render(self, page, keyword, page_url):
+        cards = [render_card(record) for record in self.page_records(page)]
+        items = []
+        for number in range(1, self.pages + 1):
+            active = " next-current" if number == page else ""
+            items.append(f'<li class="next-pagination-item{active}"><a href="{page_url(number)}">{number}</a></li>')
+        if page < self.pages:
+            items.append(f'<li class="next-pagination-item next-next"><a href="{page_url(page + 1)}"><span>Next</span></a></li>')
+        else:
+            items.append('<li class="next-pagination-item next-next disabled"><span>Next</span></li>')
+        return PAGE_TEMPLATE.format(
+            keyword=html.escape(keyword),
+            page=page,
+            cards="\n".join(cards[:self.initial_cards]),
+            pagination="\n    ".join(items),
+            lazy_cards=json.dumps(cards[self.initial_cards:]).replace("</", "<\\/"),
+            lazy_batch=self.lazy_batch,
+            lazy_delay_ms=self.lazy_delay_ms,
+        )
+
+
+class FixtureServer:
+    """
+    Serves fixture pages on 127.0.0.1 from a background thread:
+
+        with FixtureServer() as server:
+            scraper = AlibabaSupplierScraper(base_url=server.url)
+    """
+
+    def __init__(self, fixtures_dir=None, records_file=DEFAULT_RECORDS_FILE, port=0, profile_delay_ms=0, **site_options):
+        """profile_delay_ms: latency added to company profile responses (simulates a remote site)"""
+        self.fixtures_dir = fixtures_dir
+        self.site = None
+        if not fixtures_dir:
+            with open(records_file, encoding="utf-8") as f:
+                self.site = FixtureSite(json.load(f), **site_options)
+        self.profile_delay_ms = profile_delay_ms
+        self.requests = 0
+        self.profile_requests = 0
+        self.connections = 0
+        self._counter_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def page_html(self, page, keyword, page_url):
+        if self.site:
+            if not 1 <= page <= self.site.pages:
+                return None
+            return self.site.render(page, keyword, page_url)
+        path = os.path.join(self.fixtures_dir, f"page_{page}.html")
+        if not os.path.isfile(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def profile_html(self, slug):
+        if self.site:
+            record = self.site.companies.get(slug)
+            return render_profile(record) if record else None
+        path = os.path.join(self.fixtures_dir, "company", f"{slug}.html")
+        if not os.path.isfile(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def _count(self, name):
+        with self._counter_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # Keep-alive, like the live site
+
+            def setup(self):
+                super().setup()
+                server._count("connections")
+
+            def send_html(self, body):
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                server._count("requests")
+                parts = urlsplit(self.path)
+                segments = parts.path.strip("/").split("/")
+                if len(segments) == 3 and segments[0] == "company" and segments[2] == "company_profile.html":
+                    server._count("profile_requests")
+                    if server.profile_delay_ms:
+                        time.sleep(server.profile_delay_ms / 1000)
+                    body = server.profile_html(segments[1])
+                    if body is None:
+                        self.send_error(404)
+                    else:
+                        self.send_html(body)
+                    return
+                if parts.path != "/trade/search":
+                    self.send_error(404)
+                    return
+                query = parse_qs(parts.query)
+                keyword = query.get("SearchText", [""])[0]
+                try:
+                    page = int(query.get("page", ["1"])[0])
+                except ValueError:
+                    page = 1
+
+                def page_url(number):
+                    params = [(key, value) for key, values in query.items() if key != "page" for value in values]
+                    return html.escape(f"/trade/search?{urlencode(params + [('page', number)])}")
+
+                body = server.page_html(page, keyword, page_url)
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_html(body)
+
+            def log_message(self, format, *args):
+                pass # Keep benchmark output clean
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fixture-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Alibaba search result fixtures locally")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", help="Directory with saved page_N.html files (default: synthetic pages)")
+    parser.add_argument("--records", default=DEFAULT_RECORDS_FILE, help="Records used for synthetic pages")
+    parser.add_argument("--pages", type=int, default=5, help="Number of synthetic result pages")
+    args = parser.parse_args()
+
+    server = FixtureServer(args.fixtures, args.records, port=args.port, pages=args.pages)
+    print(f"Serving fixtures at {server.url}/trade/search?SearchText=corn+grain (Ctrl+C to stop)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Browser profiles: what Chrome is allowed to load and how much it may use.
+
+Scraping only reads text, hrefs and certification alt attributes, so the "lite" profile keeps
+images, fonts, media and third-party trackers from loading at all (Chrome content settings plus
+DevTools request blocking) and caps the renderer's memory. "full" is the original behaviour.
+"""
+
+# URL patterns for Network.setBlockedURLs ("*" is a wildcard)
+FONT_PATTERNS = ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"]
+MEDIA_PATTERNS = ["*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.ogg", "*.wav"]
+IMAGE_PATTERNS = ["*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico"]
+TRACKER_PATTERNS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*facebook.net*",
+    "*facebook.com/tr*",
+    "*hotjar.com*",
+    "*clarity.ms*",
+    "*criteo.*",
+    "*gm.mmstat.com*",  # Alibaba's analytics beacon endpoint
+]
+
+# Chrome content settings: 2 = block
+BLOCK = 2
+
+
+class BrowserProfile:
+    """
+    Resource settings for one Chrome instance.
+
+    block_images / block_fonts / block_media / block_trackers: keep those requests from loading.
+    window_size: "W,H" viewport.
+    page_load_strategy: "eager" returns from driver.get at DOMContentLoaded (the scraper waits for
+                        the cards itself), "normal" waits for every subresource.
+    Resource budget (None = Chrome default):
+        js_heap_mb: V8 old-space limit per renderer.
+        disk_cache_mb: HTTP disk cache size.
+        renderer_process_limit: maximum renderer processes.
+        page_load_timeout: seconds before driver.get gives up.
+    """
+
+    def __init__(self, name, block_images=False, block_fonts=False, block_media=False, block_trackers=False,
+                 window_size="1920,1080", page_load_strategy="normal", js_heap_mb=None, disk_cache_mb=None,
+                 renderer_process_limit=None, page_load_timeout=None):
+        self.name = name
+        self.block_images = block_images
+        self.block_fonts = block_fonts
+        self.block_media = block_media
+        self.block_trackers = block_trackers
+        self.window_size = window_size
+        self.page_load_strategy = page_load_strategy
+        self.js_heap_mb = js_heap_mb
+        self.disk_cache_mb = disk_cache_mb
+        self.renderer_process_limit = renderer_process_limit
+        self.page_load_timeout = page_load_timeout
+
+    def __repr__(self):
+        return f"BrowserProfile({self.name!r})"
+
+    def blocked_url_patterns(self):
+        patterns = []
+        if self.block_images:
+            patterns += IMAGE_PATTERNS
+        if self.block_fonts:
+            patterns += FONT_PATTERNS
+        if self.block_media:
+            patterns += MEDIA_PATTERNS
+        if self.block_trackers:
+            patterns += TRACKER_PATTERNS
+        return patterns
+
+    def apply_options(self, chrome_options):
+        """Add this profile's switches and preferences to Chrome Options (before launch)"""
+        chrome_options.add_argument(f"--window-size={self.window_size}")
+        chrome_options.page_load_strategy = self.page_load_strategy
+
+        prefs = {}
+        if self.block_images:
+            prefs["profile.managed_default_content_settings.images"] = BLOCK
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        if self.block_media:
+            chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+        if prefs:
+            chrome_options.add_experimental_option("prefs", prefs)
+
+        if self.js_heap_mb:
+            chrome_options.add_argument(f"--js-flags=--max-old-space-size={int(self.js_heap_mb)}")
+        if self.disk_cache_mb:
+            chrome_options.add_argument(f"--disk-cache-size={int(self.disk_cache_mb) * 1024 * 1024}")
+        if self.renderer_process_limit:
+            chrome_options.add_argument(f"--renderer-process-limit={int(self.renderer_process_limit)}")
+        if self.block_trackers:
+            # Background networking (safe browsing updates, component updates, ...) is not needed either
+            chrome_options.add_argument("--disable-background-networking")
+            chrome_options.add_argument("--disable-component-update")
+
+    def apply_driver(self, driver):
+        """Settings that need a running browser: DevTools request blocking and the page load timeout"""
+        patterns = self.blocked_url_patterns()
+        if patterns:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        if self.page_load_timeout:
+            driver.set_page_load_timeout(self.page_load_timeout)
+
+
+PROFILES = {
+    # Original behaviour: everything loads, default window
+    "full": BrowserProfile("full"),
+    # Text-only scraping: no images, fonts, media or trackers and a bounded renderer
+    "lite": BrowserProfile(
+        "lite",
+        block_images=True,
+        block_fonts=True,
+        block_media=True,
+        block_trackers=True,
+        window_size="1366,900",
+        page_load_strategy="eager",
+        js_heap_mb=512,
+        disk_cache_mb=32,
+        renderer_process_limit=2,
+        page_load_timeout=45,
+    ),
+}
+
+
+def get_profile(profile, headless=True):
+    """
+    Resolve a profile argument: a BrowserProfile is used as is, a name is looked up in PROFILES,
+    None picks "lite" for headless browsers and "full" for visible ones (easier to debug).
+    """
+    if isinstance(profile, BrowserProfile):
+        return profile
+    if profile is None:
+        profile = "lite" if headless else "full"
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown browser profile {profile!r}; expected one of {sorted(PROFILES)}")
@@ -0,0 +1,264 @@
+"""
+Append-only checkpoints of background crawls, so a job resumes where it stopped.
+
+Each crawl has a JSONL file (<directory>/<crawl id>.jsonl). The first line describes the crawl
+(keyword, max_pages, options). After every extracted page, one line is appended with the page
+number, the next page's URL and that page's records. Appends are flushed and fsynced, so a timeout,
+a crashed browser or a restarted process loses at most the page in progress. A line torn by a
+crash mid-write is dropped (and truncated away) on load, so a crawl resumes from its last good page:
+
+    checkpoint = store.open(job_id, "corn grain", 30, {"enrich": False})
+    checkpoint.last_page        # 26 if the previous attempt died on page 27
+    checkpoint.pages()          # [(page_number, [SupplierRecord])] for pages 1..26
+    checkpoint.append(27, records, next_url=...)
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from supplier_record import SupplierRecord
+
+logger = logging.getLogger(__name__)
+
+CRAWL_ID_RE = re.compile(r"^[\w-]{1,128}$")
+
+
+def _line(entry):
+    return (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class CrawlCheckpoint:
+    """Progress of one crawl; appends go straight to its file"""
+
+    def __init__(self, path, crawl_id, keyword, max_pages, options=None, created_at=None, fsync=True):
+        self.path = path
+        self.crawl_id = crawl_id
+        self.keyword = keyword
+        self.max_pages = max_pages
+        self.options = options or {}
+        self.created_at = created_at or time.time()
+        self.fsync = fsync
+        self.next_url = None
+        self.first_signature = None # Page 1's signature, so a resumed crawl can tell page N from page 1
+        self.reached_last_page = False # The results ran out before max_pages
+        self.error = None # Set when the crawl gave up; such checkpoints are not resumed at startup
+        self.updated_at = self.created_at
+        self._pages = [] # [(page_number, [record dicts])]
+        self._file = None
+        self._discarded = False
+        self._lock = threading.Lock()
+
+    @property
+    def last_page(self):
+        return self._pages[-1][0] if self._pages else 0
+
+    @property
+    def done(self):
+        """Every page the crawl can have is checkpointed"""
+        return self.reached_last_page or self.last_page >= self.max_pages
+
+    def pages(self):
+        """Checkpointed pages as [(page_number, [SupplierRecord])], in page order"""
+        with self._lock:
+            pages = list(self._pages)
+        return [(page_number, [SupplierRecord.from_dict(record) for record in records]) for page_number, records in pages]
+
+    def append(self, page_number, records, next_url=None, signature=None):
+        """
+        Record a completed page (SupplierRecords or dicts); pages must arrive in order.
+        signature: the page's signature (kept for page 1, see first_signature)
+        """
+        records = [record.to_dict() if isinstance(record, SupplierRecord) else record for record in records]
+        with self._lock:
+            if page_number != self.last_page + 1:
+                raise ValueError(f"Checkpoint of '{self.keyword}' is at page {self.last_page}, cannot append page {page_number}")
+            entry = {"type": "page", "page": page_number, "next_url": next_url, "records": records, "at": time.time()}
+            if page_number == 1 and signature:
+                entry["signature"] = list(signature)
+            self._write(entry)
+            self._pages.append((page_number, records))
+            self.next_url = next_url
+            if "signature" in entry:
+                self.first_signature = tuple(signature)
+            self.error = None # A resumed crawl is making progress again
+
+    def mark(self, reached_last_page=None, error=None):
+        """Record that the results ran out, or that the crawl gave up with error"""
+        with self._lock:
+            entry = {"type": "state", "at": time.time()}
+            if reached_last_page is not None:
+                entry["reached_last_page"] = self.reached_last_page = bool(reached_last_page)
+            if error is not None:
+                entry["error"] = self.error = str(error)
+            self._write(entry)
+
+    def _write(self, entry):
+        if self._discarded:
+            return
+        if self._file is None:
+            self._file = open(self.path, "ab")
+        self._file.write(_line(entry))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.updated_at = entry["at"]
+
+    def _replay(self, entry):
+        """Apply one loaded line; False if it does not continue the checkpoint"""
+        if entry.get("type") == "page":
+            if entry.get("page") != self.last_page + 1:
+                return False
+            self._pages.append((entry["page"], entry.get("records") or []))
+            self.next_url = entry.get("next_url")
+            if entry["page"] == 1 and entry.get("signature"):
+                self.first_signature = tuple(entry["signature"])
+            self.error = None # Pages after a recorded failure mean the crawl was resumed
+        elif entry.get("type") == "state":
+            self.reached_last_page = entry.get("reached_last_page", self.reached_last_page)
+            self.error = entry.get("error", self.error)
+        self.updated_at = entry.get("at", self.updated_at)
+        return True
+
+    def close(self, discard=False):
+        with self._lock:
+            self._discarded = self._discarded or discard
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "crawl_id": self.crawl_id,
+                "keyword": self.keyword,
+                "max_pages": self.max_pages,
+                "last_page": self.last_page,
+                "next_url": self.next_url,
+                "records": sum(len(records) for _, records in self._pages),
+                "reached_last_page": self.reached_last_page,
+                "error": self.error,
+                "created_at": self.created_at,
+                "updated_at": self.updated_at,
+            }
+
+
+class CheckpointStore:
+    def __init__(self, directory, fsync=True, max_age=7 * 24 * 3600):
+        """
+        directory: where the checkpoint files live (created if missing)
+        fsync: force every append to disk (otherwise flushed to the OS only)
+        max_age: seconds after its last update a checkpoint is deleted by prune()
+        """
+        self.directory = directory
+        self.fsync = fsync
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+        self._open = {} # crawl id -> CrawlCheckpoint in use by this process
+        self._lock = threading.Lock()
+
+    def _path(self, crawl_id):
+        if not CRAWL_ID_RE.match(crawl_id):
+            raise ValueError(f"Invalid crawl id {crawl_id!r}")
+        return os.path.join(self.directory, f"{crawl_id}.jsonl")
+
+    def open(self, crawl_id, keyword, max_pages, options=None):
+        """The crawl's checkpoint, loaded from disk if an earlier attempt left one, else a new one"""
+        with self._lock:
+            checkpoint = self._open.get(crawl_id) or self._load(crawl_id)
+            if checkpoint is None or (checkpoint.keyword, checkpoint.max_pages) != (keyword, max_pages):
+                if checkpoint is not None:
+                    logger.warning(f"Checkpoint {crawl_id} was for '{checkpoint.keyword}' ({checkpoint.max_pages} pages); starting over")
+                    checkpoint.close(discard=True)
+                path = self._path(crawl_id)
+                checkpoint = CrawlCheckpoint(path, crawl_id, keyword, max_pages, options, fsync=self.fsync)
+                with open(path, "wb") as f:
+                    f.write(_line({"type": "crawl", "crawl_id": crawl_id, "keyword": keyword, "max_pages": max_pages,
+                                   "options": checkpoint.options, "at": checkpoint.created_at}))
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+            self._open[crawl_id] = checkpoint
+            return checkpoint
+
+    def get(self, crawl_id):
+        with self._lock:
+            return self._open.get(crawl_id) or self._load(crawl_id)
+
+    def _load(self, crawl_id):
+        """Read a checkpoint file, truncating it after its last intact line; None if there is none"""
+        path = self._path(crawl_id)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        checkpoint, offset = None, 0
+        for line in data.splitlines(keepends=True):
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("torn line")
+                entry = json.loads(line)
+            except ValueError:
+                break
+            if checkpoint is None:
+                if entry.get("type") != "crawl":
+                    break
+                checkpoint = CrawlCheckpoint(path, crawl_id, entry["keyword"], entry["max_pages"], entry.get("options"),
+                                             created_at=entry.get("at"), fsync=self.fsync)
+            elif not checkpoint._replay(entry):
+                break
+            offset += len(line)
+        if checkpoint is None:
+            logger.warning(f"Ignoring unreadable checkpoint {path}")
+            return None
+        if offset < len(data):
+            logger.warning(f"Checkpoint {crawl_id}: dropped {len(data) - offset} bytes after page {checkpoint.last_page}")
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+        return checkpoint
+
+    def pending(self):
+        """Checkpoints of crawls that stopped before finishing and did not give up (to resume at startup)"""
+        pending = []
+        for name in sorted(os.listdir(self.directory)):
+            crawl_id, extension = os.path.splitext(name)
+            if extension != ".jsonl" or not CRAWL_ID_RE.match(crawl_id):
+                continue
+            checkpoint = self.get(crawl_id)
+            if checkpoint is not None and checkpoint.error is None and not checkpoint.done:
+                pending.append(checkpoint)
+        return pending
+
+    def discard(self, crawl_id):
+        """Delete a checkpoint (the crawl finished or was cancelled); later appends are ignored"""
+        with self._lock:
+            checkpoint = self._open.pop(crawl_id, None)
+            if checkpoint is not None:
+                checkpoint.close(discard=True)
+            try:
+                os.remove(self._path(crawl_id))
+            except FileNotFoundError:
+                pass
+
+    def release(self, crawl_id):
+        """Close a checkpoint's file but keep it on disk for a later resume"""
+        with self._lock:
+            checkpoint = self._open.pop(crawl_id, None)
+        if checkpoint is not None:
+            checkpoint.close()
+
+    def prune(self):
+        """Delete checkpoints not updated for max_age seconds; returns how many were removed"""
+        cutoff = time.time() - self.max_age
+        removed = 0
+        with self._lock:
+            for name in os.listdir(self.directory):
+                crawl_id, extension = os.path.splitext(name)
+                path = os.path.join(self.directory, name)
+                if extension == ".jsonl" and crawl_id not in self._open and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+        return removed
@@ -0,0 +1,80 @@
+"""
+Identity and de-duplication of scraped listings.
+
+Promoted listings repeat across result pages (and across searches) under slightly different
+links: tracking parameters (spm, scm, ...), protocol-relative or www-less hosts, trailing
+slashes. A listing's identity is its canonicalized product URL together with its canonicalized
+company URL; DedupIndex keeps the keys seen so far and drops repeats while pages are scraped.
+"""
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track the click and never change the page they link to
+TRACKING_PARAMS = frozenset((
+    "spm", "scm", "s", "from", "tracelog", "pvid", "ptm", "src", "ali_trackid", "ecology_token",
+    "aem_p4p_click", "aem_p4p_detail", "aem_p4p_exposure", "p4p_id", "productid_p4p",
+))
+
+
+def canonical_url(url):
+    """
+    '//www.alibaba.com/product-detail/x_1.html?spm=a2700&s=p#top' -> 'https://alibaba.com/product-detail/x_1.html'
+    Missing links ('' / 'N/A') -> None
+    """
+    url = (url or "").strip()
+    if not url or url == "N/A":
+        return None
+    if url.startswith("//"):
+        url = "https:" + url
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith("utm_")
+    )
+    return urlunsplit(("https", host, parts.path.rstrip("/") or "/", urlencode(query), ""))
+
+
+def _field(record, name):
+    # extract_card_info dicts and SupplierRecord objects alike
+    return record.get(name) if isinstance(record, dict) else getattr(record, name)
+
+
+def record_key(record):
+    """Identity of a listing: canonical product URL + company URL, else title + company name"""
+    product_url = canonical_url(_field(record, "product_url"))
+    if product_url:
+        return f"{product_url}|{canonical_url(_field(record, 'company_url')) or ''}"
+    return f"{_field(record, 'product_title')}|{_field(record, 'company_name')}"
+
+
+def seen_fraction(records, keys):
+    """Share of records whose key is in keys (0.0 for an empty page)"""
+    if not records:
+        return 0.0
+    return sum(record_key(record) in keys for record in records) / len(records)
+
+
+class DedupIndex:
+    """Keys of the listings seen so far (not thread-safe: one index per crawl or scraper)"""
+
+    def __init__(self, keys=()):
+        self.keys = set(keys)
+        self.duplicates = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, record):
+        """Remember record; returns False if it was already seen"""
+        key = record_key(record)
+        if key in self.keys:
+            self.duplicates += 1
+            return False
+        self.keys.add(key)
+        return True
+
+    def filter(self, records):
+        """records without the ones already seen (including repeats within records itself)"""
+        return [record for record in records if self.add(record)]
@@ -0,0 +1,253 @@
+"""
+Bounded pool of AlibabaSupplierScraper instances.
+
+Each checkout hands one caller exclusive use of a scraper (and its browser), so concurrent
+requests never share a driver or a results list. Scrapers are created lazily up to the pool
+size; callers beyond that queue until one is returned or the checkout timeout expires.
+
+The pool also manages each browser's lifecycle: a browser is recycled after a number of pages
+or when its memory crosses a ceiling, a dead or hung session is replaced before the scraper is
+handed out, and close(force=True) tears everything down at process exit.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium.common.exceptions import WebDriverException
+
+from alibaba_scraper import AlibabaSupplierScraper
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no scraper becomes available within the checkout timeout"""
+
+
+class PoolQueueFull(PoolTimeout):
+    """Raised when too many callers are already queued for a scraper"""
+
+
+class ScraperPool:
+    def __init__(self, size=2, checkout_timeout=120, max_waiting=None, scraper_factory=None,
+                 max_pages_per_browser=None, max_browser_rss_mb=None, health_check_timeout=10, pacer_factory=None,
+                 **scraper_kwargs):
+        """
+        size: maximum number of scrapers (browsers) alive at once
+        checkout_timeout: default seconds to wait for a free scraper (None waits forever)
+        max_waiting: maximum number of queued callers; further checkouts fail fast (None = unbounded)
+        scraper_factory: callable creating a scraper; defaults to AlibabaSupplierScraper(**scraper_kwargs)
+        max_pages_per_browser: restart a browser once it has loaded this many pages (None = never)
+        max_browser_rss_mb: restart a browser whose process tree uses more memory than this (None = never)
+        health_check_timeout: seconds a browser has to answer the check done at every checkout
+        pacer_factory: callable giving each new scraper its own HostPacer, so every browser spaces out
+                       its own navigations and pooled browsers load pages in parallel
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.size = size
+        self.checkout_timeout = checkout_timeout
+        self.max_waiting = max_waiting
+        if pacer_factory is not None:
+            self._factory = scraper_factory or (lambda: AlibabaSupplierScraper(pacer=pacer_factory(), **scraper_kwargs))
+        else:
+            self._factory = scraper_factory or (lambda: AlibabaSupplierScraper(**scraper_kwargs))
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_browser_rss_mb = max_browser_rss_mb
+        self.health_check_timeout = health_check_timeout
+
+        self._cond = threading.Condition()
+        self._idle = []  # LIFO: reuse the most recently returned (warmest) browser first
+        self._created = 0
+        self._waiting = 0
+        self._closed = False
+        self._scrapers = [] # Every live scraper, idle or checked out
+        self._recycled = 0
+
+    @contextmanager
+    def checkout(self, timeout=None, trace=None):
+        """
+        Check out a scraper for exclusive use:
+
+            with pool.checkout() as scraper:
+                suppliers = scraper.search_suppliers(keyword, max_pages)
+
+        trace: optional metrics.RequestTrace recording the scraper's stages while checked out
+        """
+        scraper = self._acquire(self.checkout_timeout if timeout is None else timeout)
+        broken = False
+        try:
+            self._ensure_healthy(scraper)
+            scraper.reset_results()
+            scraper.instrumentation.trace = trace
+            yield scraper
+        except WebDriverException:
+            # The browser session is unusable; replace it instead of handing it to the next caller
+            broken = True
+            raise
+        finally:
+            scraper.instrumentation.trace = None
+            self._release(scraper, broken)
+
+    def _ensure_healthy(self, scraper):
+        """Replace a dead or hung browser before the caller gets it (a new one starts on first use)"""
+        if not scraper.is_responsive(self.health_check_timeout):
+            self._recycle(scraper, "unresponsive browser session", force=True)
+
+    def _recycle_reason(self, scraper):
+        """Why the scraper's browser should be restarted now, or None"""
+        if not scraper.browser_started:
+            return None
+        if self.max_pages_per_browser and scraper.pages_loaded >= self.max_pages_per_browser:
+            return f"loaded {scraper.pages_loaded} pages"
+        if self.max_browser_rss_mb:
+            rss = scraper.browser_rss()
+            if rss is not None and rss > self.max_browser_rss_mb * 1024 * 1024:
+                return f"using {rss // (1024 * 1024)} MB"
+        return None
+
+    def _recycle(self, scraper, reason, force=False):
+        try:
+            scraper.restart_browser(reason, force=force)
+        except Exception as e:
+            logger.warning(f"Error recycling browser: {str(e)}")
+        with self._cond:
+            self._recycled += 1
+
+    def _acquire(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if (self.max_waiting is not None and not self._idle
+                    and self._created >= self.size and self._waiting >= self.max_waiting):
+                raise PoolQueueFull(f"{self._waiting} requests already waiting for a browser")
+
+            self._waiting += 1
+            try:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Scraper pool is closed")
+                    if self._idle:
+                        return self._idle.pop()
+                    if self._created < self.size:
+                        self._created += 1
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise PoolTimeout(f"No browser became available within {timeout}s")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+        # Launching Chrome is slow, so do it outside the lock
+        try:
+            scraper = self._factory()
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._scrapers.append(scraper)
+        logger.info(f"Started scraper {self._created}/{self.size} in pool")
+        return scraper
+
+    def _release(self, scraper, broken=False):
+        # Restart the browser before it goes back to the idle list, so nobody checks it out mid-quit.
+        # The scraper itself stays in the pool and launches a fresh browser on its next use.
+        if broken:
+            self._recycle(scraper, "broken browser session", force=True)
+        elif not self._closed:
+            reason = self._recycle_reason(scraper)
+            if reason:
+                self._recycle(scraper, reason)
+
+        with self._cond:
+            discard = self._closed
+            if discard:
+                self._created -= 1
+                self._forget(scraper)
+            else:
+                self._idle.append(scraper)
+            self._cond.notify()
+
+        if discard:
+            logger.warning("Discarding scraper from closed pool")
+            self._close_scraper(scraper)
+
+    def _forget(self, scraper):
+        if scraper in self._scrapers:
+            self._scrapers.remove(scraper)
+
+    def _close_scraper(self, scraper, force=False):
+        try:
+            scraper.close(force=force)
+        except Exception as e:
+            logger.warning(f"Error closing scraper: {str(e)}")
+
+    def warm(self, count=None):
+        """
+        Start scrapers now (up to count, default the pool size) and park them idle, so the
+        first requests don't pay for browser startup. Returns how many were started.
+        """
+        target = min(count or self.size, self.size)
+        started = 0
+        while True:
+            with self._cond:
+                if self._closed or self._created >= target:
+                    break
+                self._created += 1
+            try:
+                scraper = self._factory()
+                scraper.driver # Launch the browser even if the scraper was created lazily
+            except Exception as e:
+                with self._cond:
+                    self._created -= 1
+                    self._cond.notify()
+                logger.error(f"Failed to pre-warm scraper: {str(e)}")
+                raise
+            with self._cond:
+                self._scrapers.append(scraper)
+            self._release(scraper)
+            started += 1
+            logger.info(f"Pre-warmed scraper {self._created}/{self.size}")
+        return started
+
+    def stats(self, browsers=False):
+        """Snapshot of pool occupancy; browsers=True adds per-browser memory, age and page counts"""
+        with self._cond:
+            stats = {
+                "size": self.size,
+                "created": self._created,
+                "idle": len(self._idle),
+                "in_use": self._created - len(self._idle),
+                "waiting": self._waiting,
+                "recycled": self._recycled,
+            }
+            scrapers = list(self._scrapers)
+            idle = set(map(id, self._idle))
+        if browsers:
+            # Measured outside the lock: reading process memory walks /proc or psutil
+            stats["browsers"] = [
+                {"index": index, "in_use": id(scraper) not in idle, **scraper.browser_stats()}
+                for index, scraper in enumerate(scrapers)
+            ]
+        return stats
+
+    def close(self, force=False):
+        """
+        Close idle scrapers now; scrapers still checked out are closed when they are returned.
+        force=True (process exit) also kills the browsers of checked-out scrapers right away.
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            for scraper in idle:
+                self._forget(scraper)
+            in_use = list(self._scrapers) if force else []
+            self._cond.notify_all()
+        for scraper in idle:
+            self._close_scraper(scraper)
+        for scraper in in_use:
+            self._close_scraper(scraper, force=True)
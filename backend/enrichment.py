@@ -0,0 +1,270 @@
+"""
+Company-profile enrichment over plain HTTP.
+
+Search cards only carry a company's name, link and a few badges. The company profile page
+(company_url) adds business type, year established, employees, revenue, main products and
+markets. Those pages are server-rendered, so they are fetched with a pooled keep-alive HTTP
+client (urllib3) instead of a browser, parsed with lxml and merged into the records as
+record.company_profile:
+
+- Fetches run on a bounded thread pool, with at most per_host_limit concurrent requests per
+  site (company subdomains such as x.en.alibaba.com count as alibaba.com).
+- Each company is fetched once: profiles are cached per canonical company URL, and concurrent
+  lookups of a company already being fetched share that fetch.
+- Company URLs come from callers, so only https URLs on allowed_hosts (alibaba.com and its
+  subdomains by default) are fetched, redirects included; anything else gets an error profile.
+
+Usage against any site serving profile pages (e.g. benchmarks/fixture_server.py):
+
+    python enrichment.py --allow-host 127.0.0.1 --allow-http http://127.0.0.1:8765/company/wylfoods/company_profile.html
+"""
+import argparse
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+import lxml.html
+import urllib3
+
+from dedup import canonical_url
+from metrics import PROFILE_FETCH_SECONDS, PROFILE_LOOKUPS
+from page_parser import rendered_text
+from supplier_record import SupplierRecord
+from waits import HostLimiter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+
+# Normalized labels of the profile page's fact tables -> company_profile keys
+PROFILE_LABELS = {
+    "business type": "business_type",
+    "country/region": "country",
+    "location": "country",
+    "main products": "main_products",
+    "total employees": "total_employees",
+    "year established": "year_established",
+    "total annual revenue": "annual_revenue",
+    "main markets": "main_markets",
+    "factory size": "factory_size",
+    "company certifications": "company_certifications",
+}
+PROFILE_FIELDS = tuple(dict.fromkeys(PROFILE_LABELS.values()))
+YEAR_RE = re.compile(r"\b(1[89]\d\d|20\d\d)\b")
+
+# Hosts profiles may be fetched from; each entry also allows its subdomains
+DEFAULT_ALLOWED_HOSTS = ("alibaba.com",)
+MAX_REDIRECTS = 3
+
+
+def _label(text):
+    # 'Country / Region:' -> 'country/region'
+    text = " ".join(text.lower().replace(" / ", "/").split())
+    return text.rstrip(":").strip()
+
+
+def _label_value_pairs(document):
+    """(label, value) candidates from two-cell table rows, dt/dd pairs and label-classed elements"""
+    for row in document.iter("tr"):
+        cells = [cell for cell in row if cell.tag in ("th", "td")]
+        if len(cells) >= 2:
+            yield rendered_text(cells[0]), rendered_text(cells[1])
+    for term in document.iter("dt"):
+        definition = term.getnext()
+        if definition is not None and definition.tag == "dd":
+            yield rendered_text(term), rendered_text(definition)
+    for element in document.xpath("//*[contains(@class, 'label') or contains(@class, 'attr-name')]"):
+        value = element.getnext()
+        if value is not None:
+            yield rendered_text(element), rendered_text(value)
+
+
+def parse_company_profile(html, url=None):
+    """Company profile HTML (str or bytes) -> {field: value} for the PROFILE_LABELS found"""
+    profile = {"url": url}
+    if not html or not html.strip():
+        return profile
+    document = lxml.html.fromstring(html)
+    for label, value in _label_value_pairs(document):
+        field = PROFILE_LABELS.get(_label(label))
+        if field and field not in profile and value:
+            profile[field] = ", ".join(value.split("\n"))
+    if "year_established" in profile:
+        year = YEAR_RE.search(profile["year_established"])
+        profile["year_established"] = int(year.group()) if year else profile["year_established"]
+    return profile
+
+
+def site_of(url):
+    """What the per-host limit applies to: the last two labels of the host name (IPs as is)"""
+    host = urlsplit(url).hostname or ""
+    labels = host.split(".")
+    if len(labels) <= 2 or host.replace(".", "").isdigit():
+        return host
+    return ".".join(labels[-2:])
+
+
+def host_allowed(host, allowed_hosts):
+    """host is one of allowed_hosts or a subdomain of one"""
+    host = (host or "").lower().rstrip(".")
+    return any(host == allowed or host.endswith("." + allowed) for allowed in allowed_hosts)
+
+
+class CompanyEnricher:
+    def __init__(self, workers=8, per_host_limit=4, timeout=15.0, retries=2, cache_ttl=24 * 3600,
+                 error_ttl=300, max_cached=10000, max_hosts=100, user_agent=DEFAULT_USER_AGENT,
+                 allowed_hosts=DEFAULT_ALLOWED_HOSTS, allow_http=False):
+        """
+        workers: concurrent profile fetches overall
+        per_host_limit: concurrent fetches per site (None = only bounded by workers)
+        timeout: connect and read timeout of each request, in seconds
+        retries: retries on connection errors and 429/5xx responses (with backoff)
+        cache_ttl / error_ttl: seconds a fetched profile / a failed lookup is reused
+        max_cached: companies kept in the cache; the least recently used are dropped first
+        max_hosts: keep-alive connection pools kept (one per host)
+        allowed_hosts: hosts (and their subdomains) profiles may be fetched from
+        allow_http: also fetch plain http URLs (e.g. the local fixture server in benchmarks)
+        """
+        self.allowed_hosts = tuple(host.lower().strip(".") for host in allowed_hosts)
+        self.schemes = ("https", "http") if allow_http else ("https",)
+        self.cache_ttl = cache_ttl
+        self.error_ttl = error_ttl
+        self.max_cached = max_cached
+        self.limiter = HostLimiter(per_host_limit)
+        # One keep-alive pool per host, sized so every allowed concurrent request has a connection
+        self.http = urllib3.PoolManager(
+            num_pools=max_hosts,
+            maxsize=per_host_limit or workers,
+            headers={"User-Agent": user_agent, "Accept-Language": "en-US,en;q=0.9"},
+            timeout=urllib3.Timeout(connect=timeout, read=timeout),
+            retries=urllib3.Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)),
+        )
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="enrich")
+        self._cache = OrderedDict() # canonical company URL -> (expires_at, profile)
+        self._inflight = {} # canonical company URL -> Future of the fetch in progress
+        self._lock = threading.Lock()
+
+    def check_url(self, url):
+        """Raise ValueError unless url may be fetched (scheme and host allowlist)"""
+        parts = urlsplit(url)
+        if parts.scheme not in self.schemes or not host_allowed(parts.hostname, self.allowed_hosts):
+            raise ValueError(f"Company URL not allowed: {url}")
+
+    def _fetch(self, url):
+        with self.limiter.slot(site_of(url)), PROFILE_FETCH_SECONDS.time():
+            # Redirects are followed here rather than by urllib3, so every hop goes through check_url
+            for _ in range(MAX_REDIRECTS + 1):
+                response = self.http.request("GET", url, redirect=False)
+                location = response.get_redirect_location()
+                if not location:
+                    break
+                url = urljoin(url, location)
+                self.check_url(url)
+            if response.status != 200:
+                raise urllib3.exceptions.HTTPError(f"HTTP {response.status} for {url}")
+            return parse_company_profile(response.data, url)
+
+    def _load(self, key, url):
+        try:
+            profile, ttl, outcome = self._fetch(url), self.cache_ttl, "fetched"
+        except Exception as e:
+            logger.warning(f"Could not fetch company profile {url}: {e}")
+            profile, ttl, outcome = {"url": url, "error": str(e)}, self.error_ttl, "error"
+        PROFILE_LOOKUPS.inc(outcome=outcome)
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._cache[key] = (time.monotonic() + ttl, profile)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return profile
+
+    def profile(self, company_url):
+        """
+        Future of company_url's profile dict (None for records without a company link).
+        URLs that are not https on an allowed host are not fetched; their profile is an error.
+        """
+        future = Future()
+        key = canonical_url(company_url) if isinstance(company_url, str) else None
+        if not key:
+            future.set_result(None)
+            return future
+        url = "https:" + company_url.strip() if company_url.strip().startswith("//") else company_url.strip()
+        try:
+            self.check_url(url)
+        except ValueError as e:
+            PROFILE_LOOKUPS.inc(outcome="rejected")
+            future.set_result({"url": url, "error": str(e)})
+            return future
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                PROFILE_LOOKUPS.inc(outcome="cached")
+                future.set_result(cached[1])
+                return future
+            if key in self._inflight:
+                PROFILE_LOOKUPS.inc(outcome="shared")
+                return self._inflight[key]
+            future = self._inflight[key] = self._executor.submit(self._load, key, url)
+        return future
+
+    def enrich(self, records):
+        """
+        Fetch the profiles of the companies in records (SupplierRecords or extract_card_info dicts)
+        concurrently and set record.company_profile. Returns the records as SupplierRecords.
+        """
+        records = [record if isinstance(record, SupplierRecord) else SupplierRecord.from_dict(record)
+                   for record in records]
+        futures = {}
+        for record in records:
+            if record.company_url not in futures:
+                futures[record.company_url] = self.profile(record.company_url)
+        for record in records:
+            record.company_profile = futures[record.company_url].result()
+        return records
+
+    def enrich_pages(self, pages):
+        """Enrich an iterable of (page_number, records) page by page, as the pages arrive"""
+        for page_number, records in pages:
+            yield page_number, self.enrich(records)
+
+    def stats(self):
+        with self._lock:
+            return {"cached": len(self._cache), "in_flight": len(self._inflight)}
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.http.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch and parse company profile pages without a browser")
+    parser.add_argument("urls", nargs="+", help="Company profile URLs")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--per-host", type=int, default=4, help="Concurrent requests per site")
+    parser.add_argument("--allow-host", action="append", default=[],
+                        help="Also fetch from this host and its subdomains (repeatable)")
+    parser.add_argument("--allow-http", action="store_true", help="Also fetch plain http URLs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    enricher = CompanyEnricher(workers=args.workers, per_host_limit=args.per_host,
+                               allowed_hosts=DEFAULT_ALLOWED_HOSTS + tuple(args.allow_host), allow_http=args.allow_http)
+    try:
+        futures = [enricher.profile(url) for url in args.urls]
+        print(json.dumps([future.result() for future in futures], ensure_ascii=False, indent=2))
+    finally:
+        enricher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Streaming exporters with a fixed schema.
+
+Every format writes the same columns in the same order: the extract_card_info fields followed
+by the parsed SupplierRecord fields. Records are written batch by batch (one result page at a
+time), so neither a file export nor an HTTP download ever holds the whole dataset in memory.
+
+    with open_exporter("suppliers.ndjson", "ndjson") as exporter:
+        for page_number, records in pages:
+            exporter.write(records)
+
+Formats: "ndjson", "csv", "csv.gz" and "parquet" (requires the optional pyarrow package).
+"""
+import csv
+import gzip
+import io
+import json
+
+from supplier_record import PARSED_FIELDS, RAW_FIELDS, SupplierRecord
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError: # Optional dependency, only needed for Parquet export
+    pyarrow = None
+
+EXPORT_FIELDS = RAW_FIELDS + PARSED_FIELDS
+
+# Column types for columnar formats; everything not listed is a string
+NUMERIC_FIELDS = {'price_min', 'price_max', 'moq_quantity', 'rating', 'response_rate_pct'}
+INTEGER_FIELDS = {'years', 'review_count'}
+
+
+def _as_record(item):
+    return item if isinstance(item, SupplierRecord) else SupplierRecord.from_dict(item)
+
+
+class Exporter:
+    """Base class: writes batches of SupplierRecords (or extract_card_info dicts) to a binary file object"""
+    extension = None
+    mimetype = "application/octet-stream"
+
+    def __init__(self, out):
+        self.out = out
+        self.count = 0
+
+    def write(self, records):
+        records = [_as_record(record) for record in records]
+        if records:
+            self._write(records)
+            self.count += len(records)
+
+    def _write(self, records):
+        raise NotImplementedError
+
+    def close(self):
+        """Finish the file (footer, compression trailer); does not close the underlying file object"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class NDJSONExporter(Exporter):
+    extension = "ndjson"
+    mimetype = "application/x-ndjson"
+
+    def _write(self, records):
+        lines = (json.dumps(record.to_dict(), ensure_ascii=False, separators=(",", ":")) for record in records)
+        self.out.write(("\n".join(lines) + "\n").encode("utf-8"))
+
+
+class CSVExporter(Exporter):
+    """Fixed header; list fields (certifications) are JSON-encoded, missing values are empty"""
+    extension = "csv"
+    mimetype = "text/csv"
+
+    def __init__(self, out, compress=False):
+        super().__init__(out)
+        self._gzip = gzip.GzipFile(fileobj=out, mode="wb") if compress else None
+        self._text = io.TextIOWrapper(self._gzip or out, encoding="utf-8", newline="", write_through=True)
+        self._writer = csv.writer(self._text)
+        self._writer.writerow(EXPORT_FIELDS)
+
+    def _write(self, records):
+        for record in records:
+            row = record.to_dict()
+            self._writer.writerow([
+                json.dumps(value, ensure_ascii=False) if isinstance(value, list) else ("" if value is None else value)
+                for value in (row[field] for field in EXPORT_FIELDS)
+            ])
+        if self._gzip:
+            # Emit a complete deflate block per batch so streamed downloads make progress
+            self._gzip.flush()
+
+    def close(self):
+        self._text.flush()
+        self._text.detach() # Leave the underlying file open for the caller
+        if self._gzip:
+            self._gzip.close()
+
+
+class GzipCSVExporter(CSVExporter):
+    extension = "csv.gz"
+    mimetype = "application/gzip"
+
+    def __init__(self, out):
+        super().__init__(out, compress=True)
+
+
+class ParquetExporter(Exporter):
+    """Buffers up to row_group_size records, then writes them as one Parquet row group"""
+    extension = "parquet"
+    mimetype = "application/vnd.apache.parquet"
+
+    def __init__(self, out, row_group_size=5000):
+        if pyarrow is None:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+        super().__init__(out)
+        self.schema = pyarrow.schema([self._field(name) for name in EXPORT_FIELDS])
+        self.row_group_size = row_group_size
+        self._pending = []
+        self._writer = pyarrow.parquet.ParquetWriter(out, self.schema, compression="zstd")
+
+    @staticmethod
+    def _field(name):
+        if name == 'certifications':
+            return pyarrow.field(name, pyarrow.list_(pyarrow.string()))
+        if name in NUMERIC_FIELDS:
+            return pyarrow.field(name, pyarrow.float64())
+        if name in INTEGER_FIELDS:
+            return pyarrow.field(name, pyarrow.int64())
+        return pyarrow.field(name, pyarrow.string())
+
+    def _write(self, records):
+        self._pending.extend(record.to_dict() for record in records)
+        if len(self._pending) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self._writer.write_table(pyarrow.Table.from_pylist(self._pending, schema=self.schema))
+            self._pending = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+EXPORTERS = {
+    "ndjson": NDJSONExporter,
+    "csv": CSVExporter,
+    "csv.gz": GzipCSVExporter,
+    "parquet": ParquetExporter,
+}
+
+
+def get_exporter_class(fmt):
+    try:
+        return EXPORTERS[fmt]
+    except KeyError:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {sorted(EXPORTERS)}")
+
+
+def available_formats():
+    return [fmt for fmt in EXPORTERS if fmt != "parquet" or pyarrow is not None]
+
+
+class open_exporter:
+    """Context manager: exporter writing to a file path, closing both on exit"""
+
+    def __init__(self, path, fmt):
+        self._file = open(path, "wb")
+        try:
+            self.exporter = get_exporter_class(fmt)(self._file)
+        except Exception:
+            self._file.close()
+            raise
+
+    def __enter__(self):
+        return self.exporter
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.exporter.close()
+        finally:
+            self._file.close()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that collects written bytes until they are drained"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_export(fmt, batches):
+    """
+    Generator of encoded bytes for an HTTP response: exports each batch of records as it
+    arrives and yields whatever the exporter produced, then the file trailer.
+    """
+    sink = _ChunkSink()
+    exporter = get_exporter_class(fmt)(sink)
+    for records in batches:
+        exporter.write(records)
+        chunk = sink.drain()
+        if chunk:
+            yield chunk
+    exporter.close()
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
@@ -0,0 +1,188 @@
+"""
+Background scrape jobs.
+
+A small in-process job queue: POST /jobs enqueues a keyword search and returns immediately,
+a fixed set of worker threads runs the crawls, and GET /jobs/<id> reports status, progress
+and the suppliers extracted so far. Running jobs can be cancelled between pages. A job can be
+submitted again under its old id (resuming it from its crawl checkpoint, see checkpoints.py).
+"""
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class Job:
+    """State of one scrape job; all mutation goes through the job's lock"""
+
+    def __init__(self, keyword, max_pages, options=None, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.keyword = keyword
+        self.max_pages = max_pages
+        self.options = options or {}
+        self.status = QUEUED
+        self.pages_done = 0
+        self.suppliers = []
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def add_page(self, page_number, suppliers):
+        """Progress callback passed to the crawl; suppliers are SupplierRecord objects"""
+        with self._lock:
+            self.pages_done = page_number
+            self.suppliers.extend(suppliers)
+
+    def set_status(self, status, error=None):
+        with self._lock:
+            self.status = status
+            if status == RUNNING:
+                self.started_at = time.time()
+            if status in FINISHED_STATES:
+                self.finished_at = time.time()
+            if error is not None:
+                self.error = error
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def to_dict(self, include_data=True, fields=None):
+        """fields: optional tuple of supplier keys to include (SupplierRecord.to_dict)"""
+        with self._lock:
+            job = {
+                "job_id": self.id,
+                "keyword": self.keyword,
+                "max_pages": self.max_pages,
+                "options": dict(self.options),
+                "status": self.status,
+                "progress": {
+                    "pages_done": self.pages_done,
+                    "max_pages": self.max_pages,
+                    "suppliers": len(self.suppliers),
+                },
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+            if include_data:
+                job["data"] = [record.to_dict(fields=fields) for record in self.suppliers]
+            return job
+
+
+class JobManager:
+    def __init__(self, runner, workers=2, max_finished=200):
+        """
+        runner: callable(keyword, max_pages, on_page, stop_event, job_id=..., **options) that performs the crawl
+        workers: number of worker threads (concurrent crawls)
+        max_finished: finished jobs kept for status queries; the oldest are forgotten first
+        """
+        self._runner = runner
+        self._max_finished = max_finished
+        self._queue = queue.Queue()
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = []
+        for index in range(workers):
+            worker = threading.Thread(target=self._work, name=f"scrape-worker-{index + 1}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, keyword, max_pages, job_id=None, **options):
+        """
+        Enqueue a crawl and return its Job immediately; options are passed through to the runner.
+        job_id: reuse this id (resuming an earlier job); it replaces a finished job of that id.
+        """
+        job = Job(keyword, max_pages, options, job_id)
+        with self._lock:
+            previous = self._jobs.pop(job.id, None)
+            if previous is not None and not previous.finished:
+                self._jobs[job.id] = previous
+                raise ValueError(f"Job {job.id} is still {previous.status}")
+            self._jobs[job.id] = job
+            self._prune()
+        self._queue.put(job)
+        logger.info(f"Queued job {job.id} for keyword '{keyword}' ({max_pages} pages)")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Cancel a job. Queued jobs never start; running jobs stop before their next page and
+        keep the suppliers extracted so far. Returns the job, or None if it is unknown.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        with job._lock:
+            if job.status == QUEUED:
+                job.status = CANCELLED
+                job.finished_at = time.time()
+        return job
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {"queued": self._queue.qsize(), "workers": len(self._workers), "jobs": counts}
+
+    def shutdown(self):
+        """Stop the workers after they finish their current job"""
+        for job in list(self._jobs.values()):
+            if not job.finished:
+                job.cancel_event.set()
+        for _ in self._workers:
+            self._queue.put(None)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self._max_finished)]:
+            del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job):
+        if job.cancel_event.is_set():
+            job.set_status(CANCELLED)
+            return
+
+        job.set_status(RUNNING)
+        logger.info(f"Starting job {job.id} for keyword '{job.keyword}'")
+        try:
+            self._runner(job.keyword, job.max_pages, job.add_page, job.cancel_event, job_id=job.id, **job.options)
+        except Exception as e:
+            logger.exception(f"Job {job.id} failed: {e}")
+            job.set_status(FAILED, error=str(e))
+            return
+
+        stopped_early = job.cancel_event.is_set() and job.pages_done < job.max_pages
+        job.set_status(CANCELLED if stopped_early else COMPLETED)
+        logger.info(f"Job {job.id} finished with status '{job.status}' ({job.pages_done} pages)")
@@ -0,0 +1,325 @@
+"""
+In-process metrics and per-request traces for the scraping service.
+
+A small Prometheus-compatible registry (counters, gauges, histograms with labels, rendered in
+the text exposition format for GET /metrics) plus the scraper-side hooks:
+
+- Instrumentation: one per scraper. Times each stage (navigation, results wait, scrolling,
+  extraction, pagination), counts every WebDriver command by wrapping driver.execute, and
+  records errors and timeouts by stage.
+- RequestTrace: optional per-request timeline of those stages and commands, attached to the
+  scrapers serving a request (debug mode).
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; covers single WebDriver commands up to multi-page crawls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = (0, 1, 5, 10, 20, 30, 40, 50, 60, 80, 100)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            lines.extend(self._render_samples())
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self):
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+                for key, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    """Set or adjusted directly, or read from a callback at render time (set_function)"""
+    type = "gauge"
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        """function() returns {label values tuple: value} (or a single number for unlabelled gauges)"""
+        self._function = function
+
+    def _render_samples(self):
+        if self._function is not None:
+            values = self._function()
+            self._values = values if isinstance(values, dict) else {(): values}
+        return super()._render_samples()
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][index] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_samples(self):
+        lines = []
+        for key, state in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["counts"]):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._add(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        return self._add(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# --- Scraper metrics (shared by every scraper in the process) ---
+STAGE_SECONDS = REGISTRY.histogram("scraper_stage_seconds", "Wall time of each scraper stage", ("stage",))
+STAGE_ERRORS = REGISTRY.counter(
+    "scraper_stage_errors_total", "Scraper stage failures by kind (timeout or error)", ("stage", "kind"))
+WAIT_TIMEOUTS = REGISTRY.counter(
+    "scraper_wait_timeouts_total", "Condition waits that hit their ceiling, by step", ("step",))
+WEBDRIVER_CALLS = REGISTRY.counter(
+    "scraper_webdriver_calls_total", "WebDriver commands sent to chromedriver", ("command", "stage"))
+WEBDRIVER_SECONDS = REGISTRY.histogram(
+    "scraper_webdriver_call_seconds", "Round-trip time of WebDriver commands", ("command",))
+
+# --- Company-profile enrichment (plain HTTP, no browser) ---
+PROFILE_LOOKUPS = REGISTRY.counter(
+    "enrichment_profile_lookups_total", "Company profile lookups by outcome (fetched, cached, shared, rejected, error)", ("outcome",))
+PROFILE_FETCH_SECONDS = REGISTRY.histogram(
+    "enrichment_profile_fetch_seconds", "Time to fetch and parse one company profile page")
+
+
+class RequestTrace:
+    """Timeline of the stages and WebDriver commands that served one request (thread-safe)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+        self.commands = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, scraper_id, stage, start, seconds, webdriver_calls, error=None, depth=0):
+        span = {
+            "scraper": scraper_id,
+            "stage": stage,
+            "depth": depth, # Stages of the same scraper it runs inside (0: outermost)
+            "start_ms": round((start - self.started) * 1000, 1),
+            "duration_ms": round(seconds * 1000, 1),
+            "webdriver_calls": webdriver_calls,
+        }
+        if error:
+            span["error"] = error
+        with self._lock:
+            self.spans.append(span)
+
+    def add_command(self, command, seconds):
+        with self._lock:
+            stats = self.commands.setdefault(command, {"count": 0, "total_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] = round(stats["total_ms"] + seconds * 1000, 1)
+
+    def stage_totals(self):
+        """
+        {stage: {"seconds", "webdriver_calls"}} over the outermost spans only, so time spent in a
+        nested stage (the navigation inside a pagination) is counted once, towards the outer stage
+        """
+        totals = {}
+        with self._lock:
+            for span in self.spans:
+                if span["depth"] == 0:
+                    stats = totals.setdefault(span["stage"], {"seconds": 0.0, "webdriver_calls": 0})
+                    stats["seconds"] = round(stats["seconds"] + span["duration_ms"] / 1000, 4)
+                    stats["webdriver_calls"] += span["webdriver_calls"]
+        return totals
+
+    def to_dict(self):
+        with self._lock:
+            stages = {}
+            for span in self.spans:
+                stats = stages.setdefault(span["stage"], {"count": 0, "total_ms": 0.0, "webdriver_calls": 0})
+                stats["count"] += 1
+                stats["total_ms"] = round(stats["total_ms"] + span["duration_ms"], 1)
+                stats["webdriver_calls"] += span["webdriver_calls"]
+            return {
+                "elapsed_ms": round((time.perf_counter() - self.started) * 1000, 1),
+                "stages": stages,
+                "webdriver_commands": dict(self.commands),
+                "spans": sorted(self.spans, key=lambda span: span["start_ms"]),
+            }
+
+
+class Instrumentation:
+    """
+    Per-scraper hooks. Stages nest (pagination contains a navigation); each stage is timed on
+    its own, and WebDriver commands are attributed to the innermost running stage.
+    """
+    _ids = iter(range(1, 1 << 30))
+
+    def __init__(self):
+        self.scraper_id = next(self._ids)
+        self.trace = None # RequestTrace of the request currently using this scraper, if any
+        self.webdriver_calls = 0
+        self._stages = []
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        calls = self.webdriver_calls
+        depth = len(self._stages)
+        self._stages.append(name)
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = self.error(name, e)
+            raise
+        finally:
+            self._stages.pop()
+            seconds = time.perf_counter() - start
+            STAGE_SECONDS.observe(seconds, stage=name)
+            if self.trace is not None:
+                self.trace.add_span(self.scraper_id, name, start, seconds, self.webdriver_calls - calls, error, depth)
+
+    def error(self, stage, exception):
+        """Count a failure of stage; returns its kind ("timeout" or "error")"""
+        kind = "timeout" if "Timeout" in type(exception).__name__ else "error"
+        STAGE_ERRORS.inc(stage=stage, kind=kind)
+        return kind
+
+    def wait_timed_out(self, step):
+        WAIT_TIMEOUTS.inc(step=step)
+
+    def wrap_driver(self, driver):
+        """Count and time every command the driver sends to chromedriver"""
+        execute = driver.execute
+
+        def instrumented_execute(driver_command, params=None):
+            start = time.perf_counter()
+            try:
+                return execute(driver_command, params)
+            finally:
+                seconds = time.perf_counter() - start
+                self.webdriver_calls += 1
+                stage = self._stages[-1] if self._stages else "other"
+                WEBDRIVER_CALLS.inc(command=driver_command, stage=stage)
+                WEBDRIVER_SECONDS.observe(seconds, command=driver_command)
+                if self.trace is not None:
+                    self.trace.add_command(driver_command, seconds)
+
+        driver.execute = instrumented_execute
+        return driver
+
+
+def timed_stage(name):
+    """Method decorator: run the method as stage name of self.instrumentation"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.instrumentation.stage(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,160 @@
+"""
+Page crawl strategies used by the API.
+
+Both crawls are iterables of (page_number, suppliers) in page order that also report whether
+the results ran out before max_pages (reached_last_page) or an error ended the crawl early
+(error). A crawl can start at a later page (start_page) to resume a checkpointed one; given the
+signature of page 1 from the earlier run (first_signature), it still notices a site that ignores
+the page URL.
+
+With direct page URLs, result pages 1..max_pages no longer depend on each other, so they can be
+loaded at the same time in several pooled browsers and merged back in page order. If the site
+turns out not to honour the page URL (page N repeats page 1 or another earlier page), the crawl
+falls back to Next-button navigation from page N-1, the last page its URL did load.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlInterrupted(Exception):
+    """A crawl ended on an error before max_pages; the pages before the error were delivered"""
+
+
+@contextmanager
+def open_page_crawl(pool, keyword, max_pages, parallel_pages=1, stop_event=None, trace=None, start_page=1,
+                    first_signature=None):
+    """
+    Yields a ParallelPageCrawl when more than one page may be fetched at once, otherwise a
+    SequentialPageCrawl holding one pooled scraper for the duration of the crawl.
+    trace: optional metrics.RequestTrace attached to every scraper the crawl checks out.
+    start_page: first page to crawl (pages before it are already done)
+    first_signature: page 1's signature (crawl.first_signature of the run that crawled it)
+    """
+    if parallel_pages > 1 and max_pages > start_page:
+        yield ParallelPageCrawl(pool, keyword, max_pages, workers=parallel_pages, stop_event=stop_event,
+                                trace=trace, start_page=start_page, first_signature=first_signature)
+        return
+    with pool.checkout(trace=trace) as scraper:
+        yield SequentialPageCrawl(scraper, keyword, max_pages, stop_event, start_page, first_signature)
+
+
+class SequentialPageCrawl:
+    """One browser paging through the results (direct URLs or the Next button)"""
+
+    def __init__(self, scraper, keyword, max_pages, stop_event=None, start_page=1, first_signature=None):
+        self.scraper = scraper
+        self.keyword = keyword
+        self.max_pages = max_pages
+        self.stop_event = stop_event
+        self.start_page = start_page
+        self._first_signature = first_signature
+
+    def __iter__(self):
+        return self.scraper.iter_supplier_pages(
+            self.keyword, max_pages=self.max_pages, stop_event=self.stop_event, start_page=self.start_page,
+            first_signature=self._first_signature)
+
+    @property
+    def first_signature(self):
+        return self.scraper.first_page_signature if self.start_page == 1 else self._first_signature
+
+    @property
+    def reached_last_page(self):
+        return self.scraper.reached_last_page
+
+    @property
+    def error(self):
+        return self.scraper.crawl_error
+
+
+class ParallelPageCrawl:
+    """
+    Iterable of (page_number, suppliers) in page order, fetched concurrently:
+
+        crawl = ParallelPageCrawl(pool, "corn grain", max_pages=5, workers=3)
+        for page_number, suppliers in crawl:
+            ...
+        crawl.reached_last_page  # True if the results ran out before max_pages
+        crawl.first_signature    # Identifies page 1, to check a resumed crawl's pages against
+    """
+
+    def __init__(self, pool, keyword, max_pages, workers=None, stop_event=None, trace=None, start_page=1,
+                 first_signature=None):
+        self.pool = pool
+        self.trace = trace
+        self.keyword = keyword
+        self.max_pages = max_pages
+        self.start_page = start_page
+        self.workers = max(1, min(workers or pool.size, max_pages - start_page + 1))
+        self.stop_event = stop_event
+        self.reached_last_page = False
+        self.error = None
+        self.first_signature = tuple(first_signature) if first_signature else None
+
+    def _fetch(self, page_number):
+        with self.pool.checkout(trace=self.trace) as scraper:
+            return scraper.scrape_page(self._page_url(scraper, page_number))
+
+    def _page_url(self, scraper, page_number):
+        return scraper.build_page_url(scraper.build_search_url(self.keyword), page_number)
+
+    def __iter__(self):
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="page-fetch")
+        try:
+            futures = [executor.submit(self._fetch, page_number)
+                       for page_number in range(self.start_page, self.max_pages + 1)]
+            # Every page must differ from page 1 (known from an earlier run when resuming) and from
+            # every page before it in this crawl
+            seen = {self.first_signature} if self.first_signature else set()
+            for page_number, future in enumerate(futures, start=self.start_page):
+                try:
+                    suppliers, signature = future.result()
+                except Exception as e:
+                    if page_number == self.start_page:
+                        raise
+                    # Keep the pages already delivered, like the sequential crawl does on errors
+                    logger.error(f"Error fetching page {page_number}: {str(e)}")
+                    self.error = f"page {page_number}: {e}"
+                    return
+                if not suppliers:
+                    logger.info(f"No results on page {page_number}; stopping.")
+                    self.reached_last_page = True
+                    return
+                if page_number == 1:
+                    self.first_signature = signature
+                elif signature in seen:
+                    # The site ignored the page parameter; continue the slow way from this page on
+                    logger.info(f"Page {page_number} repeated an earlier page. Falling back to Next button navigation.")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    yield from self._sequential_from(page_number)
+                    return
+                seen.add(signature)
+
+                yield page_number, suppliers
+                if self.stop_event is not None and self.stop_event.is_set():
+                    logger.info("Stop requested. Ending parallel crawl early.")
+                    return
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _sequential_from(self, page_number):
+        """
+        Crawl page_number onwards with the Next button, starting from the last good page (whose
+        direct URL was honoured) rather than clicking through every page before it again
+        """
+        with self.pool.checkout(trace=self.trace) as scraper:
+            if page_number > self.start_page:
+                pages = scraper.iter_supplier_pages(
+                    self.keyword, max_pages=self.max_pages, stop_event=self.stop_event, pagination="button",
+                    start_page=page_number, resume_url=self._page_url(scraper, page_number - 1))
+            else:
+                # The first page of a resumed crawl showed page 1: no good page of this crawl to start from
+                pages = scraper.iter_supplier_pages(
+                    self.keyword, max_pages=self.max_pages, stop_event=self.stop_event, pagination="button",
+                    start_page=page_number, first_signature=self.first_signature)
+            yield from pages
+            self.reached_last_page = scraper.reached_last_page
+            self.error = scraper.crawl_error
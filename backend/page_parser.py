@@ -0,0 +1,249 @@
+"""
+Offline parser for Alibaba search result pages.
+
+Turns raw search-results HTML (``driver.page_source`` or a saved file) into the same
+supplier records that ``AlibabaSupplierScraper.extract_supplier_data`` produces, using
+lxml instead of live WebDriver element queries. Archived pages can be re-parsed in bulk
+across a process pool without launching Chrome:
+
+    python page_parser.py archive/*.html --workers 8 -o suppliers.json
+"""
+import argparse
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urljoin
+
+import lxml.html
+
+DEFAULT_BASE_URL = "https://www.alibaba.com/"
+
+logger = logging.getLogger(__name__)
+
+
+def _has_class(*classes):
+    """XPath predicate matching elements that carry every given CSS class"""
+    return " and ".join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in classes
+    )
+
+
+# XPath equivalents of the CSS selectors used by AlibabaSupplierScraper
+CARD_XPATH = f"//*[{_has_class('fy23-search-card', 'searchx-offer-item')}]"
+FALLBACK_CARD_XPATH = f"//*[{_has_class('organic-offer-wrapper')}]//*[{_has_class('organic-offer-item')}]"
+TITLE_XPATH = f".//h2[{_has_class('search-card-e-title')}]//a//span"
+PRICE_XPATH = f".//*[{_has_class('search-card-e-price-main')}]"
+COMPANY_XPATH = f".//a[{_has_class('search-card-e-company')}]"
+LOCATION_XPATH = f".//*[{_has_class('search-card-e-supplier__year')}]//span[not(following-sibling::span)]"
+MOQ_XPATH = f".//*[{_has_class('search-card-m-sale-features__item')}]"
+CERT_IMG_XPATH = f".//*[{_has_class('search-card-e-icon__certification-wrapper')}]//img"
+CERTIFIED_XPATH = f".//*[{_has_class('enhance-certs___certification-wrapper', 'certified')}]"
+VERIFIED_XPATH = ".//a[contains(@class, 'verified-supplier-icon__wrapper')]//img[contains(@class, 'verified-supplier-icon')]"
+REVIEW_XPATH = f".//*[{_has_class('search-card-e-review')}]"
+
+# Elements that start a new line in rendered text (approximates the browser's innerText)
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "dd", "div", "dl", "dt", "fieldset", "figcaption",
+    "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main",
+    "nav", "ol", "p", "pre", "section", "table", "tr", "ul",
+}
+SKIPPED_TAGS = {"script", "style", "noscript", "template"}
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def rendered_text(element):
+    """
+    Approximate Selenium's WebElement.text for a parsed element: block elements and <br>
+    become line breaks, whitespace inside a line is collapsed and empty lines are dropped.
+    """
+    # Source whitespace (including newlines in the markup) collapses to a single space;
+    # only structural breaks are kept as line breaks.
+    chunks = []
+
+    def add_text(value):
+        if value:
+            chunks.append(WHITESPACE_RE.sub(" ", value))
+
+    def walk(node):
+        tag = node.tag if isinstance(node.tag, str) else None
+        if tag in SKIPPED_TAGS:
+            return
+        if tag == "br" or tag in BLOCK_TAGS:
+            chunks.append("\n")
+        if tag is not None:
+            add_text(node.text)
+        for child in node:
+            walk(child)
+            add_text(child.tail)
+        if tag in BLOCK_TAGS:
+            chunks.append("\n")
+
+    walk(element)
+    lines = (" ".join(line.split()) for line in "".join(chunks).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def _first(element, xpath):
+    matches = element.xpath(xpath)
+    return matches[0] if matches else None
+
+
+def _absolute_href(element, base_url):
+    """Resolve an href the way the browser's element.href property does"""
+    href = element.get("href")
+    if href is None:
+        return None
+    return urljoin(base_url, href.strip())
+
+
+def parse_card(card, base_url=DEFAULT_BASE_URL):
+    """Extract one product card; mirrors AlibabaSupplierScraper.extract_card_info"""
+    supplier_info = {}
+
+    title_element = _first(card, TITLE_XPATH)
+    title_links = list(title_element.iterancestors("a")) if title_element is not None else []
+    if title_links:
+        supplier_info['product_title'] = rendered_text(title_element)
+        # The nearest enclosing link, as ancestor::a[1] / closest('a') in the browser-side extractors
+        supplier_info['product_url'] = _absolute_href(title_links[0], base_url)
+    else:
+        supplier_info['product_title'] = "N/A"
+        supplier_info['product_url'] = "N/A"
+
+    price_element = _first(card, PRICE_XPATH)
+    supplier_info['price'] = rendered_text(price_element) if price_element is not None else "N/A"
+
+    company_element = _first(card, COMPANY_XPATH)
+    if company_element is not None:
+        supplier_info['company_name'] = rendered_text(company_element)
+        supplier_info['company_url'] = _absolute_href(company_element, base_url)
+    else:
+        supplier_info['company_name'] = "N/A"
+        supplier_info['company_url'] = "N/A"
+
+    location_element = _first(card, LOCATION_XPATH)
+    if location_element is not None:
+        full_location_text = rendered_text(location_element)
+        # Example: "11 yrs\nCN Supplier"
+        location_parts = full_location_text.split('\n')
+        if len(location_parts) == 2:
+            supplier_info['years_on_alibaba_search_page'] = location_parts[0].strip()
+            supplier_info['location_search_page'] = location_parts[1].strip()
+        else:
+            supplier_info['years_on_alibaba_search_page'] = "N/A"
+            supplier_info['location_search_page'] = full_location_text
+    else:
+        supplier_info['years_on_alibaba_search_page'] = "N/A"
+        supplier_info['location_search_page'] = "N/A"
+
+    moq_element = _first(card, MOQ_XPATH)
+    supplier_info['min_order'] = rendered_text(moq_element) if moq_element is not None else "N/A"
+
+    certifications = []
+    for cert_img in card.xpath(CERT_IMG_XPATH):
+        alt_text = (cert_img.get('alt') or "").strip()
+        if alt_text and alt_text not in certifications:
+            certifications.append(alt_text)
+    for element in card.xpath(CERTIFIED_XPATH):
+        text_content = rendered_text(element)
+        if text_content and text_content not in certifications:
+            certifications.append(text_content)
+    if card.xpath(VERIFIED_XPATH) and "Verified Supplier" not in certifications:
+        certifications.append("Verified Supplier")
+    supplier_info['certifications'] = certifications
+
+    response_element = _first(card, REVIEW_XPATH)
+    supplier_info['response_rate'] = rendered_text(response_element) if response_element is not None else "N/A"
+
+    return supplier_info
+
+
+def parse_search_page(html, base_url=DEFAULT_BASE_URL):
+    """
+    Parse search results HTML (str or bytes) into a list of supplier records.
+    base_url: the page's URL; links resolve against its <base href> when it has one, as in the browser
+    """
+    if not html or not html.strip():
+        return []
+    document = lxml.html.fromstring(html)
+    base_href = document.xpath("string(//base[@href][1]/@href)").strip()
+    if base_href:
+        base_url = urljoin(base_url, base_href)
+
+    cards = document.xpath(CARD_XPATH)
+    if not cards:
+        logger.warning("No product cards found with primary card selector. Trying old selectors as fallback.")
+        cards = document.xpath(FALLBACK_CARD_XPATH)
+    if not cards:
+        logger.warning("Still no product cards found after trying all known selectors on this search page.")
+
+    suppliers = []
+    for card in cards:
+        try:
+            suppliers.append(parse_card(card, base_url))
+        except Exception as e:
+            logger.warning(f"Error parsing individual card: {str(e)}", exc_info=True)
+    return suppliers
+
+
+def parse_search_file(path, base_url=DEFAULT_BASE_URL):
+    """Parse a saved search results page; raw bytes are passed through so <meta charset> is honoured"""
+    with open(path, 'rb') as f:
+        return parse_search_page(f.read(), base_url)
+
+
+def _parse_file_job(args):
+    path, base_url = args
+    return path, parse_search_file(path, base_url)
+
+
+def parse_archive(paths, max_workers=None, base_url=DEFAULT_BASE_URL):
+    """
+    Re-parse many archived pages across a process pool.
+    Returns {path: [supplier records]} in the order the paths were given.
+    """
+    paths = list(paths)
+    if not paths:
+        return {}
+    if max_workers == 1 or len(paths) == 1:
+        return {path: parse_search_file(path, base_url) for path in paths}
+
+    chunksize = max(1, len(paths) // ((max_workers or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return dict(executor.map(_parse_file_job, [(path, base_url) for path in paths], chunksize=chunksize))
+
+
+def _expand_paths(inputs):
+    for item in inputs:
+        if os.path.isdir(item):
+            for name in sorted(os.listdir(item)):
+                if name.endswith(('.html', '.htm')):
+                    yield os.path.join(item, name)
+        else:
+            yield item
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse saved Alibaba search result pages without a browser")
+    parser.add_argument("inputs", nargs="+", help="HTML files or directories of .html files")
+    parser.add_argument("-o", "--output", help="Write all records to this JSON file (default: print a summary)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="Base URL used to resolve relative links")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    results = parse_archive(_expand_paths(args.inputs), max_workers=args.workers, base_url=args.base_url)
+
+    for path, suppliers in results.items():
+        print(f"{path}: {len(suppliers)} suppliers")
+    if args.output:
+        records = [supplier for suppliers in results.values() for supplier in suppliers]
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+        print(f"Saved {len(records)} suppliers to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Memory of a browser's process tree (chromedriver -> chrome -> renderers, GPU, utility processes).
+
+Uses psutil when it is installed and falls back to /proc on Linux; elsewhere without psutil the
+RSS is reported as unknown (None).
+"""
+import os
+
+try:
+    import psutil
+except ImportError: # Optional dependency
+    psutil = None
+
+
+def _proc_children(pid):
+    children = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return children
+
+
+def _proc_rss(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def process_tree_pids(pid):
+    """pid and all of its descendants"""
+    if psutil is not None:
+        try:
+            parent = psutil.Process(pid)
+            return [pid] + [child.pid for child in parent.children(recursive=True)]
+        except psutil.Error:
+            return []
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        pending.extend(_proc_children(current))
+    return pids
+
+
+def process_tree_rss(pid):
+    """Resident memory in bytes of pid and its descendants, or None if it cannot be measured"""
+    if pid is None:
+        return None
+    if psutil is not None:
+        total = 0
+        for child_pid in process_tree_pids(pid):
+            try:
+                total += psutil.Process(child_pid).memory_info().rss
+            except psutil.Error:
+                pass # Exited while we were looking
+        return total
+    if not os.path.isdir("/proc"):
+        return None
+    return sum(_proc_rss(child_pid) for child_pid in process_tree_pids(pid))
+
+
+def kill_process_tree(pid):
+    """Last resort for a hung browser: SIGKILL pid and its descendants (children first)"""
+    if pid is None:
+        return
+    for child_pid in reversed(process_tree_pids(pid)):
+        try:
+            os.kill(child_pid, 9)
+        except OSError:
+            pass
@@ -0,0 +1,170 @@
+"""
+Persistent cache of scraped search result pages.
+
+Pages are keyed on the normalized keyword and page number and stored in a local SQLite file,
+so repeated searches for the same commodity survive restarts and skip the browser entirely.
+Entries expire after a TTL (expired entries can still be served on request) and the least
+recently used pages are evicted once the cache grows past its size limit.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    keyword TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    is_last INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (keyword, page)
+);
+CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at);
+"""
+
+
+def normalize_keyword(keyword):
+    """Case- and whitespace-insensitive cache key: '  Corn  Grain' -> 'corn grain'"""
+    return " ".join(keyword.lower().split())
+
+
+class ResultCache:
+    def __init__(self, path, ttl=6 * 3600, stale_ttl=7 * 24 * 3600, max_bytes=256 * 1024 * 1024):
+        """
+        path: SQLite file (its directory is created if needed)
+        ttl: seconds a page is considered fresh
+        stale_ttl: seconds past the TTL an expired page is kept for allow_stale lookups
+        max_bytes: total payload size above which least recently used pages are evicted (None: no cap)
+        """
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_bytes = max_bytes
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # One shared connection guarded by a lock; SQLite serializes writes anyway
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def lookup(self, keyword, max_pages, allow_stale=False):
+        """
+        Look up pages 1..max_pages, stopping early at a page known to be the last one.
+        Returns ([(page_number, suppliers), ...], stale) if every page is cached, where stale is
+        True if any page is past its TTL, otherwise None.
+        """
+        key = normalize_keyword(keyword)
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page, payload, is_last, created_at FROM pages WHERE keyword = ? AND page <= ? ORDER BY page",
+                (key, max_pages),
+            ).fetchall()
+
+            pages, stale = [], False
+            for expected_page, (page, payload, is_last, created_at) in enumerate(rows, start=1):
+                if page != expected_page:
+                    break
+                age = now - created_at
+                if age > self.ttl + self.stale_ttl or (age > self.ttl and not allow_stale):
+                    break
+                stale = stale or age > self.ttl
+                pages.append((page, json.loads(payload)))
+                if is_last:
+                    break
+            complete = bool(pages) and (len(pages) == max_pages or rows[len(pages) - 1][2])
+
+            if not complete:
+                self._counters["misses"] += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE pages SET accessed_at = ? WHERE keyword = ? AND page <= ?",
+                (now, key, len(pages)),
+            )
+            self._conn.commit()
+            self._counters["stale_hits" if stale else "hits"] += 1
+        return pages, stale
+
+    def put(self, keyword, page, suppliers, is_last=False):
+        """Store one result page, then evict least recently used pages if over the size limit"""
+        payload = json.dumps(suppliers, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (keyword, page, payload, size, is_last, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (normalize_keyword(keyword), page, payload, len(payload), int(is_last), now, now),
+            )
+            self._counters["writes"] += 1
+            self._evict(now)
+            self._conn.commit()
+
+    def mark_last(self, keyword, page):
+        """Record that page is the final results page for keyword, so shorter crawls still hit"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET is_last = (page = ?) WHERE keyword = ?",
+                (page, normalize_keyword(keyword)),
+            )
+            self._conn.commit()
+
+    def invalidate(self, keyword=None):
+        """Drop cached pages for one keyword, or everything. Returns the number of pages removed."""
+        with self._lock:
+            if keyword is None:
+                cursor = self._conn.execute("DELETE FROM pages")
+            else:
+                cursor = self._conn.execute("DELETE FROM pages WHERE keyword = ?", (normalize_keyword(keyword),))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def _evict(self, now):
+        # Pages too old to be served even as stale are dropped first, then LRU down to max_bytes
+        expired = self._conn.execute(
+            "DELETE FROM pages WHERE created_at < ?", (now - self.ttl - self.stale_ttl,)
+        ).rowcount
+        self._counters["evictions"] += expired
+
+        if self.max_bytes is None:
+            return
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for keyword, page, size in self._conn.execute(
+            "SELECT keyword, page, size FROM pages ORDER BY accessed_at"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM pages WHERE keyword = ? AND page = ?", (keyword, page))
+            total -= size
+            self._counters["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["stale_hits"] + counters["misses"]
+        return {
+            **counters,
+            "hit_ratio": round((counters["hits"] + counters["stale_hits"]) / lookups, 4) if lookups else None,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,176 @@
+"""
+In-memory full-text index over stored suppliers, for instant local search.
+
+Narrowing a keyword that was already scraped ("yellow corn" within "corn grain") should not
+need another browser crawl. SupplierIndex keeps an inverted index of every stored record's
+product title, company name, location and certifications:
+
+- Terms are lower-cased alphanumeric tokens. Each posting holds the term's field-weighted
+  frequency in the record (a title match counts more than a location match).
+- Queries match every query term (AND), either exactly or as a prefix of an indexed term
+  ("yel" finds "yellow"; exact matches rank higher), and are ranked with BM25.
+- The index is filled from the supplier store at startup and updated as pages are scraped; a
+  record scraped again replaces its previous version.
+"""
+import bisect
+import heapq
+import math
+import re
+import threading
+import time
+
+from dedup import record_key
+from result_cache import normalize_keyword
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Indexed fields and how much a term occurring in them counts
+FIELD_WEIGHTS = {
+    "product_title": 3.0,
+    "company_name": 2.0,
+    "certifications": 1.5,
+    "location_search_page": 1.0,
+}
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+PREFIX_WEIGHT = 0.7 # Score factor of a prefix match relative to an exact one
+MIN_PREFIX_LENGTH = 2 # Shorter query terms only match exactly
+MAX_PREFIX_TERMS = 64 # Indexed terms a single prefix may expand to
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def _field_text(record, field):
+    value = getattr(record, field)
+    if field == "certifications":
+        return " ".join(value or ())
+    return value if value and value != "N/A" else ""
+
+
+class SupplierIndex:
+    def __init__(self):
+        self._postings = {} # term -> {doc_id: weighted term frequency}
+        self._terms = [] # Sorted vocabulary, for prefix lookups
+        self._docs = {} # doc_id -> (keyword, record, scraped_at, weighted length, terms)
+        self._ids = {} # (keyword, record_key) -> doc_id
+        self._next_id = 0
+        self._total_length = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, keyword, records, scraped_at=None):
+        """
+        Index records (SupplierRecords) stored for keyword. A record already indexed for keyword is
+        replaced, unless the indexed version is newer than scraped_at (default: now).
+        """
+        keyword = normalize_keyword(keyword)
+        scraped_at = time.time() if scraped_at is None else scraped_at
+        with self._lock:
+            for record in records:
+                key = (keyword, record_key(record))
+                doc_id = self._ids.get(key)
+                if doc_id is not None:
+                    if self._docs[doc_id][2] > scraped_at:
+                        continue
+                    self._remove(doc_id)
+                self._add(key, record, scraped_at)
+
+    def _add(self, key, record, scraped_at):
+        frequencies = {}
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(_field_text(record, field)):
+                frequencies[term] = frequencies.get(term, 0.0) + weight
+                length += weight
+        doc_id = self._next_id
+        self._next_id += 1
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._terms, term)
+            postings[doc_id] = frequency
+        self._docs[doc_id] = (key[0], record, scraped_at, length, tuple(frequencies))
+        self._ids[key] = doc_id
+        self._total_length += length
+
+    def _remove(self, doc_id):
+        keyword, record, _, length, terms = self._docs.pop(doc_id)
+        del self._ids[(keyword, record_key(record))]
+        self._total_length -= length
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect.bisect_left(self._terms, term)]
+
+    def _expand(self, query_term):
+        """[(indexed term, factor)]: the exact term, plus terms it is a prefix of"""
+        matches = [(query_term, 1.0)] if query_term in self._postings else []
+        if len(query_term) >= MIN_PREFIX_LENGTH:
+            start = bisect.bisect_right(self._terms, query_term)
+            for term in self._terms[start:start + MAX_PREFIX_TERMS]:
+                if not term.startswith(query_term):
+                    break
+                matches.append((term, PREFIX_WEIGHT))
+        return matches
+
+    def search(self, query, keyword=None, limit=50, offset=0):
+        """
+        Records matching every term of query, best first.
+        keyword: only records stored for this (scraped) keyword
+        Returns (total matches, [(score, keyword, record, scraped_at)] for the requested slice)
+        """
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        if not query_terms:
+            return 0, []
+        scope = normalize_keyword(keyword) if keyword else None
+        with self._lock:
+            count = len(self._docs)
+            if not count:
+                return 0, []
+            average_length = self._total_length / count
+            # Most selective query term first, so the others only rescore its matches
+            expanded = sorted((self._expand(query_term) for query_term in query_terms),
+                              key=lambda matches: sum(len(self._postings[term]) for term, _ in matches))
+            scores = None
+            for matches in expanded:
+                term_scores = {}
+                for term, factor in matches:
+                    postings = self._postings[term]
+                    idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    if scores is not None and len(scores) < len(postings):
+                        # Later terms only rescore the records still matching every earlier term
+                        candidates = ((doc_id, postings[doc_id]) for doc_id in scores if doc_id in postings)
+                    else:
+                        candidates = postings.items()
+                    for doc_id, frequency in candidates:
+                        if scores is not None and doc_id not in scores:
+                            continue
+                        length = self._docs[doc_id][3]
+                        score = factor * idf * frequency * (K1 + 1) / (
+                            frequency + K1 * (1 - B + B * length / average_length))
+                        # A query term counts once per record: its best matching indexed term
+                        if score > term_scores.get(doc_id, 0.0):
+                            term_scores[doc_id] = score
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {doc_id: scores[doc_id] + score for doc_id, score in term_scores.items()}
+                if not scores:
+                    return 0, []
+            if scope is not None:
+                scores = {doc_id: score for doc_id, score in scores.items() if self._docs[doc_id][0] == scope}
+            top = heapq.nlargest(offset + limit, scores.items(), key=lambda item: (item[1], -item[0]))[offset:]
+            hits = [(score, *self._docs[doc_id][:3]) for doc_id, score in top]
+        return len(scores), hits
+
+    def stats(self):
+        with self._lock:
+            return {"records": len(self._docs), "terms": len(self._postings)}
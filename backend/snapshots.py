@@ -0,0 +1,152 @@
+"""
+Last known result set per keyword, for change-only refreshes.
+
+Every completed crawl of a keyword replaces its snapshot: the identity (dedup.record_key) and
+price of each listing found. Diffing a new crawl against the snapshot gives what changed since
+the previous crawl (new listings, removed listings, price changes), so routine refreshes only
+need to send the differences. The snapshot's keys also tell an incremental crawl when a page
+holds nothing new.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from dedup import record_key
+from result_cache import normalize_keyword
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    keyword TEXT PRIMARY KEY,
+    pages INTEGER NOT NULL,
+    records INTEGER NOT NULL,
+    taken_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshot_records (
+    keyword TEXT NOT NULL,
+    record_key TEXT NOT NULL,
+    product_title TEXT,
+    product_url TEXT,
+    company_name TEXT,
+    company_url TEXT,
+    price TEXT,
+    price_min REAL,
+    price_max REAL,
+    currency TEXT,
+    PRIMARY KEY (keyword, record_key)
+) WITHOUT ROWID;
+"""
+
+# Columns kept per listing; removed listings are reported with these
+SNAPSHOT_FIELDS = (
+    'product_title', 'product_url', 'company_name', 'company_url',
+    'price', 'price_min', 'price_max', 'currency',
+)
+
+
+def _price(text):
+    return " ".join((text or "").split())
+
+
+class SnapshotStore:
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def known_keys(self, keyword):
+        """Record keys in keyword's last snapshot (empty if there is none)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT record_key FROM snapshot_records WHERE keyword = ?", (normalize_keyword(keyword),)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def info(self, keyword):
+        """{"pages", "records", "taken_at"} of keyword's last snapshot, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT pages, records, taken_at FROM snapshots WHERE keyword = ?", (normalize_keyword(keyword),)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def update(self, keyword, records, pages, exhaustive=False):
+        """
+        Diff records (SupplierRecords from a crawl of pages result pages) against keyword's last
+        snapshot, then make them the new snapshot.
+
+        Listings are only reported removed when the crawl covered the previous snapshot: it reached
+        the last results page (exhaustive) or crawled at least as many pages. A shorter crawl (an
+        incremental refresh that stopped early, a cancelled job) cannot tell whether a listing
+        is gone or on a page it did not visit, so those listings are kept in the snapshot.
+
+        Returns {"new": [...], "removed": [...], "price_changed": [...], "unchanged": int,
+                 "removals_checked": bool, "previous_snapshot_at": float | None}
+        """
+        key = normalize_keyword(keyword)
+        current = {}
+        for record in records:
+            current.setdefault(record_key(record), record)
+        now = time.time()
+        with self._lock:
+            meta = self._conn.execute("SELECT pages, taken_at FROM snapshots WHERE keyword = ?", (key,)).fetchone()
+            previous = {
+                row['record_key']: row for row in self._conn.execute(
+                    f"SELECT record_key, {', '.join(SNAPSHOT_FIELDS)} FROM snapshot_records WHERE keyword = ?", (key,)
+                )
+            }
+            covered = meta is None or exhaustive or pages >= meta['pages']
+
+            new, price_changed, unchanged = [], [], 0
+            for record_id, record in current.items():
+                old = previous.get(record_id)
+                if old is None:
+                    new.append(record.to_dict())
+                elif _price(old['price']) != _price(record.price):
+                    price_changed.append({**record.to_dict(), "previous_price": old['price']})
+                else:
+                    unchanged += 1
+            removed = []
+            if covered:
+                removed = [
+                    {field: row[field] for field in SNAPSHOT_FIELDS}
+                    for record_id, row in previous.items() if record_id not in current
+                ]
+                self._conn.execute("DELETE FROM snapshot_records WHERE keyword = ?", (key,))
+
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO snapshot_records (keyword, record_key, {', '.join(SNAPSHOT_FIELDS)}) "
+                f"VALUES (?, ?, {', '.join('?' for _ in SNAPSHOT_FIELDS)})",
+                [(key, record_id, *(getattr(record, field) for field in SNAPSHOT_FIELDS))
+                 for record_id, record in current.items()],
+            )
+            total = self._conn.execute("SELECT COUNT(*) FROM snapshot_records WHERE keyword = ?", (key,)).fetchone()[0]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots (keyword, pages, records, taken_at) VALUES (?, ?, ?, ?)",
+                (key, pages if covered else max(pages, meta['pages']), total, now),
+            )
+            self._conn.commit()
+
+        logger.info(f"Snapshot of '{key}': {len(new)} new, {len(removed)} removed, "
+                    f"{len(price_changed)} price changes, {unchanged} unchanged")
+        return {
+            "new": new,
+            "removed": removed,
+            "price_changed": price_changed,
+            "unchanged": unchanged,
+            "removals_checked": covered and meta is not None,
+            "previous_snapshot_at": meta['taken_at'] if meta else None,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,172 @@
+"""
+Compact, pre-normalized supplier records.
+
+extract_card_info produces free-text fields ("US$180-220", "11 yrs", "4.8/5.0 (12)") that
+every consumer used to re-parse. SupplierRecord parses them once, when a page is scraped,
+into numeric slots (price range and currency, MOQ quantity and unit, years, rating and review
+count) while keeping the raw strings for display. Records use __slots__ instead of a
+per-instance dict, and certifications are interned and mirrored in a bitmask so certification
+filters are a single integer AND.
+"""
+import re
+import sys
+import threading
+
+# Raw fields, in the order extract_card_info emits them
+RAW_FIELDS = (
+    'product_title', 'product_url', 'price', 'company_name', 'company_url',
+    'years_on_alibaba_search_page', 'location_search_page', 'min_order',
+    'certifications', 'response_rate',
+)
+
+# Fields parsed once at scrape time; also included in API payloads
+PARSED_FIELDS = (
+    'price_min', 'price_max', 'currency', 'moq_quantity', 'moq_unit',
+    'years', 'location', 'rating', 'review_count', 'response_rate_pct',
+)
+
+NUMBER_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+PERCENT_RE = re.compile(r"(\d+(?:\.\d+)?)\s*%")
+RATING_RE = re.compile(r"(\d+(?:\.\d+)?)\s*/\s*5(?:\.0)?")
+REVIEW_COUNT_RE = re.compile(r"\(\s*(\d[\d,]*)")
+MOQ_RE = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s*(.*)")
+
+# Longest prefixes first so "US$" wins over "$"
+CURRENCY_SYMBOLS = (
+    ("US$", "USD"), ("CN¥", "CNY"), ("HK$", "HKD"), ("A$", "AUD"), ("C$", "CAD"),
+    ("$", "USD"), ("€", "EUR"), ("£", "GBP"), ("¥", "CNY"), ("₹", "INR"),
+)
+
+
+def _number(text):
+    return float(text.replace(',', ''))
+
+
+def parse_price(text):
+    """'US$180-220' -> (180.0, 220.0, 'USD'); unknown -> (None, None, None)"""
+    text = (text or "").strip()
+    numbers = [_number(n) for n in NUMBER_RE.findall(text)]
+    if not numbers:
+        return None, None, None
+    currency = next((code for symbol, code in CURRENCY_SYMBOLS if text.startswith(symbol)), None)
+    return numbers[0], numbers[-1], currency
+
+
+def parse_min_order(text):
+    """'Min. order: 12 metric tons' -> (12.0, 'metric tons'); unknown -> (None, None)"""
+    text = " ".join((text or "").split())
+    if ":" in text:
+        text = text.split(":", 1)[1].strip()
+    match = MOQ_RE.search(text)
+    if not match:
+        return None, None
+    return _number(match.group(1)), match.group(2).strip() or None
+
+
+def parse_years(text):
+    """'11 yrs' -> 11; unknown -> None"""
+    match = NUMBER_RE.search(text or "")
+    return int(_number(match.group())) if match else None
+
+
+def parse_response_rate(text):
+    """'5.0\\n/5.0 (\\n5 reviews\\n)' -> (5.0, 5, None); a '95%' response rate fills the last slot"""
+    text = " ".join((text or "").split())
+    rating = RATING_RE.search(text)
+    reviews = REVIEW_COUNT_RE.search(text)
+    percent = PERCENT_RE.search(text)
+    return (
+        float(rating.group(1)) if rating else None,
+        int(_number(reviews.group(1))) if reviews else None,
+        float(percent.group(1)) if percent else None,
+    )
+
+
+def parse_location(text):
+    """'CN Supplier' -> 'CN' (same normalization as the table's location filter)"""
+    if not text or text == "N/A":
+        return None
+    return sys.intern(text.replace(" Supplier", "").strip()) or None
+
+
+class CertificationRegistry:
+    """Interns certification names and assigns each one a bit for mask-based filtering"""
+
+    def __init__(self):
+        self._bits = {}
+        self._names = []
+        self._lock = threading.Lock()
+
+    def bit(self, name):
+        bit = self._bits.get(name)
+        if bit is None:
+            with self._lock:
+                bit = self._bits.get(name)
+                if bit is None:
+                    bit = 1 << len(self._names)
+                    self._names.append(sys.intern(name))
+                    self._bits[self._names[-1]] = bit
+        return bit
+
+    def mask(self, names):
+        mask = 0
+        for name in names:
+            mask |= self.bit(name)
+        return mask
+
+    def names(self, mask):
+        return [name for index, name in enumerate(self._names) if mask >> index & 1]
+
+
+CERTIFICATIONS = CertificationRegistry()
+
+
+class SupplierRecord:
+    # company_profile: dict merged in by enrichment.CompanyEnricher (None if not enriched)
+    __slots__ = RAW_FIELDS + PARSED_FIELDS + ('cert_mask', 'company_profile')
+
+    def __init__(self, **fields):
+        for field in self.__slots__:
+            setattr(self, field, fields.get(field))
+        self.certifications = tuple(sys.intern(cert) for cert in self.certifications or ())
+        if self.cert_mask is None:
+            self.cert_mask = CERTIFICATIONS.mask(self.certifications)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build a record from an extract_card_info dict. If the dict already carries parsed
+        fields (e.g. it came from to_dict()), they are reused instead of re-parsing.
+        """
+        fields = {field: data.get(field) for field in RAW_FIELDS}
+        if all(field in data for field in PARSED_FIELDS):
+            fields.update((field, data[field]) for field in PARSED_FIELDS)
+        else:
+            fields['price_min'], fields['price_max'], fields['currency'] = parse_price(data.get('price'))
+            fields['moq_quantity'], fields['moq_unit'] = parse_min_order(data.get('min_order'))
+            fields['years'] = parse_years(data.get('years_on_alibaba_search_page'))
+            fields['location'] = parse_location(data.get('location_search_page'))
+            fields['rating'], fields['review_count'], fields['response_rate_pct'] = parse_response_rate(data.get('response_rate'))
+        fields['company_profile'] = data.get('company_profile')
+        return cls(**fields)
+
+    def to_dict(self, parsed=True, fields=None):
+        """
+        extract_card_info schema (same keys and order), followed by the parsed fields if requested
+        and the company profile if the record was enriched. fields: only these keys, in this order.
+        """
+        data = {field: getattr(self, field) for field in RAW_FIELDS}
+        data['certifications'] = list(self.certifications)
+        if parsed:
+            data.update((field, getattr(self, field)) for field in PARSED_FIELDS)
+        if self.company_profile is not None:
+            data['company_profile'] = dict(self.company_profile)
+        if fields is not None:
+            return {field: data[field] for field in fields if field in data}
+        return data
+
+    def has_any_certification(self, mask):
+        return bool(self.cert_mask & mask)
+
+    def __repr__(self):
+        return f"SupplierRecord({self.product_title!r}, {self.company_name!r}, price={self.price!r})"
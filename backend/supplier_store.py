@@ -0,0 +1,287 @@
+"""
+Indexed local store of scraped supplier records.
+
+Every record produced by extract_card_info is persisted in SQLite together with the numeric
+fields SupplierRecord parses from its free text (price, MOQ, years, rating). Filtering, sorting
+and cursor pagination then happen server-side on indexed columns, so clients only receive
+one page of rows at a time.
+"""
+import base64
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from dedup import record_key
+from result_cache import normalize_keyword
+from supplier_record import PARSED_FIELDS, RAW_FIELDS as SUPPLIER_FIELDS, SupplierRecord
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS suppliers (
+    id INTEGER PRIMARY KEY,
+    keyword TEXT NOT NULL,
+    record_key TEXT NOT NULL,
+    product_title TEXT,
+    product_url TEXT,
+    price TEXT,
+    company_name TEXT,
+    company_url TEXT,
+    years_on_alibaba_search_page TEXT,
+    location_search_page TEXT,
+    min_order TEXT,
+    certifications TEXT,
+    response_rate TEXT,
+    price_min REAL,
+    price_max REAL,
+    currency TEXT,
+    moq_quantity REAL,
+    moq_unit TEXT,
+    years INTEGER,
+    location TEXT,
+    rating REAL,
+    review_count INTEGER,
+    response_rate_pct REAL,
+    scraped_at REAL NOT NULL,
+    UNIQUE (keyword, record_key)
+);
+CREATE INDEX IF NOT EXISTS suppliers_keyword_scraped_at ON suppliers (keyword, scraped_at);
+CREATE INDEX IF NOT EXISTS suppliers_keyword_price ON suppliers (keyword, price_min);
+CREATE INDEX IF NOT EXISTS suppliers_keyword_years ON suppliers (keyword, years);
+CREATE INDEX IF NOT EXISTS suppliers_keyword_location ON suppliers (keyword, location);
+CREATE INDEX IF NOT EXISTS suppliers_keyword_rating ON suppliers (keyword, rating);
+CREATE INDEX IF NOT EXISTS suppliers_keyword_response_rate ON suppliers (keyword, response_rate_pct);
+CREATE TABLE IF NOT EXISTS supplier_certifications (
+    certification TEXT NOT NULL,
+    supplier_id INTEGER NOT NULL REFERENCES suppliers (id) ON DELETE CASCADE,
+    PRIMARY KEY (certification, supplier_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS supplier_certifications_supplier ON supplier_certifications (supplier_id);
+"""
+
+# Public sort keys -> indexed columns
+SORT_COLUMNS = {
+    "scraped_at": "scraped_at",
+    "price": "price_min",
+    "years": "years",
+    "rating": "rating",
+    "response_rate": "response_rate_pct",
+    "location": "location",
+    "company_name": "company_name",
+    "product_title": "product_title",
+}
+
+def _encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+class SupplierStore:
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._lock = threading.Lock()
+
+    def _migrate(self):
+        """Bring stores created by older versions up to date (parsed-field columns, canonical record keys)"""
+        existing = {row['name'] for row in self._conn.execute("PRAGMA table_info(suppliers)")}
+        for column, column_type in (("currency", "TEXT"), ("moq_quantity", "REAL"), ("moq_unit", "TEXT"), ("review_count", "INTEGER")):
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE suppliers ADD COLUMN {column} {column_type}")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+            self._rekey()
+            self._conn.execute("PRAGMA user_version = 1")
+        self._conn.commit()
+
+    def _rekey(self):
+        """
+        Older stores keyed records on the raw product URL, so one listing could be stored once per
+        tracking link. Re-key every row on the canonical key; of duplicates the newest row is kept.
+        """
+        rows = self._conn.execute(
+            "SELECT id, keyword, product_title, product_url, company_name, company_url FROM suppliers "
+            "ORDER BY scraped_at DESC, id DESC"
+        ).fetchall()
+        # Temporary unique keys first, so the new keys never collide with rows not yet re-keyed
+        self._conn.execute("UPDATE suppliers SET record_key = 'rekey:' || id")
+        seen = set()
+        for row in rows:
+            key = (row['keyword'], record_key(dict(row)))
+            if key in seen:
+                self._conn.execute("DELETE FROM suppliers WHERE id = ?", (row['id'],))
+            else:
+                seen.add(key)
+                self._conn.execute("UPDATE suppliers SET record_key = ? WHERE id = ?", (key[1], row['id']))
+        if len(seen) < len(rows):
+            logger.info(f"Merged {len(rows) - len(seen)} duplicate supplier rows while re-keying the store")
+
+    def add(self, keyword, records):
+        """Insert or refresh records scraped for keyword (SupplierRecord objects or extract_card_info dicts)"""
+        key = normalize_keyword(keyword)
+        now = time.time()
+        with self._lock:
+            for record in records:
+                if not isinstance(record, SupplierRecord):
+                    record = SupplierRecord.from_dict(record)
+                row = {field: getattr(record, field) for field in SUPPLIER_FIELDS}
+                row['certifications'] = json.dumps(list(record.certifications), ensure_ascii=False)
+                row.update((field, getattr(record, field)) for field in PARSED_FIELDS)
+                row.update(keyword=key, record_key=record_key(record), scraped_at=now)
+                columns = ", ".join(row)
+                placeholders = ", ".join(f":{column}" for column in row)
+                updates = ", ".join(f"{column} = excluded.{column}" for column in row if column not in ('keyword', 'record_key'))
+                self._conn.execute(
+                    f"INSERT INTO suppliers ({columns}) VALUES ({placeholders}) "
+                    f"ON CONFLICT (keyword, record_key) DO UPDATE SET {updates}",
+                    row,
+                )
+                supplier_id = self._conn.execute(
+                    "SELECT id FROM suppliers WHERE keyword = ? AND record_key = ?", (key, row['record_key'])
+                ).fetchone()[0]
+                self._conn.execute("DELETE FROM supplier_certifications WHERE supplier_id = ?", (supplier_id,))
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO supplier_certifications (certification, supplier_id) VALUES (?, ?)",
+                    [(cert, supplier_id) for cert in record.certifications],
+                )
+            self._conn.commit()
+
+    def _filters(self, keyword=None, price_min=None, price_max=None, locations=None, years_min=None,
+                 certifications=None, response_rate_min=None):
+        """WHERE clauses mirroring the SupplierTable filters (unknown prices/rates are not filtered out)"""
+        clauses, params = [], []
+        if keyword:
+            clauses.append("keyword = ?")
+            params.append(normalize_keyword(keyword))
+        if price_min is not None:
+            clauses.append("(price_min IS NULL OR price_min >= ?)")
+            params.append(price_min)
+        if price_max is not None:
+            clauses.append("(price_min IS NULL OR price_min <= ?)")
+            params.append(price_max)
+        if locations:
+            clauses.append(f"location IN ({', '.join('?' for _ in locations)})")
+            params.extend(locations)
+        if years_min is not None:
+            clauses.append("COALESCE(years, 0) >= ?")
+            params.append(years_min)
+        if certifications:
+            clauses.append(
+                "id IN (SELECT supplier_id FROM supplier_certifications "
+                f"WHERE certification IN ({', '.join('?' for _ in certifications)}))"
+            )
+            params.extend(certifications)
+        if response_rate_min is not None:
+            clauses.append("(response_rate_pct IS NULL OR response_rate_pct >= ?)")
+            params.append(response_rate_min)
+        return clauses, params
+
+    def query(self, sort="scraped_at", order="asc", limit=50, cursor=None, **filters):
+        """
+        Filtered, sorted page of records. Pagination is keyset-based: pass the returned
+        next_cursor back to get the following page. Rows with no value for the sort column
+        come last in either direction.
+        Returns {"data": [...], "next_cursor": str | None, "total": int}
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"sort must be one of {sorted(SORT_COLUMNS)}")
+        if order not in ("asc", "desc"):
+            raise ValueError("order must be 'asc' or 'desc'")
+        column = SORT_COLUMNS[sort]
+        comparison = ">" if order == "asc" else "<"
+
+        clauses, params = self._filters(**filters)
+        count_sql = "SELECT COUNT(*) FROM suppliers" + (" WHERE " + " AND ".join(clauses) if clauses else "")
+
+        page_clauses, page_params = list(clauses), list(params)
+        if cursor:
+            is_null, value, last_id = _decode_cursor(cursor)
+            if is_null:
+                page_clauses.append(f"({column} IS NULL AND id {comparison} ?)")
+                page_params.append(last_id)
+            else:
+                page_clauses.append(
+                    f"({column} IS NULL OR {column} {comparison} ? OR ({column} = ? AND id {comparison} ?))"
+                )
+                page_params.extend([value, value, last_id])
+
+        sql = (
+            "SELECT * FROM suppliers"
+            + (" WHERE " + " AND ".join(page_clauses) if page_clauses else "")
+            + f" ORDER BY {column} IS NULL, {column} {order.upper()}, id {order.upper()} LIMIT ?"
+        )
+        with self._lock:
+            total = self._conn.execute(count_sql, params).fetchone()[0]
+            rows = self._conn.execute(sql, page_params + [limit + 1]).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = _encode_cursor([last[column] is None, last[column], last['id']])
+        return {"data": [self._to_record(row) for row in rows], "next_cursor": next_cursor, "total": total}
+
+    def facets(self, keyword=None):
+        """Distinct locations and certifications (with counts) for building filter controls"""
+        clauses, params = self._filters(keyword=keyword)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        with self._lock:
+            locations = self._conn.execute(
+                f"SELECT location, COUNT(*) FROM suppliers{where} "
+                f"{'AND' if where else 'WHERE'} location IS NOT NULL GROUP BY location ORDER BY location",
+                params,
+            ).fetchall()
+            certifications = self._conn.execute(
+                "SELECT c.certification, COUNT(*) FROM supplier_certifications c "
+                f"JOIN suppliers ON suppliers.id = c.supplier_id{where} "
+                "GROUP BY c.certification ORDER BY c.certification",
+                params,
+            ).fetchall()
+        return {
+            "locations": {location: count for location, count in locations},
+            "certifications": {cert: count for cert, count in certifications},
+        }
+
+    def iter_records(self, batch_size=1000):
+        """Every stored record as (keyword, SupplierRecord, scraped_at), read a batch of rows at a time"""
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT * FROM suppliers WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row['keyword'], self._supplier_record(row), row['scraped_at']
+            last_id = rows[-1]['id']
+
+    def _supplier_record(self, row):
+        fields = {field: row[field] for field in SUPPLIER_FIELDS + PARSED_FIELDS}
+        fields['certifications'] = json.loads(row['certifications'] or "[]")
+        return SupplierRecord(**fields)
+
+    def _to_record(self, row):
+        record = self._supplier_record(row).to_dict()
+        record['id'] = row['id']
+        record['keyword'] = row['keyword']
+        record['scraped_at'] = row['scraped_at']
+        return record
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# Make the backend modules importable when run from any directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def app_client(tmp_path_factory):
+    """Flask test client of app.py, with every store in a temporary directory and no browsers started"""
+    os.environ["SCRAPER_DATA_DIR"] = str(tmp_path_factory.mktemp("data"))
+    os.environ["SCRAPER_WARM_UP"] = "0"
+    os.environ["SCRAPE_RESUME_JOBS"] = "0"
+    import app
+    return app.app.test_client()
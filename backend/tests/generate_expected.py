@@ -0,0 +1,62 @@
+"""
+Regenerate tests/fixtures/<page>.expected.json from a real browser run.
+
+Loads each fixture page in headless Chrome and extracts it in both browser modes: per-card
+WebDriver calls and BATCH_EXTRACT_SCRIPT. The records are written only if the two modes agree.
+test_page_parser.py then holds every extraction path, including the offline lxml parser, to
+these records. Run it after changing a fixture page:
+
+    python tests/generate_expected.py                  # every fixtures/*.html
+    python tests/generate_expected.py search_page.html
+
+Chrome is the one on PATH, or CHROME_BINARY; chromedriver is resolved as by the scraper
+(CHROMEDRIVER_PATH, the cached path, or a webdriver-manager download).
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+# Make the backend modules importable when run from any directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alibaba_scraper import AlibabaSupplierScraper
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def expected_path(page):
+    return page.with_name(page.stem + ".expected.json")
+
+
+def browser_records(scraper, page):
+    """Records of page as extracted in Chrome; raises if per-card and batch extraction disagree"""
+    scraper.driver.get(page.resolve().as_uri())
+    per_card = scraper.extract_supplier_data()
+    batch = scraper.extract_supplier_data_batch()
+    if per_card != batch:
+        raise SystemExit(f"{page.name}: per-card and batch extraction disagree, not writing expected records:\n"
+                         f"per_card={json.dumps(per_card, ensure_ascii=False, indent=2)}\n"
+                         f"batch={json.dumps(batch, ensure_ascii=False, indent=2)}")
+    return per_card # Key order of extract_card_info
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate fixture expectations from a real browser run")
+    parser.add_argument("pages", nargs="*", help="Fixture pages (default: every fixtures/*.html)")
+    args = parser.parse_args()
+
+    pages = [FIXTURES / name for name in args.pages] if args.pages else sorted(FIXTURES.glob("*.html"))
+    scraper = AlibabaSupplierScraper(headless=True, extraction_mode="per_card")
+    try:
+        for page in pages:
+            records = browser_records(scraper, page)
+            expected_path(page).write_text(json.dumps(records, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+            print(f"{expected_path(page).name}: {len(records)} records")
+    finally:
+        scraper.close(force=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Batch scheduling: breadth-first order across keywords and batches, cancellation."""
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from alibaba_scraper import AlibabaSupplierScraper
+from batches import BatchScheduler
+from jobs import CANCELLED, COMPLETED
+from supplier_record import SupplierRecord
+
+
+class FakeSite:
+    """Result pages of each keyword; loads of a (keyword, page) in blocked wait until released"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.loaded = []
+        self.blocked = {}
+        self._lock = threading.Lock()
+
+    def block(self, keyword, page_number):
+        started, release = threading.Event(), threading.Event()
+        self.blocked[keyword, page_number] = started, release
+        return started, release
+
+    def load(self, keyword, page_number):
+        with self._lock:
+            self.loaded.append((keyword, page_number))
+        if (keyword, page_number) in self.blocked:
+            started, release = self.blocked[keyword, page_number]
+            started.set()
+            assert release.wait(5)
+        if page_number > self.pages[keyword]:
+            return [], ()
+        suppliers = [{"product_title": f"{keyword} {page_number}-{n}",
+                      "product_url": f"https://www.alibaba.com/product-detail/{keyword}_{page_number}{n}.html"}
+                     for n in range(2)]
+        return suppliers, (f"{keyword} {page_number}",)
+
+
+class FakeScraper:
+    build_search_url = AlibabaSupplierScraper.build_search_url
+    build_page_url = staticmethod(AlibabaSupplierScraper.build_page_url)
+    base_url = "https://www.alibaba.com"
+
+    def __init__(self, site):
+        self.site = site
+
+    def scrape_page(self, url):
+        query = parse_qs(urlsplit(url).query)
+        return self.site.load(query["SearchText"][0], int(query.get("page", ["1"])[0]))
+
+
+class FakePool:
+    size = 1
+
+    def __init__(self, site, scraper_class=FakeScraper):
+        self.site = site
+        self.scraper_class = scraper_class
+
+    @contextmanager
+    def checkout(self, trace=None):
+        yield self.scraper_class(self.site)
+
+
+def store_page(keyword, page_number, suppliers, seen):
+    return [SupplierRecord.from_dict(supplier) for supplier in seen.filter(suppliers)]
+
+
+def wait_finished(batch):
+    deadline = time.monotonic() + 5
+    while not batch.finished:
+        assert time.monotonic() < deadline, batch.to_dict(include_data=False)
+        time.sleep(0.01)
+    return batch
+
+
+@pytest.fixture
+def site():
+    return FakeSite({"corn": 3, "soy": 1, "rice": 2, "wheat": 5})
+
+
+@pytest.fixture
+def scheduler(site):
+    scheduler = BatchScheduler(FakePool(site), store_page, workers=1)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def test_pages_are_fetched_breadth_first_across_keywords(scheduler, site):
+    batch = wait_finished(scheduler.submit([("corn", 3), ("soy", 3), ("rice", 2)]))
+
+    assert site.loaded == [("corn", 1), ("soy", 1), ("rice", 1), ("corn", 2), ("soy", 2), ("rice", 2), ("corn", 3)]
+    results = batch.to_dict()["results"]
+    assert {keyword: (task["status"], task["pages"]) for keyword, task in results.items()} == {
+        "corn": (COMPLETED, 3), "soy": (COMPLETED, 1), "rice": (COMPLETED, 2),
+    }
+    # Page 3 of soy was never needed: page 2 was already past its end
+    assert ("soy", 3) not in site.loaded
+
+
+def test_a_later_batch_does_not_wait_behind_an_earlier_one(scheduler, site):
+    started, release = site.block("wheat", 1)
+    first = scheduler.submit([("wheat", 4)])
+    assert started.wait(5)
+    second = scheduler.submit([("corn", 2)])
+    release.set()
+    wait_finished(first), wait_finished(second)
+
+    assert site.loaded == [("wheat", 1), ("corn", 1), ("wheat", 2), ("corn", 2), ("wheat", 3), ("wheat", 4)]
+
+
+def test_cancel_drops_queued_units_and_keeps_finished_pages(scheduler, site):
+    started, release = site.block("corn", 1)
+    batch = scheduler.submit([("soy", 1), ("corn", 3), ("rice", 2)])
+    assert started.wait(5) # soy is complete, corn page 1 is loading
+
+    assert scheduler.cancel(batch.id) is batch
+    release.set()
+    wait_finished(batch)
+
+    assert site.loaded == [("soy", 1), ("corn", 1)]
+    assert batch.status == CANCELLED
+    results = batch.to_dict()["results"]
+    assert (results["soy"]["status"], results["soy"]["suppliers"]) == (COMPLETED, 2)
+    # The page in flight when the batch was cancelled is kept
+    assert (results["corn"]["status"], results["corn"]["pages"]) == (CANCELLED, 1)
+    assert [record["product_title"] for record in results["corn"]["data"]] == ["corn 1-0", "corn 1-1"]
+    assert (results["rice"]["status"], results["rice"]["pages"]) == (CANCELLED, 0)
+
+
+def test_cancel_unknown_batch(scheduler):
+    assert scheduler.cancel("no-such-batch") is None
+
+
+def test_ignored_page_urls_continue_with_next_from_the_last_good_page(site):
+    class SequentialScraper(FakeScraper):
+        crawls = []
+        reached_last_page = True
+
+        def scrape_page(self, url):
+            suppliers, signature = super().scrape_page(url)
+            # The site shows page 1 for every page URL past page 2
+            if int(parse_qs(urlsplit(url).query).get("page", ["1"])[0]) > 2:
+                suppliers, signature = self.site.load("wheat", 1)
+            return suppliers, signature
+
+        def iter_supplier_pages(self, keyword, max_pages, start_page=1, resume_url=None, **kwargs):
+            self.crawls.append((start_page, parse_qs(urlsplit(resume_url).query).get("page")))
+            for page_number in range(start_page, max_pages + 1):
+                yield page_number, [{"product_title": f"{keyword} {page_number} by Next"}]
+
+    scheduler = BatchScheduler(FakePool(site, SequentialScraper), store_page, workers=1)
+    try:
+        batch = wait_finished(scheduler.submit([("wheat", 4)]))
+    finally:
+        scheduler.shutdown()
+
+    assert SequentialScraper.crawls == [(3, ["2"])]
+    titles = [record["product_title"] for record in batch.to_dict()["results"]["wheat"]["data"]]
+    assert titles == ["wheat 1-0", "wheat 1-1", "wheat 2-0", "wheat 2-1", "wheat 3 by Next", "wheat 4 by Next"]
@@ -0,0 +1,164 @@
+"""Crawl checkpoints: torn-line recovery, resuming, and resumed crawls on a site that ignores page URLs."""
+import json
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from alibaba_scraper import AlibabaSupplierScraper
+from checkpoints import CheckpointStore
+
+
+def records(page_number):
+    return [{"product_title": f"Product {page_number}-{n}",
+             "product_url": f"https://www.alibaba.com/product-detail/p_{page_number}{n}.html"} for n in range(2)]
+
+
+def titles(pages):
+    return [[record.product_title for record in page_records] for _, page_records in pages]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckpointStore(str(tmp_path / "checkpoints"), fsync=False)
+
+
+def test_checkpoint_reloads_after_a_restart(store):
+    checkpoint = store.open("job1", "corn", 4, {"enrich": False})
+    checkpoint.append(1, records(1), next_url="https://www.alibaba.com/?page=2", signature=["page 1"])
+    checkpoint.append(2, records(2), next_url="https://www.alibaba.com/?page=3")
+    store.release("job1")
+
+    reloaded = CheckpointStore(store.directory, fsync=False).open("job1", "corn", 4)
+    assert (reloaded.last_page, reloaded.next_url, reloaded.first_signature) == (2, "https://www.alibaba.com/?page=3", ("page 1",))
+    assert reloaded.options == {"enrich": False}
+    assert titles(reloaded.pages()) == [["Product 1-0", "Product 1-1"], ["Product 2-0", "Product 2-1"]]
+    with pytest.raises(ValueError):
+        reloaded.append(4, records(4))
+
+
+def test_torn_last_line_is_truncated(store):
+    checkpoint = store.open("job1", "corn", 4)
+    checkpoint.append(1, records(1))
+    checkpoint.append(2, records(2))
+    store.release("job1")
+    path = store._path("job1")
+    with open(path, "rb") as f:
+        intact = f.read()
+    # A crash while page 3 was being written
+    with open(path, "ab") as f:
+        f.write(b'{"type":"page","page":3,"records":[{"product_ti')
+
+    resumed = CheckpointStore(store.directory, fsync=False).open("job1", "corn", 4)
+    assert resumed.last_page == 2
+    with open(path, "rb") as f:
+        assert f.read() == intact
+    # Appends continue on a clean line
+    resumed.append(3, records(3))
+    store.release("job1")
+    assert CheckpointStore(store.directory, fsync=False).get("job1").last_page == 3
+
+
+def test_lines_that_do_not_continue_the_crawl_are_dropped(store):
+    checkpoint = store.open("job1", "corn", 5)
+    checkpoint.append(1, records(1))
+    store.release("job1")
+    with open(store._path("job1"), "ab") as f:
+        for page_number in (3, 2): # A page out of order, then everything after it
+            f.write((json.dumps({"type": "page", "page": page_number, "records": records(page_number)}) + "\n").encode())
+
+    assert CheckpointStore(store.directory, fsync=False).get("job1").last_page == 1
+
+
+def test_a_checkpoint_for_another_crawl_starts_over(store):
+    checkpoint = store.open("job1", "corn", 4)
+    checkpoint.append(1, records(1))
+    store.release("job1")
+
+    assert store.open("job1", "wheat", 4).last_page == 0
+    assert store.get("job1").keyword == "wheat"
+
+
+def test_pending_skips_finished_and_failed_crawls(store):
+    for crawl_id in ("running", "failed", "exhausted", "complete"):
+        store.open(crawl_id, "corn", 2).append(1, records(1))
+    store.get("failed").mark(error="browser crashed")
+    store.get("exhausted").mark(reached_last_page=True)
+    store.get("complete").append(2, records(2))
+    for crawl_id in ("running", "failed", "exhausted", "complete"):
+        store.release(crawl_id)
+
+    assert [checkpoint.crawl_id for checkpoint in store.pending()] == ["running"]
+    store.discard("running")
+    assert store.get("running") is None
+
+
+class IgnoredPageSite:
+    """Page URLs past honoured_pages show page 1; the Next button always works"""
+
+    def __init__(self, honoured_pages):
+        self.honoured_pages = honoured_pages
+        self.next_button_crawls = []
+
+
+class FakeScraper:
+    build_search_url = AlibabaSupplierScraper.build_search_url
+    build_page_url = staticmethod(AlibabaSupplierScraper.build_page_url)
+    base_url = "https://www.alibaba.com"
+
+    def __init__(self, site):
+        self.site = site
+        self.first_page_signature = None
+        self.reached_last_page = False
+        self.crawl_error = None
+
+    def scrape_page(self, url):
+        page_number = int(parse_qs(urlsplit(url).query).get("page", ["1"])[0])
+        if page_number > self.site.honoured_pages:
+            page_number = 1
+        return records(page_number), (f"page {page_number}",)
+
+    def iter_supplier_pages(self, keyword, max_pages=3, stop_event=None, pagination=None, start_page=1,
+                            first_signature=None, resume_url=None):
+        # Like the scraper: a start page showing page 1 again is reached with the Next button
+        _, signature = self.scrape_page(resume_url or self.build_page_url(self.build_search_url(keyword), start_page))
+        by_next = resume_url is not None or (first_signature is not None and signature == tuple(first_signature))
+        if by_next:
+            self.site.next_button_crawls.append(start_page)
+        for page_number in range(start_page, max_pages + 1):
+            if by_next or page_number <= self.site.honoured_pages:
+                yield page_number, records(page_number)
+            else:
+                yield page_number, records(1)
+
+
+class FakePool:
+    size = 2
+
+    def __init__(self, site):
+        self.site = site
+
+    @contextmanager
+    def checkout(self, trace=None):
+        yield FakeScraper(self.site)
+
+
+@pytest.mark.parametrize("parallel_pages", [1, 2])
+def test_resumed_crawl_notices_ignored_page_urls(app_client, monkeypatch, tmp_path, parallel_pages):
+    import app
+    site = IgnoredPageSite(honoured_pages=2)
+    monkeypatch.setattr(app, "scraper_pool", FakePool(site))
+    monkeypatch.setattr(app, "PARALLEL_PAGES", parallel_pages)
+    store = CheckpointStore(str(tmp_path / "checkpoints"), fsync=False)
+    keyword = f"ignored page urls {parallel_pages}"
+    # The first attempt got through page 2 before failing
+    checkpoint = store.open("job1", keyword, 4)
+    checkpoint.append(1, records(1), signature=("page 1",))
+    checkpoint.append(2, records(2))
+
+    pages = list(app.crawl_search_pages(keyword, 4, checkpoint=checkpoint))
+
+    # Page 3's URL showed page 1: pages 3 and 4 came from the Next button, not page 1 again
+    assert site.next_button_crawls == [3]
+    assert [titles([page])[0][0] for page in pages] == ["Product 1-0", "Product 2-0", "Product 3-0", "Product 4-0"]
+    assert checkpoint.last_page == 4
@@ -0,0 +1,118 @@
+"""Listing identity (canonical URLs, DedupIndex) and snapshot diffs."""
+import pytest
+
+from dedup import DedupIndex, canonical_url, record_key, seen_fraction
+from snapshots import SnapshotStore
+from supplier_record import SupplierRecord
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("//www.alibaba.com/product-detail/x_1.html?spm=a2700&s=p#top", "https://alibaba.com/product-detail/x_1.html"),
+    ("http://WWW.Alibaba.com/product-detail/x_1.html/", "https://alibaba.com/product-detail/x_1.html"),
+    ("https://alibaba.com/product-detail/x_1.html?utm_source=mail&SPM=b", "https://alibaba.com/product-detail/x_1.html"),
+    ("https://foo.en.alibaba.com/profile.html?b=2&a=1&from=x", "https://foo.en.alibaba.com/profile.html?a=1&b=2"),
+    ("  https://alibaba.com  ", "https://alibaba.com/"),
+    ("N/A", None),
+    ("", None),
+    (None, None),
+])
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+
+
+def supplier(n, price="US$100", url=None, company_url=None):
+    return SupplierRecord.from_dict({
+        "product_title": f"Product {n}",
+        "product_url": url if url is not None else f"https://www.alibaba.com/product-detail/p_{n}.html",
+        "price": price,
+        "company_name": f"Company {n}",
+        "company_url": company_url if company_url is not None else f"https://c{n}.en.alibaba.com/",
+    })
+
+
+def test_record_key_ignores_tracking_links():
+    tracked = {"product_url": "//alibaba.com/product-detail/p_1.html?spm=x", "company_url": "https://c1.en.alibaba.com"}
+    assert record_key(tracked) == record_key(supplier(1))
+    # Same product sold by another company is another listing
+    assert record_key(supplier(1, company_url="https://other.en.alibaba.com/")) != record_key(supplier(1))
+
+
+def test_record_key_without_a_product_url_uses_title_and_company():
+    assert record_key(supplier(1, url="N/A")) == "Product 1|Company 1"
+
+
+def test_dedup_index_drops_repeats_across_pages():
+    index = DedupIndex()
+    page_1 = [supplier(1), supplier(2), supplier(1, url="https://alibaba.com/product-detail/p_1.html?s=p")]
+    page_2 = [supplier(2), supplier(3)]
+
+    assert [record.product_title for record in index.filter(page_1)] == ["Product 1", "Product 2"]
+    assert [record.product_title for record in index.filter(page_2)] == ["Product 3"]
+    assert len(index) == 3 and index.duplicates == 2
+    assert not index.add(supplier(3))
+
+
+def test_seen_fraction():
+    keys = {record_key(supplier(1)), record_key(supplier(2))}
+    assert seen_fraction([supplier(1), supplier(2), supplier(3), supplier(4)], keys) == 0.5
+    assert seen_fraction([], keys) == 0.0
+
+
+@pytest.fixture
+def snapshots(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.sqlite3"))
+    yield store
+    store.close()
+
+
+def titles(records):
+    return sorted(record["product_title"] for record in records)
+
+
+def test_first_snapshot_reports_everything_new(snapshots):
+    diff = snapshots.update("Corn", [supplier(1), supplier(2), supplier(1)], pages=1)
+
+    assert titles(diff["new"]) == ["Product 1", "Product 2"]
+    assert diff["removed"] == [] and diff["price_changed"] == [] and diff["unchanged"] == 0
+    assert diff["removals_checked"] is False and diff["previous_snapshot_at"] is None
+    assert snapshots.known_keys(" corn ") == {record_key(supplier(1)), record_key(supplier(2))}
+    assert snapshots.info("corn")["records"] == 2
+
+
+def test_diff_reports_new_removed_and_price_changes(snapshots):
+    snapshots.update("corn", [supplier(1), supplier(2), supplier(3)], pages=2)
+    diff = snapshots.update("corn", [supplier(1), supplier(2, price="US$ 90"), supplier(4)], pages=2)
+
+    assert titles(diff["new"]) == ["Product 4"]
+    assert titles(diff["removed"]) == ["Product 3"]
+    assert [(record["product_title"], record["previous_price"]) for record in diff["price_changed"]] == [("Product 2", "US$100")]
+    assert diff["unchanged"] == 1
+    assert diff["removals_checked"] is True
+    # Removed listings are dropped from the snapshot
+    assert record_key(supplier(3)) not in snapshots.known_keys("corn")
+
+
+def test_price_whitespace_is_not_a_change(snapshots):
+    snapshots.update("corn", [supplier(1, price="US$100 - 120")], pages=1)
+    diff = snapshots.update("corn", [supplier(1, price=" US$100  -  120 ")], pages=1)
+    assert diff["price_changed"] == [] and diff["unchanged"] == 1
+
+
+def test_shorter_crawl_does_not_report_removals(snapshots):
+    snapshots.update("corn", [supplier(1), supplier(2), supplier(3)], pages=3)
+    diff = snapshots.update("corn", [supplier(1), supplier(4)], pages=1)
+
+    assert diff["removed"] == [] and diff["removals_checked"] is False
+    assert titles(diff["new"]) == ["Product 4"]
+    # Listings it could not check stay in the snapshot, which still covers 3 pages
+    assert len(snapshots.known_keys("corn")) == 4
+    assert snapshots.info("corn")["pages"] == 3
+
+
+def test_crawl_reaching_the_last_page_reports_removals(snapshots):
+    snapshots.update("corn", [supplier(1), supplier(2), supplier(3)], pages=3)
+    diff = snapshots.update("corn", [supplier(1)], pages=1, exhaustive=True)
+
+    assert titles(diff["removed"]) == ["Product 2", "Product 3"]
+    info = snapshots.info("corn")
+    assert (info["pages"], info["records"]) == (1, 1)
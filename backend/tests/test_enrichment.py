@@ -0,0 +1,104 @@
+"""Company URLs reaching CompanyEnricher come from callers: only allowlisted https hosts are fetched."""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from enrichment import CompanyEnricher
+
+PROFILE_HTML = b"<html><body><table><tr><th>Year Established</th><td>2010</td></tr></table></body></html>"
+
+
+class ProfileHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/profile":
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(PROFILE_HTML)))
+            self.end_headers()
+            self.wfile.write(PROFILE_HTML)
+        else:
+            # Same server under a host name that is not allowed
+            self.send_response(302)
+            self.send_header("Location", f"http://localhost:{self.server.server_port}/profile")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def profile_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ProfileHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+class NoRequests:
+    def request(self, *args, **kwargs):
+        raise AssertionError("rejected URLs must not be fetched")
+
+    def clear(self):
+        pass
+
+
+@pytest.mark.parametrize("url", [
+    "http://169.254.169.254/latest/meta-data/",
+    "https://127.0.0.1:6379/",
+    "https://metadata.google.internal/computeMetadata/v1/",
+    "http://wylfoods.en.alibaba.com/company_profile.html", # http is not allowed by default
+    "ftp://wylfoods.en.alibaba.com/company_profile.html",
+    "file:///etc/passwd",
+    "https://alibaba.com.example.net/company_profile.html",
+    "https://evilalibaba.com/company_profile.html",
+])
+def test_profile_rejects_urls_off_the_allowlist(url):
+    enricher = CompanyEnricher(workers=1)
+    enricher.http = NoRequests()
+    try:
+        profile = enricher.profile(url).result(timeout=5)
+    finally:
+        enricher.close()
+    assert "not allowed" in profile["error"]
+
+
+def test_profile_accepts_alibaba_subdomains():
+    enricher = CompanyEnricher(workers=1)
+    try:
+        enricher.check_url("https://wylfoods.en.alibaba.com/company_profile.html")
+        enricher.check_url("https://alibaba.com/company_profile.html")
+        assert enricher.profile("N/A").result() is None
+        assert enricher.profile(5).result() is None
+    finally:
+        enricher.close()
+
+
+def test_profile_fetches_configured_hosts_only(profile_server):
+    enricher = CompanyEnricher(workers=1, retries=0, allowed_hosts=("127.0.0.1",), allow_http=True)
+    try:
+        assert enricher.profile(f"{profile_server}/profile").result(timeout=10)["year_established"] == 2010
+        # A redirect to a host off the allowlist is not followed
+        assert "not allowed" in enricher.profile(f"{profile_server}/redirect").result(timeout=10)["error"]
+    finally:
+        enricher.close()
+
+    enricher = CompanyEnricher(workers=1, allowed_hosts=("127.0.0.1",))
+    try:
+        assert "not allowed" in enricher.profile(f"{profile_server}/profile").result(timeout=10)["error"]
+    finally:
+        enricher.close()
+
+
+def test_enrich_endpoint_rejects_non_string_company_url(app_client):
+    response = app_client.post("/enrich", json={"data": [{"company_url": "https://x.en.alibaba.com/"}, {"company_url": 5}]})
+    assert response.status_code == 400
+    assert "company_url" in response.get_json()["error"]
+
+
+def test_enrich_endpoint_does_not_fetch_internal_urls(app_client):
+    response = app_client.post("/enrich", json={"data": [{"company_url": "http://169.254.169.254/latest/meta-data/"}]})
+    assert response.status_code == 200
+    assert "not allowed" in response.get_json()["data"][0]["company_profile"]["error"]
@@ -0,0 +1,34 @@
+"""Stage instrumentation: nested stages in a request trace."""
+import time
+
+from metrics import Instrumentation, RequestTrace
+
+
+class FakeDriver:
+    def execute(self, driver_command, params=None):
+        return {"value": None}
+
+
+def test_stage_totals_count_nested_stages_towards_the_outermost():
+    instrumentation = Instrumentation()
+    driver = instrumentation.wrap_driver(FakeDriver())
+    instrumentation.trace = trace = RequestTrace()
+
+    with instrumentation.stage("navigation"):
+        driver.execute("get")
+        time.sleep(0.01)
+    with instrumentation.stage("pagination"):
+        driver.execute("findElement")
+        with instrumentation.stage("navigation"):
+            driver.execute("get")
+            time.sleep(0.02)
+    driver.execute("getTitle") # Outside any stage
+
+    assert [(span["stage"], span["depth"]) for span in trace.spans] == [
+        ("navigation", 0), ("navigation", 1), ("pagination", 0)]
+    totals = trace.stage_totals()
+    assert {stage: stats["webdriver_calls"] for stage, stats in totals.items()} == {"navigation": 1, "pagination": 2}
+    assert 0.01 <= totals["navigation"]["seconds"] < 0.02 <= totals["pagination"]["seconds"]
+    assert instrumentation.webdriver_calls == 4
+    # The per-stage view of the trace still counts every span
+    assert trace.to_dict()["stages"]["navigation"]["count"] == 2
@@ -0,0 +1,60 @@
+"""Per-host politeness: navigation pacing (per pooled browser) and the concurrency cap."""
+import threading
+import time
+
+from driver_pool import ScraperPool
+from waits import HostLimiter, HostPacer
+
+
+def test_pacer_spaces_out_navigations_to_a_host():
+    pacer = HostPacer(min_interval=0.2, jitter=0)
+    assert pacer.wait("https://www.alibaba.com/trade/search?page=1") == 0
+    assert 0.15 < pacer.wait("https://www.alibaba.com/trade/search?page=2") <= 0.2
+    # Other hosts are not held up
+    assert pacer.wait("https://wylfoods.en.alibaba.com/") == 0
+
+
+def test_pooled_browsers_are_paced_independently():
+    pool = ScraperPool(size=2, lazy=True, pacer_factory=lambda: HostPacer(min_interval=0.5, jitter=0))
+    scrapers = [pool._factory(), pool._factory()]
+    assert scrapers[0].pacer is not scrapers[1].pacer
+
+    for scraper in scrapers:
+        scraper.pace("https://www.alibaba.com/trade/search?page=1")
+    start = time.monotonic()
+    threads = [threading.Thread(target=scraper.pace, args=(f"https://www.alibaba.com/trade/search?page={n}",))
+               for n, scraper in enumerate(scrapers, start=2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Both browsers load their next page after one interval, not one after the other
+    assert time.monotonic() - start < 0.9
+
+
+def test_limiter_caps_concurrent_fetches_per_host():
+    limiter = HostLimiter(limit=2)
+    active, peak, lock = {}, {}, threading.Lock()
+
+    def fetch(host):
+        with limiter.slot(host):
+            with lock:
+                active[host] = active.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), active[host])
+            time.sleep(0.05)
+            with lock:
+                active[host] -= 1
+
+    threads = [threading.Thread(target=fetch, args=(host,))
+               for host in ["www.alibaba.com"] * 5 + ["wylfoods.en.alibaba.com"] * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == {"www.alibaba.com": 2, "wylfoods.en.alibaba.com": 2}
+
+
+def test_limiter_without_a_limit_does_not_block():
+    limiter = HostLimiter()
+    with limiter.slot("www.alibaba.com"), limiter.slot("www.alibaba.com"):
+        pass
@@ -0,0 +1,94 @@
+"""Parallel page crawl: detecting a site that ignores page URLs and the Next-button fallback."""
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlsplit
+
+from alibaba_scraper import AlibabaSupplierScraper
+from page_crawl import ParallelPageCrawl
+
+
+def results(page_number):
+    return [{"product_title": f"Product {page_number}"}]
+
+
+class FakeScraper:
+    """Serves a site whose page URLs work up to honoured_pages and show page 1 after that"""
+
+    build_search_url = AlibabaSupplierScraper.build_search_url
+    build_page_url = staticmethod(AlibabaSupplierScraper.build_page_url)
+    base_url = "https://www.alibaba.com"
+
+    def __init__(self, site):
+        self.site = site
+        self.reached_last_page = False
+        self.crawl_error = None
+
+    def scrape_page(self, url):
+        page_number = int(parse_qs(urlsplit(url).query).get("page", ["1"])[0])
+        self.site.loaded.append(page_number)
+        if page_number > self.site.honoured_pages:
+            page_number = 1
+        return results(page_number), (f"page {page_number}",)
+
+    def iter_supplier_pages(self, keyword, max_pages, stop_event=None, pagination=None, start_page=1, **kwargs):
+        self.site.button_crawls.append(dict(kwargs, start_page=start_page, pagination=pagination))
+        for page_number in range(start_page, max_pages + 1):
+            yield page_number, results(page_number)
+        self.reached_last_page = True
+
+
+class FakePool:
+    size = 3
+
+    def __init__(self, honoured_pages):
+        self.honoured_pages = honoured_pages
+        self.loaded = []
+        self.button_crawls = []
+
+    @contextmanager
+    def checkout(self, trace=None):
+        yield FakeScraper(self)
+
+
+def test_falls_back_from_the_last_page_whose_url_worked():
+    pool = FakePool(honoured_pages=3)
+    crawl = ParallelPageCrawl(pool, "corn", max_pages=6, workers=3)
+    pages = list(crawl)
+
+    assert pages == [(page_number, results(page_number)) for page_number in range(1, 7)]
+    assert crawl.reached_last_page
+    assert crawl.first_signature == ("page 1",)
+    # Page 4 repeated page 1: one Next-button crawl, resuming from page 3's URL
+    [fallback] = pool.button_crawls
+    assert fallback["start_page"] == 4 and fallback["pagination"] == "button"
+    assert parse_qs(urlsplit(fallback["resume_url"]).query)["page"] == ["3"]
+
+
+def test_resumed_crawl_checks_pages_against_the_stored_first_signature():
+    pool = FakePool(honoured_pages=4)
+    crawl = ParallelPageCrawl(pool, "corn", max_pages=6, workers=3, start_page=3, first_signature=["page 1"])
+    pages = list(crawl)
+
+    # Page 5 showed page 1, which this crawl never loaded itself
+    assert [page_number for page_number, _ in pages] == [3, 4, 5, 6]
+    assert pages[2] == (5, results(5))
+    [fallback] = pool.button_crawls
+    assert fallback["start_page"] == 5
+    assert parse_qs(urlsplit(fallback["resume_url"]).query)["page"] == ["4"]
+
+
+def test_resumed_first_page_showing_page_1_clicks_through_from_page_1():
+    pool = FakePool(honoured_pages=1)
+    crawl = ParallelPageCrawl(pool, "corn", max_pages=5, workers=2, start_page=3, first_signature=["page 1"])
+
+    assert [page_number for page_number, _ in crawl] == [3, 4, 5]
+    [fallback] = pool.button_crawls
+    assert fallback == {"start_page": 3, "pagination": "button", "first_signature": ("page 1",)}
+
+
+def test_pages_whose_urls_work_need_no_fallback():
+    pool = FakePool(honoured_pages=10)
+    crawl = ParallelPageCrawl(pool, "corn", max_pages=4, workers=2)
+
+    assert [page_number for page_number, _ in crawl] == [1, 2, 3, 4]
+    assert pool.button_crawls == []
+    assert sorted(pool.loaded) == [1, 2, 3, 4]
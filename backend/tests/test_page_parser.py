@@ -0,0 +1,164 @@
+"""
+Extraction parity on a saved search results page.
+
+tests/fixtures/search_page.html is a trimmed results page; search_page.expected.json holds the
+records headless Chrome extracts from it (written by tests/generate_expected.py). The three
+extraction paths must all produce exactly those records:
+- BATCH_EXTRACT_SCRIPT ("batch" mode) and extract_card_info ("per_card" mode) in Chrome
+- page_parser.parse_search_page ("page_source" mode), on the page source from Chrome and offline
+  on the saved file
+- extract_card_info offline, on lxml-backed stand-ins for WebElements
+
+The browser tests are required: without Chrome (on PATH or CHROME_BINARY) they fail, unless
+SKIP_BROWSER_TESTS=1 skips them explicitly.
+"""
+import inspect
+import json
+import os
+import re
+import shutil
+import sys
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+import lxml.html
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+# Make the backend modules importable when run from any directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alibaba_scraper import BATCH_EXTRACT_SCRIPT, CARD_SELECTOR, AlibabaSupplierScraper
+from page_parser import parse_card, parse_search_file, parse_search_page, rendered_text
+
+FIXTURES = Path(__file__).parent / "fixtures"
+PAGE = FIXTURES / "search_page.html"
+BASE_URL = "https://www.alibaba.com/" # The fixture's <base href>
+
+# The CSS selectors extract_card_info uses, written as XPath for the lxml-backed elements
+CSS_AS_XPATH = {
+    CARD_SELECTOR: "//*[contains(concat(' ', @class, ' '), ' fy23-search-card ') and contains(concat(' ', @class, ' '), ' searchx-offer-item ')]",
+    "h2.search-card-e-title a span": ".//h2[contains(concat(' ', @class, ' '), ' search-card-e-title ')]//a//span",
+    ".search-card-e-price-main": ".//*[contains(concat(' ', @class, ' '), ' search-card-e-price-main ')]",
+    "a.search-card-e-company": ".//a[contains(concat(' ', @class, ' '), ' search-card-e-company ')]",
+    ".search-card-e-supplier__year span:last-of-type": ".//*[contains(concat(' ', @class, ' '), ' search-card-e-supplier__year ')]//span[not(following-sibling::span)]",
+    ".search-card-m-sale-features__item": ".//*[contains(concat(' ', @class, ' '), ' search-card-m-sale-features__item ')]",
+    ".search-card-e-icon__certification-wrapper img": ".//*[contains(concat(' ', @class, ' '), ' search-card-e-icon__certification-wrapper ')]//img",
+    ".enhance-certs___certification-wrapper.certified": ".//*[contains(concat(' ', @class, ' '), ' enhance-certs___certification-wrapper ') and contains(concat(' ', @class, ' '), ' certified ')]",
+    ".search-card-e-review": ".//*[contains(concat(' ', @class, ' '), ' search-card-e-review ')]",
+}
+
+
+class LxmlElement:
+    """The part of Selenium's WebElement API extract_card_info uses, over a parsed element"""
+
+    def __init__(self, element):
+        self.element = element
+
+    def find_elements(self, by, value):
+        xpath = value if by == By.XPATH else CSS_AS_XPATH[value]
+        return [LxmlElement(match) for match in self.element.xpath(xpath)]
+
+    def find_element(self, by, value):
+        matches = self.find_elements(by, value)
+        if not matches:
+            raise NoSuchElementException(value)
+        return matches[0]
+
+    @property
+    def text(self):
+        return rendered_text(self.element)
+
+    def get_attribute(self, name):
+        value = self.element.get(name)
+        # Like the browser's element.href property: resolved against the page's base URL
+        return urljoin(BASE_URL, value.strip()) if name == "href" and value is not None else value
+
+
+@pytest.fixture(scope="module")
+def expected():
+    with open(FIXTURES / "search_page.expected.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def scraper():
+    return AlibabaSupplierScraper(lazy=True, extraction_mode="per_card")
+
+
+def test_parse_search_page_matches_expected_records(expected):
+    assert parse_search_file(PAGE) == expected
+    assert parse_search_page(PAGE.read_text(encoding="utf-8")) == expected
+
+
+def test_extract_card_info_matches_parser(scraper, expected):
+    document = lxml.html.fromstring(PAGE.read_bytes())
+    cards = [LxmlElement(card) for card in document.xpath(CSS_AS_XPATH[CARD_SELECTOR])]
+    assert [scraper.extract_card_info(card) for card in cards] == expected
+
+
+def test_nested_links_resolve_to_the_title_link(scraper):
+    # lxml keeps markup-nested links nested, as the DOM the live site builds from script
+    card = lxml.html.fragment_fromstring(
+        '<div class="fy23-search-card searchx-offer-item"><a href="/card-link"><div>'
+        '<h2 class="search-card-e-title"><a href="/title-link"><span>Title</span></a></h2>'
+        '</div></a></div>'
+    )
+    assert [link.get("href") for link in card.xpath(".//span/ancestor::a")] == ["/card-link", "/title-link"]
+    assert parse_card(card, BASE_URL)["product_url"] == BASE_URL + "title-link"
+    assert scraper.extract_card_info(LxmlElement(card))["product_url"] == BASE_URL + "title-link"
+
+
+def test_batch_script_uses_extract_card_info_selectors():
+    selectors = set(re.findall(r'By\.CSS_SELECTOR, "([^"]+)"', inspect.getsource(AlibabaSupplierScraper.extract_card_info)))
+    # A selector added to extract_card_info needs its XPath above (and its counterpart in the script)
+    assert selectors == set(CSS_AS_XPATH) - {CARD_SELECTOR}
+    for selector in selectors:
+        assert f"'{selector}'" in BATCH_EXTRACT_SCRIPT, f"BATCH_EXTRACT_SCRIPT does not query {selector!r}"
+
+
+def _chrome_installed():
+    if os.environ.get("CHROME_BINARY"):
+        return os.path.isfile(os.environ["CHROME_BINARY"])
+    return any(shutil.which(name) for name in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"))
+
+
+@pytest.fixture(scope="module")
+def browser():
+    """A headless Chrome scraper with the fixture page loaded"""
+    if os.environ.get("SKIP_BROWSER_TESTS", "").strip().lower() in ("1", "true", "yes", "on"):
+        pytest.skip("SKIP_BROWSER_TESTS is set")
+    if not _chrome_installed():
+        pytest.fail("Chrome is required for the extraction parity tests: install it or set CHROME_BINARY "
+                    "(and CHROMEDRIVER_PATH), or set SKIP_BROWSER_TESTS=1 to skip them")
+    scraper = AlibabaSupplierScraper(headless=True, extraction_mode="per_card")
+    try:
+        scraper.driver.get(PAGE.resolve().as_uri())
+        yield scraper
+    finally:
+        scraper.close(force=True)
+
+
+def test_batch_script_matches_expected_records(browser, expected):
+    # Called directly: extract_supplier_data would fall back to per-card extraction if the script failed
+    assert browser.extract_supplier_data_batch() == expected
+
+
+def test_browser_per_card_extraction_matches_expected_records(browser, expected):
+    assert browser.extract_supplier_data() == expected
+
+
+def test_parser_on_browser_page_source_matches_expected_records(browser, expected):
+    assert browser.extract_supplier_data_from_source() == expected
+
+
+def test_batch_script_picks_the_innermost_link(browser):
+    # The fixture's last card has its title link inside a card-wide link (built by script)
+    hrefs = browser.driver.execute_script(
+        "const span = document.querySelectorAll(arguments[0])[3].querySelector('h2.search-card-e-title a span');"
+        "const links = []; for (let el = span; el; el = el.parentElement) if (el.tagName === 'A') links.push(el.href);"
+        "return links;", CARD_SELECTOR)
+    assert [urlsplit(href).query for href in hrefs] == ["from=title", "from=card"]
+    assert browser.extract_supplier_data_batch()[3]["product_url"] == hrefs[0]
+    assert browser.extract_supplier_data()[3]["product_url"] == hrefs[0]
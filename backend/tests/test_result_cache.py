@@ -0,0 +1,128 @@
+"""Result page cache: lookups, TTL and stale serving, eviction."""
+import json
+
+import pytest
+
+import result_cache
+from result_cache import ResultCache
+
+
+def records(page_number, size=1):
+    return [{"product_title": f"Product {page_number}", "notes": "x" * size}]
+
+
+def test_no_size_cap_keeps_every_page(tmp_path):
+    # SCRAPE_CACHE_MAX_MB set but empty
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"), max_bytes=None)
+    for page_number in range(1, 6):
+        cache.put("corn", page_number, records(page_number, size=10_000))
+
+    assert cache.stats()["evictions"] == 0
+    assert cache.stats()["entries"] == 5
+    assert cache.lookup("corn", 5) == ([(n, records(n, size=10_000)) for n in range(1, 6)], False)
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return ResultCache(str(tmp_path / "cache.sqlite3"), ttl=100, stale_ttl=1000)
+
+
+def test_lookup_needs_every_page_up_to_max_pages(cache):
+    cache.put("Corn Grain", 1, records(1))
+    cache.put("Corn Grain", 2, records(2))
+
+    # Keywords are normalized
+    assert cache.lookup("  corn   GRAIN ", 2) == ([(1, records(1)), (2, records(2))], False)
+    assert cache.lookup("corn grain", 1) == ([(1, records(1))], False)
+    assert cache.lookup("corn grain", 3) is None
+    assert cache.lookup("wheat", 1) is None
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2
+
+
+def test_lookup_skips_a_missing_page(cache):
+    cache.put("corn", 1, records(1))
+    cache.put("corn", 3, records(3))
+    assert cache.lookup("corn", 3) is None
+
+
+def test_last_page_answers_longer_crawls(cache):
+    cache.put("corn", 1, records(1))
+    cache.put("corn", 2, records(2))
+    cache.mark_last("corn", 2)
+    assert cache.lookup("corn", 5) == ([(1, records(1)), (2, records(2))], False)
+
+    # A page crawled later past the old end moves the marker
+    cache.put("corn", 3, records(3), is_last=True)
+    cache.mark_last("corn", 3)
+    assert [page for page, _ in cache.lookup("corn", 5)[0]] == [1, 2, 3]
+
+
+def test_expired_pages_are_served_only_as_stale(cache, clock):
+    cache.put("corn", 1, records(1))
+    clock.now += 150 # Past the TTL, within the stale window
+
+    assert cache.lookup("corn", 1) is None
+    assert cache.lookup("corn", 1, allow_stale=True) == ([(1, records(1))], True)
+    assert cache.stats()["stale_hits"] == 1
+
+    clock.now += 1000 # Past the stale window too
+    assert cache.lookup("corn", 1, allow_stale=True) is None
+
+
+def test_one_stale_page_makes_the_lookup_stale(cache, clock):
+    cache.put("corn", 1, records(1))
+    clock.now += 150
+    cache.put("corn", 2, records(2))
+    assert cache.lookup("corn", 2, allow_stale=True)[1] is True
+
+
+def test_pages_past_the_stale_window_are_evicted_on_write(cache, clock):
+    cache.put("corn", 1, records(1))
+    clock.now += 1200
+    cache.put("wheat", 1, records(1))
+
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_least_recently_used_pages_are_evicted_over_the_size_limit(tmp_path, clock):
+    size = len(json.dumps(records(1, size=1000), separators=(',', ':')))
+    cache = ResultCache(str(tmp_path / "cache.sqlite3"), max_bytes=2 * size)
+    cache.put("corn", 1, records(1, size=1000))
+    clock.now += 1
+    cache.put("wheat", 1, records(1, size=1000))
+    clock.now += 1
+    assert cache.lookup("corn", 1) # corn is now the most recently used
+    clock.now += 1
+    cache.put("rice", 1, records(1, size=1000))
+
+    assert cache.lookup("wheat", 1) is None
+    assert cache.lookup("corn", 1) and cache.lookup("rice", 1)
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size_bytes"] <= 2 * size
+
+
+def test_invalidate(cache):
+    cache.put("corn", 1, records(1))
+    cache.put("corn", 2, records(2))
+    cache.put("wheat", 1, records(1))
+
+    assert cache.invalidate(" Corn ") == 2
+    assert cache.lookup("corn", 1) is None
+    assert cache.invalidate() == 1
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,96 @@
+"""Full-text supplier search: BM25 ranking, prefix matches, re-indexing."""
+import pytest
+
+from search_index import SupplierIndex, tokenize
+from supplier_record import SupplierRecord
+
+
+def supplier(n, title, company="Trading Co", location="CN Supplier", certifications=()):
+    return SupplierRecord.from_dict({
+        "product_title": title,
+        "product_url": f"https://www.alibaba.com/product-detail/p_{n}.html",
+        "company_name": company,
+        "company_url": f"https://c{n}.en.alibaba.com/",
+        "location_search_page": location,
+        "certifications": list(certifications),
+    })
+
+
+def titles(hits):
+    return [record.product_title for _, _, record, _ in hits]
+
+
+@pytest.fixture
+def index():
+    index = SupplierIndex()
+    index.add("corn grain", [
+        supplier(1, "Yellow Corn Grain for Animal Feed"),
+        supplier(2, "White Maize Non-GMO", company="Yellowstone Foods"),
+        supplier(3, "Dried Yellow Corn", location="US Supplier", certifications=["ISO 9001"]),
+        supplier(4, "Corn Gluten Meal"),
+    ], scraped_at=1.0)
+    index.add("soybean", [supplier(5, "Yellow Soybean Non-GMO", location="BR Supplier")], scraped_at=1.0)
+    return index
+
+
+def test_tokenize():
+    assert tokenize("Non-GMO  Corn, 25kg/Bag") == ["non", "gmo", "corn", "25kg", "bag"]
+    assert tokenize(None) == []
+
+
+def test_every_query_term_must_match(index):
+    total, hits = index.search("yellow corn")
+    assert total == 2
+    assert sorted(titles(hits)) == ["Dried Yellow Corn", "Yellow Corn Grain for Animal Feed"]
+    assert index.search("corn soybean") == (0, [])
+    assert index.search("  ") == (0, [])
+
+
+def test_bm25_prefers_shorter_records_and_title_matches(index):
+    # Same term frequency: the shorter record ranks first
+    assert titles(index.search("yellow corn")[1]) == ["Dried Yellow Corn", "Yellow Corn Grain for Animal Feed"]
+
+    # Records of the same length: a title match outweighs a company match
+    fields = SupplierIndex()
+    fields.add("flour", [supplier(6, "Maize Flour", company="Golden Corn"), supplier(7, "Corn Flour", company="Golden Mills")])
+    assert titles(fields.search("corn")[1]) == ["Corn Flour", "Maize Flour"]
+
+
+def test_prefix_matches_rank_below_exact_ones():
+    index = SupplierIndex()
+    index.add("corn", [supplier(1, "Yellowish Corn"), supplier(2, "Yellow Corn"), supplier(3, "White Corn")])
+    assert titles(index.search("yellow")[1]) == ["Yellow Corn", "Yellowish Corn"]
+    assert sorted(titles(index.search("yel")[1])) == ["Yellow Corn", "Yellowish Corn"]
+    # One-letter terms only match exactly
+    assert index.search("y") == (0, [])
+
+
+def test_prefix_matches_any_field(index):
+    assert titles(index.search("yellowst")[1]) == ["White Maize Non-GMO"] # Company name
+    assert titles(index.search("glu")[1]) == ["Corn Gluten Meal"]
+
+
+def test_location_and_certifications_are_searchable(index):
+    assert titles(index.search("iso 9001")[1]) == ["Dried Yellow Corn"]
+    assert titles(index.search("br")[1]) == ["Yellow Soybean Non-GMO"]
+
+
+def test_search_within_a_keyword_and_paging(index):
+    total, hits = index.search("yellow", keyword=" Corn  Grain")
+    assert total == 3
+    assert {keyword for _, keyword, _, _ in hits} == {"corn grain"}
+
+    _, everything = index.search("yellow", limit=10)
+    assert index.search("yellow", limit=2, offset=1)[1] == everything[1:3]
+
+
+def test_rescraped_record_replaces_the_indexed_one(index):
+    index.add("corn grain", [supplier(4, "Corn Starch")], scraped_at=2.0)
+    assert len(index) == 5
+    assert index.search("gluten") == (0, [])
+    assert titles(index.search("starch")[1]) == ["Corn Starch"]
+
+    # An older version (e.g. loaded from the store after a newer scrape) is ignored
+    index.add("corn grain", [supplier(4, "Corn Gluten Meal")], scraped_at=1.5)
+    assert titles(index.search("starch")[1]) == ["Corn Starch"]
+    assert index.stats()["records"] == 5
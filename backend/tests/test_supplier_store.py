@@ -0,0 +1,151 @@
+"""Supplier store: keyset cursor pagination, facets and the migration of older stores."""
+import sqlite3
+
+import pytest
+
+from supplier_store import SupplierStore
+
+
+def supplier(n, price=None, location="CN", years=None, certifications=(), url=None):
+    return {
+        "product_title": f"Product {n}",
+        "product_url": url or f"https://www.alibaba.com/product-detail/p_{n}.html",
+        "price": f"US${price}" if price is not None else "N/A",
+        "company_name": f"Company {n}",
+        "company_url": f"https://c{n}.en.alibaba.com/",
+        "years_on_alibaba_search_page": f"{years} yrs" if years is not None else "N/A",
+        "location_search_page": f"{location} Supplier",
+        "min_order": "Min. order: 1 ton",
+        "certifications": list(certifications),
+        "response_rate": "N/A",
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SupplierStore(str(tmp_path / "suppliers.sqlite3"))
+    yield store
+    store.close()
+
+
+def all_pages(store, **query):
+    titles, cursor = [], None
+    while True:
+        page = store.query(cursor=cursor, **query)
+        titles += [record["product_title"] for record in page["data"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return titles, page["total"]
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_cursor_pages_cover_every_row_once(store, order):
+    # Ties on the sort column and unknown prices straddle page boundaries
+    prices = [100, 200, 200, 200, None, 50, None, 300, 200, 100]
+    store.add("corn", [supplier(n, price) for n, price in enumerate(prices)])
+
+    titles, total = all_pages(store, keyword="corn", sort="price", order=order, limit=3)
+    assert total == len(prices)
+    assert sorted(titles) == sorted(f"Product {n}" for n in range(len(prices)))
+
+    known = [price for price in prices if price is not None]
+    expected_prices = sorted(known, reverse=order == "desc") + [None, None] # Unknown prices last either way
+    by_title = {f"Product {n}": price for n, price in enumerate(prices)}
+    assert [by_title[title] for title in titles] == expected_prices
+
+
+def test_cursor_pagination_keeps_filters(store):
+    store.add("corn", [supplier(n, price=n * 10, years=n) for n in range(1, 11)])
+    store.add("wheat", [supplier(n, price=5) for n in range(20, 25)])
+
+    titles, total = all_pages(store, keyword="Corn", sort="years", order="desc", limit=2, years_min=4, price_max=80)
+    assert total == 5
+    assert titles == ["Product 8", "Product 7", "Product 6", "Product 5", "Product 4"]
+
+
+def test_query_rejects_unknown_sort_and_order(store):
+    with pytest.raises(ValueError):
+        store.query(sort="id")
+    with pytest.raises(ValueError):
+        store.query(order="sideways")
+
+
+def test_re_adding_a_listing_refreshes_it(store):
+    store.add("corn", [supplier(1, price=100, certifications=["ISO 9001"])])
+    # Same listing under a tracking link, now with other certifications
+    store.add("corn", [supplier(1, price=90, certifications=["HACCP"],
+                                url="//alibaba.com/product-detail/p_1.html?spm=a2700")])
+
+    [record] = store.query(keyword="corn")["data"]
+    assert record["price_min"] == 90
+    assert record["certifications"] == ["HACCP"]
+    assert store.facets("corn")["certifications"] == {"HACCP": 1}
+
+
+def test_facets_count_locations_and_certifications_per_keyword(store):
+    store.add("corn", [
+        supplier(1, location="CN", certifications=["ISO 9001", "HACCP"]),
+        supplier(2, location="CN", certifications=["ISO 9001"]),
+        supplier(3, location="US"),
+    ])
+    store.add("wheat", [supplier(4, location="DE", certifications=["FDA"])])
+
+    assert store.facets("corn") == {"locations": {"CN": 2, "US": 1}, "certifications": {"HACCP": 1, "ISO 9001": 2}}
+    assert store.facets() == {
+        "locations": {"CN": 2, "DE": 1, "US": 1},
+        "certifications": {"FDA": 1, "HACCP": 1, "ISO 9001": 2},
+    }
+    assert store.query(keyword="corn", certifications=["HACCP", "FDA"])["total"] == 1
+    assert store.query(locations=["US", "DE"])["total"] == 2
+
+
+OLD_SCHEMA = """
+CREATE TABLE suppliers (
+    id INTEGER PRIMARY KEY, keyword TEXT NOT NULL, record_key TEXT NOT NULL,
+    product_title TEXT, product_url TEXT, price TEXT, company_name TEXT, company_url TEXT,
+    years_on_alibaba_search_page TEXT, location_search_page TEXT, min_order TEXT, certifications TEXT,
+    response_rate TEXT, price_min REAL, price_max REAL, years INTEGER, location TEXT, rating REAL,
+    response_rate_pct REAL, scraped_at REAL NOT NULL, UNIQUE (keyword, record_key)
+);
+"""
+
+
+def test_older_stores_are_migrated_and_rekeyed(tmp_path):
+    path = str(tmp_path / "suppliers.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.executescript(OLD_SCHEMA)
+    # Keyed on the raw product URL: one listing stored once per tracking link
+    for row_id, url, price, scraped_at in [
+        (1, "https://www.alibaba.com/product-detail/p_1.html?spm=a", 100, 1.0),
+        (2, "https://alibaba.com/product-detail/p_1.html?spm=b", 90, 2.0),
+        (3, "https://www.alibaba.com/product-detail/p_2.html", 50, 1.5),
+    ]:
+        conn.execute(
+            "INSERT INTO suppliers (id, keyword, record_key, product_title, product_url, price, company_name, "
+            "company_url, certifications, price_min, scraped_at) VALUES (?, 'corn', ?, 'Product', ?, ?, 'Company', "
+            "'https://c.en.alibaba.com/', '[]', ?, ?)",
+            (row_id, url, url, f"US${price}", price, scraped_at),
+        )
+    conn.commit()
+    conn.close()
+
+    store = SupplierStore(path)
+    try:
+        records = store.query(keyword="corn", sort="price")["data"]
+        # Of the duplicates the newest row is kept
+        assert [(record["id"], record["price_min"]) for record in records] == [(3, 50), (2, 90)]
+        assert records[0]["currency"] is None # Added column
+        # New scrapes of the listing land on the re-keyed row
+        store.add("corn", [supplier(9, price=80, url="https://www.alibaba.com/product-detail/p_1.html?spm=c")
+                           | {"company_url": "https://c.en.alibaba.com/"}])
+        assert store.query(keyword="corn")["total"] == 2
+    finally:
+        store.close()
+
+    # Runs once: a reopened store is left alone
+    reopened = SupplierStore(path)
+    try:
+        assert reopened._conn.execute("PRAGMA user_version").fetchone()[0] == 1
+        assert reopened.query(keyword="corn")["total"] == 2
+    finally:
+        reopened.close()
@@ -0,0 +1,176 @@
+"""
+Condition-driven waits for the scraper's hot path.
+
+Instead of sleeping a fixed random interval after every navigation and scroll, each step waits
+for something observable (results rendered, card count stable, pagination advanced) and returns
+as soon as it holds. Every step has a floor (minimum wait, to keep human-like pacing where
+wanted) and a ceiling (timeout). Politeness towards the site is handled separately by a
+per-host pacing policy (and a per-host concurrency cap), and every wait is recorded so crawl
+time can be attributed.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+
+class WaitPolicy:
+    """floor: minimum seconds a step takes; ceiling: give up after this many seconds; poll: check interval"""
+
+    def __init__(self, floor=0.0, ceiling=10.0, poll=0.1):
+        if floor > ceiling:
+            raise ValueError("Wait floor cannot exceed its ceiling")
+        self.floor = floor
+        self.ceiling = ceiling
+        self.poll = poll
+
+    def __repr__(self):
+        return f"WaitPolicy(floor={self.floor}, ceiling={self.ceiling}, poll={self.poll})"
+
+
+# Default policy per scraper step; override any of them with AlibabaSupplierScraper(wait_policies=...)
+DEFAULT_WAIT_POLICIES = {
+    "results": WaitPolicy(ceiling=20.0, poll=0.2), # product cards rendered after a navigation
+    "scroll_step": WaitPolicy(ceiling=1.5), # page grew after scrolling (lazy loading)
+    "scroll_settle": WaitPolicy(ceiling=3.0), # card count stopped changing at the bottom
+    "pagination_ready": WaitPolicy(ceiling=5.0, poll=0.2), # pagination controls present
+    "pagination": WaitPolicy(ceiling=10.0, poll=0.2), # results changed after clicking Next
+}
+
+
+def wait_until(driver, condition, policy):
+    """
+    Poll condition(driver) until it returns truthy or the policy ceiling passes, then pad to the
+    floor. Exceptions from the condition (stale elements, navigation in progress) count as "not yet".
+    Returns (satisfied, seconds_waited).
+    """
+    start = time.monotonic()
+    deadline = start + policy.ceiling
+    satisfied = False
+    while True:
+        try:
+            if condition(driver):
+                satisfied = True
+                break
+        except Exception:
+            pass
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        time.sleep(min(policy.poll, remaining))
+
+    elapsed = time.monotonic() - start
+    if elapsed < policy.floor:
+        time.sleep(policy.floor - elapsed)
+    return satisfied, time.monotonic() - start
+
+
+# --- Conditions: callables taking the driver and returning True once the page is ready ---
+
+def element_present(selector):
+    return lambda driver: driver.execute_script("return !!document.querySelector(arguments[0]);", selector)
+
+
+def results_rendered(selector=".search-card-e-title a"):
+    return element_present(selector)
+
+
+def scroll_height_changed(previous_height):
+    return lambda driver: driver.execute_script("return document.body.scrollHeight") != previous_height
+
+
+def card_count_stable(selector, stable_for=0.5):
+    """True once at least one card exists and the count has not changed for stable_for seconds"""
+    state = {"count": None, "since": None}
+
+    def condition(driver):
+        count = driver.execute_script("return document.querySelectorAll(arguments[0]).length;", selector)
+        now = time.monotonic()
+        if count != state["count"]:
+            state["count"], state["since"] = count, now
+            return False
+        return count > 0 and now - state["since"] >= stable_for
+
+    return condition
+
+
+def page_changed(signature_fn, previous_signature):
+    """True once results are shown and differ from previous_signature (e.g. after clicking Next)"""
+    def condition(driver):
+        signature = signature_fn()
+        return bool(signature) and signature != previous_signature
+    return condition
+
+
+class HostPacer:
+    """
+    Minimum spacing between navigations to the same host, shared by every scraper that uses
+    this pacer (ScraperPool gives each pooled browser its own, see pacer_factory). Replaces the
+    fixed sleeps between pages.
+    """
+
+    def __init__(self, min_interval=2.0, jitter=1.0):
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self._next_allowed = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        """Block until the host of url may be hit again; returns the seconds slept"""
+        host = urlsplit(url).hostname or ""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_allowed.get(host, now))
+            # Reserve the slot before sleeping so concurrent callers queue up behind it
+            self._next_allowed[host] = slot + self.min_interval + random.uniform(0, self.jitter)
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+DEFAULT_PACER = HostPacer(min_interval=2.0, jitter=1.0)
+
+
+class HostLimiter:
+    """At most limit concurrent fetches per host (None = unlimited)"""
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, host):
+        if not self.limit:
+            yield
+            return
+        with self._lock:
+            semaphore = self._semaphores.setdefault(host, threading.BoundedSemaphore(self.limit))
+        with semaphore:
+            yield
+
+
+class WaitRecorder:
+    """Per-crawl log of how long each step actually waited"""
+
+    def __init__(self):
+        self.entries = []
+
+    def record(self, step, waited, satisfied=True):
+        self.entries.append({"step": step, "waited": round(waited, 3), "satisfied": satisfied})
+
+    def reset(self):
+        self.entries = []
+
+    def summary(self):
+        """{step: {"count", "total", "max", "timeouts"}} in seconds"""
+        summary = {}
+        for entry in self.entries:
+            stats = summary.setdefault(entry["step"], {"count": 0, "total": 0.0, "max": 0.0, "timeouts": 0})
+            stats["count"] += 1
+            stats["total"] = round(stats["total"] + entry["waited"], 3)
+            stats["max"] = max(stats["max"], entry["waited"])
+            stats["timeouts"] += 0 if entry["satisfied"] else 1
+        return summary
@@ -7,16 +7,18 @@ import LoadingSpinner from '@/components/LoadingSpinner';
 import SkeletonTable from '@/components/SkeletonTable';
 import ErrorMessage from '@/components/ErrorMessage';
 import { ApiService } from '@/services/api';
-import { Supplier, SearchFormData } from '@/types';
+import { SearchFormData } from '@/types';
 
 type AppState = 'idle' | 'loading' | 'success' | 'error';
 
 export default function Home() {
   const [state, setState] = useState<AppState>('idle');
-  const [suppliers, setSuppliers] = useState<Supplier[]>([]);
+  // Bumped whenever the job stores more pages, so the table re-queries the server
+  const [refreshKey, setRefreshKey] = useState<number>(0);
   const [currentKeyword, setCurrentKeyword] = useState<string>('');
   const [error, setError] = useState<string>('');
   const [isBackendHealthy, setIsBackendHealthy] = useState<boolean | null>(null);
+  const [isStreaming, setIsStreaming] = useState<boolean>(false);
 
   // Check backend health on component mount
   useEffect(() => {
@@ -31,22 +33,33 @@ export default function Home() {
     setState('loading');
     setCurrentKeyword(formData.keyword);
     setError('');
+    setIsStreaming(true);
 
-    const result = await ApiService.searchSuppliers(formData);
-
-    if (result.status === 'success' && result.data) {
-      setSuppliers(result.data);
+    // Show the table as soon as the first page is stored instead of waiting for the whole crawl;
+    // the rows themselves are queried page by page by SupplierTable
+    let pagesDone = 0;
+    try {
+      await ApiService.runJob(formData, (job) => {
+        if (job.progress.pages_done > pagesDone) {
+          pagesDone = job.progress.pages_done;
+          setRefreshKey(key => key + 1);
+          setState('success');
+        }
+      });
+      setRefreshKey(key => key + 1);
       setState('success');
-    } else {
-      setError(result.message || 'An unexpected error occurred');
-      setState('error');
+    } catch (err) {
+      console.error('Scrape job failed:', err);
+      setError(err instanceof Error ? err.message : 'An unexpected error occurred');
+      // Keep the pages that were stored and surface the error alongside them
+      setState(pagesDone > 0 ? 'success' : 'error');
     }
+    setIsStreaming(false);
   };
 
   const handleRetry = () => {
     setState('idle');
     setError('');
-    setSuppliers([]);
     setCurrentKeyword('');
   };
 
@@ -63,8 +76,20 @@ export default function Home() {
       case 'success':
         return (
           <div className="space-y-8">
-            <SearchForm onSubmit={handleSearch} isLoading={false} />
-            <SupplierTable suppliers={suppliers} keyword={currentKeyword} />
+            <SearchForm onSubmit={handleSearch} isLoading={isStreaming} />
+            {isStreaming && (
+              <div className="bg-pink-50 border border-pink-200 rounded-lg p-4 text-center">
+                <p className="text-pink-700 font-medium">
+                  Loading more pages for &ldquo;{currentKeyword}&rdquo;&hellip;
+                </p>
+              </div>
+            )}
+            {!isStreaming && error && (
+              <div className="bg-red-50 border border-red-200 rounded-lg p-4 text-center">
+                <p className="text-red-700 font-medium">{error}</p>
+              </div>
+            )}
+            <SupplierTable keyword={currentKeyword} refreshKey={refreshKey} />
           </div>
         );
       
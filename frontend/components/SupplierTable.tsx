@@ -1,12 +1,18 @@
 'use client';
 
 import { useState, useMemo, useRef, useEffect } from 'react';
-import { ExternalLink, Copy, Check, Search, Calendar, MapPin, Star, DollarSign, Clock, Shield, X, Filter, ChevronDown } from 'lucide-react';
-import { Supplier } from '@/types';
+import { ExternalLink, Copy, Check, Search, Calendar, MapPin, Star, DollarSign, Clock, Shield, X, Filter, ChevronDown, ChevronLeft, ChevronRight } from 'lucide-react';
+import SkeletonTable from '@/components/SkeletonTable';
+import { ApiService } from '@/services/api';
+import { StoredSupplier, SupplierFacets, SupplierSortField } from '@/types';
+
+const PAGE_SIZE = 50;
+const FILTER_DEBOUNCE_MS = 300;
 
 interface SupplierTableProps {
-  suppliers: Supplier[];
   keyword: string;
+  // Changes whenever more pages were stored for the keyword, to re-query the current page
+  refreshKey?: number;
 }
 
 interface FilterState {
@@ -18,9 +24,22 @@ interface FilterState {
   responseRateMin: string;
 }
 
-export default function SupplierTable({ suppliers, keyword }: SupplierTableProps) {
+const EMPTY_FILTERS: FilterState = {
+  priceMin: '',
+  priceMax: '',
+  locations: [],
+  yearsMin: '',
+  certifications: [],
+  responseRateMin: ''
+};
+
+const toNumber = (value: string): number | undefined => (value === '' ? undefined : Number(value));
+
+// Filtering, sorting and pagination happen in GET /suppliers; the browser only holds the
+// current page of rows and the filter options from GET /suppliers/facets.
+export default function SupplierTable({ keyword, refreshKey = 0 }: SupplierTableProps) {
   const [copiedUrls, setCopiedUrls] = useState<Set<string>>(new Set());
-  const [sortField, setSortField] = useState<keyof Supplier | null>(null);
+  const [sortField, setSortField] = useState<SupplierSortField | null>(null);
   const [sortDirection, setSortDirection] = useState<'asc' | 'desc'>('asc');
   const [locationsOpen, setLocationsOpen] = useState(false);
   const [certificationsOpen, setCertificationsOpen] = useState(false);
@@ -28,15 +47,22 @@ export default function SupplierTable({ suppliers, keyword }: SupplierTableProps
   const locationsRef = useRef<HTMLDivElement>(null);
   const certificationsRef = useRef<HTMLDivElement>(null);
   
-  // Filter states with string values for inputs
-  const [filters, setFilters] = useState<FilterState>({
-    priceMin: '',
-    priceMax: '',
-    locations: [],
-    yearsMin: '',
-    certifications: [],
-    responseRateMin: ''
-  });
+  // Filter states with string values for inputs; appliedFilters trails them while typing
+  const [filters, setFilters] = useState<FilterState>(EMPTY_FILTERS);
+  const [appliedFilters, setAppliedFilters] = useState<FilterState>(EMPTY_FILTERS);
+
+  // Cursor of every page visited so far; the last one is the page on screen
+  const [cursors, setCursors] = useState<(string | null)[]>([null]);
+  const [suppliers, setSuppliers] = useState<StoredSupplier[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [matchingCount, setMatchingCount] = useState<number>(0);
+  const [isFetching, setIsFetching] = useState<boolean>(true);
+  const [fetchError, setFetchError] = useState<string>('');
+  const latestRequest = useRef(0);
+
+  // Filter options and the unfiltered count for the keyword
+  const [facets, setFacets] = useState<SupplierFacets>({ locations: {}, certifications: {} });
+  const [keywordCount, setKeywordCount] = useState<number | null>(null);
 
   // Close dropdowns when clicking outside
   useEffect(() => {
@@ -53,32 +79,65 @@ export default function SupplierTable({ suppliers, keyword }: SupplierTableProps
     return () => document.removeEventListener('mousedown', handleClickOutside);
   }, []);
 
-  // Extract unique values for filter options
-  const filterOptions = useMemo(() => {
-    const locations = [...new Set(suppliers.map(s => s.location_search_page?.replace(' Supplier', '') || '').filter(Boolean))].sort();
-    const certifications = [...new Set(suppliers.flatMap(s => s.certifications || []))].sort();
-    
-    return { locations, certifications };
-  }, [suppliers]);
-
-  // Parse numeric values from strings
-  const parsePrice = (priceStr: string): number => {
-    if (!priceStr || priceStr === 'Contact for price') return 0;
-    const match = priceStr.match(/\$?([\d,]+)/);
-    return match ? parseInt(match[1].replace(/,/g, '')) : 0;
-  };
+  // Query once typing pauses, starting again from the first page
+  useEffect(() => {
+    const timer = setTimeout(() => {
+      setAppliedFilters(filters);
+      setCursors([null]);
+    }, FILTER_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [filters]);
 
-  const parseYears = (yearsStr: string): number => {
-    if (!yearsStr) return 0;
-    const match = yearsStr.match(/(\d+)/);
-    return match ? parseInt(match[1]) : 0;
-  };
+  const cursor = cursors[cursors.length - 1];
 
-  const parseResponseRate = (rateStr: string): number => {
-    if (!rateStr) return 0;
-    const match = rateStr.match(/(\d+)%/);
-    return match ? parseInt(match[1]) : 0;
-  };
+  // Fetch the current page; responses to superseded queries are dropped
+  useEffect(() => {
+    const requestId = ++latestRequest.current;
+    setIsFetching(true);
+    ApiService.querySuppliers({
+      keyword,
+      priceMin: toNumber(appliedFilters.priceMin),
+      priceMax: toNumber(appliedFilters.priceMax),
+      locations: appliedFilters.locations,
+      yearsMin: toNumber(appliedFilters.yearsMin),
+      certifications: appliedFilters.certifications,
+      responseRateMin: toNumber(appliedFilters.responseRateMin),
+      sort: sortField ?? undefined,
+      order: sortDirection,
+      limit: PAGE_SIZE,
+      cursor,
+    }).then(page => {
+      if (requestId !== latestRequest.current) return;
+      if (page.status === 'success') {
+        setSuppliers(page.data);
+        setNextCursor(page.next_cursor);
+        setMatchingCount(page.total);
+        setFetchError('');
+      } else {
+        setFetchError(page.message || 'Failed to load suppliers');
+      }
+      setIsFetching(false);
+    });
+  }, [keyword, appliedFilters, sortField, sortDirection, cursor, refreshKey]);
+
+  // Filter options come from every stored supplier of the keyword, not just the page on screen
+  useEffect(() => {
+    let cancelled = false;
+    Promise.all([
+      ApiService.getSupplierFacets(keyword),
+      ApiService.querySuppliers({ keyword, limit: 1 }),
+    ]).then(([keywordFacets, unfiltered]) => {
+      if (cancelled) return;
+      setFacets(keywordFacets);
+      if (unfiltered.status === 'success') setKeywordCount(unfiltered.total);
+    }).catch(err => console.error('Failed to load filter options:', err));
+    return () => { cancelled = true; };
+  }, [keyword, refreshKey]);
+
+  const filterOptions = useMemo(() => ({
+    locations: Object.keys(facets.locations),
+    certifications: Object.keys(facets.certifications),
+  }), [facets]);
 
   // Validate and parse filter inputs
   const validateNumber = (value: string): boolean => {
@@ -95,43 +154,6 @@ export default function SupplierTable({ suppliers, keyword }: SupplierTableProps
     }
   };
 
-  // Apply filters
-  const filteredSuppliers = useMemo(() => {
-    return suppliers.filter(supplier => {
-      // Price filter
-      const price = parsePrice(supplier.price);
-      const minPrice = filters.priceMin ? Number(filters.priceMin) : 0;
-      const maxPrice = filters.priceMax ? Number(filters.priceMax) : Infinity;
-      if (price > 0 && (price < minPrice || price > maxPrice)) return false;
-
-      // Location filter
-      if (filters.locations.length > 0) {
-        const location = supplier.location_search_page?.replace(' Supplier', '') || '';
-        if (!filters.locations.includes(location)) return false;
-      }
-
-      // Years filter
-      const years = parseYears(supplier.years_on_alibaba_search_page || '0');
-      const minYears = filters.yearsMin ? Number(filters.yearsMin) : 0;
-      if (years < minYears) return false;
-
-      // Certifications filter
-      if (filters.certifications.length > 0) {
-        const hasRequiredCert = filters.certifications.some(cert => 
-          supplier.certifications?.includes(cert)
-        );
-        if (!hasRequiredCert) return false;
-      }
-
-      // Response rate filter
-      const responseRate = parseResponseRate(supplier.response_rate || '0%');
-      const minResponseRate = filters.responseRateMin ? Number(filters.responseRateMin) : 0;
-      if (responseRate > 0 && responseRate < minResponseRate) return false;
-
-      return true;
-    });
-  }, [suppliers, filters]);
-
   const copyToClipboard = async (url: string, type: 'product' | 'company') => {
     try {
       await navigator.clipboard.writeText(url);
@@ -149,38 +171,18 @@ export default function SupplierTable({ suppliers, keyword }: SupplierTableProps
     }
   };
 
-  const handleSort = (field: keyof Supplier) => {
+  const handleSort = (field: SupplierSortField) => {
     if (sortField === field) {
       setSortDirection(sortDirection === 'asc' ? 'desc' : 'asc');
     } else {
       setSortField(field);
       setSortDirection('asc');
     }
+    setCursors([null]);
   };
 
-  const sortedSuppliers = [...filteredSuppliers].sort((a, b) => {
-    if (!sortField) return 0;
-    
-    const aValue = a[sortField];
-    const bValue = b[sortField];
-    
-    if (typeof aValue === 'string' && typeof bValue === 'string') {
-      const comparison = aValue.localeCompare(bValue);
-      return sortDirection === 'asc' ? comparison : -comparison;
-    }
-    
-    return 0;
-  });
-
   const clearFilters = () => {
-    setFilters({
-      priceMin: '',
-      priceMax: '',
-      locations: [],
-      yearsMin: '',
-      certifications: [],
-      responseRateMin: ''
-    });
+    setFilters(EMPTY_FILTERS);
   };
 
   const activeFiltersCount = useMemo(() => {
@@ -193,7 +195,14 @@ export default function SupplierTable({ suppliers, keyword }: SupplierTableProps
     return count;
   }, [filters]);
 
-  if (suppliers.length === 0) {
+  // Until the facets load, fall back to the count of the first query
+  const totalCount = keywordCount ?? matchingCount;
+
+  if (keywordCount === null && isFetching) {
+    return <SkeletonTable />;
+  }
+
+  if (totalCount === 0 && activeFiltersCount === 0) {
     return (
       <div className="bg-white rounded-xl shadow-lg p-12 text-center">
         <Search className="h-16 w-16 text-zinc-300 mx-auto mb-4" />
@@ -213,10 +222,10 @@ export default function SupplierTable({ suppliers, keyword }: SupplierTableProps
       <div className="bg-white rounded-xl shadow-lg p-6">
         <div className="flex items-center justify-between">
           <h2 className="text-2xl font-bold text-zinc-800">
-            Found {sortedSuppliers.length} suppliers for &ldquo;{keyword}&rdquo;
-            {filteredSuppliers.length !== suppliers.length && (
+            Found {matchingCount} suppliers for &ldquo;{keyword}&rdquo;
+            {matchingCount < totalCount && (
               <span className="text-zinc-500 text-lg font-normal ml-2">
-                ({suppliers.length - filteredSuppliers.length} filtered out)
+                ({totalCount - matchingCount} filtered out)
               </span>
             )}
           </h2>
@@ -350,6 +359,7 @@ export default function SupplierTable({ suppliers, keyword }: SupplierTableProps
                         </div>
                       </div>
                       <span className="text-sm text-zinc-700">{location}</span>
+                      <span className="ml-auto text-xs text-zinc-400">{facets.locations[location]}</span>
                     </label>
                   ))}
                 </div>
@@ -410,6 +420,7 @@ export default function SupplierTable({ suppliers, keyword }: SupplierTableProps
                         </div>
                       </div>
                       <span className="text-sm text-zinc-700">{cert}</span>
+                      <span className="ml-auto text-xs text-zinc-400">{facets.certifications[cert]}</span>
                     </label>
                   ))}
                 </div>
@@ -421,7 +432,7 @@ export default function SupplierTable({ suppliers, keyword }: SupplierTableProps
         {/* Filter Summary */}
         <div className="mt-4 pt-3 border-t border-zinc-200">
           <div className="text-sm text-zinc-600 text-center">
-            Showing <span className="font-semibold text-pink-600">{sortedSuppliers.length}</span> of <span className="font-semibold">{suppliers.length}</span> suppliers
+            Showing <span className="font-semibold text-pink-600">{matchingCount}</span> of <span className="font-semibold">{totalCount}</span> suppliers
           </div>
         </div>
       </div>
@@ -473,9 +484,16 @@ export default function SupplierTable({ suppliers, keyword }: SupplierTableProps
                 </th>
               </tr>
             </thead>
-            <tbody className="bg-white divide-y divide-zinc-100">
-              {sortedSuppliers.map((supplier, index) => (
-                <tr key={index} className="hover:bg-pink-50/30 transition-colors">
+            <tbody className={`bg-white divide-y divide-zinc-100 transition-opacity ${isFetching ? 'opacity-60' : ''}`}>
+              {suppliers.length === 0 && !isFetching && (
+                <tr>
+                  <td colSpan={7} className="py-12 px-8 text-center text-zinc-500">
+                    {fetchError || 'No suppliers match the current filters.'}
+                  </td>
+                </tr>
+              )}
+              {suppliers.map(supplier => (
+                <tr key={supplier.id} className="hover:bg-pink-50/30 transition-colors">
                   <td className="py-6 px-8">
                     <div className="space-y-3">
                       <div className="flex items-start gap-3">
@@ -610,6 +628,37 @@ export default function SupplierTable({ suppliers, keyword }: SupplierTableProps
             </tbody>
           </table>
         </div>
+
+        {/* Cursor Pagination */}
+        <div className="flex items-center justify-between px-8 py-4 border-t border-zinc-200">
+          <span className="text-sm text-zinc-600">
+            {fetchError && suppliers.length > 0 ? (
+              <span className="text-red-600">{fetchError}</span>
+            ) : (
+              <>
+                Page <span className="font-semibold">{cursors.length}</span> of <span className="font-semibold">{Math.max(1, Math.ceil(matchingCount / PAGE_SIZE))}</span>
+              </>
+            )}
+          </span>
+          <div className="flex items-center gap-2">
+            <button
+              onClick={() => setCursors(prev => prev.slice(0, -1))}
+              disabled={cursors.length === 1 || isFetching}
+              className="flex items-center gap-1 px-3 py-1.5 text-sm text-zinc-600 rounded-lg hover:text-pink-600 hover:bg-pink-50 disabled:opacity-40 disabled:hover:bg-transparent disabled:hover:text-zinc-600 transition-colors"
+            >
+              <ChevronLeft className="h-4 w-4" />
+              Previous
+            </button>
+            <button
+              onClick={() => nextCursor && setCursors(prev => [...prev, nextCursor])}
+              disabled={!nextCursor || isFetching}
+              className="flex items-center gap-1 px-3 py-1.5 text-sm text-zinc-600 rounded-lg hover:text-pink-600 hover:bg-pink-50 disabled:opacity-40 disabled:hover:bg-transparent disabled:hover:text-zinc-600 transition-colors"
+            >
+              Next
+              <ChevronRight className="h-4 w-4" />
+            </button>
+          </div>
+        </div>
       </div>
     </div>
   );
@@ -1,28 +1,37 @@
-import { ApiResponse, SearchFormData } from '@/types';
+import {
+  ApiResponse,
+  ScrapeJob,
+  SearchFormData,
+  SupplierFacets,
+  SupplierPage,
+  SupplierQuery,
+} from '@/types';
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:5000';
+const JOB_POLL_INTERVAL_MS = 1500;
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
+async function parseJsonResponse<T>(response: Response): Promise<T> {
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(errorData.message || errorData.error || `HTTP error! status: ${response.status}`);
+  }
+  return response.json();
+}
 
 export class ApiService {
-  static async searchSuppliers(data: SearchFormData): Promise<ApiResponse> {
+  // Runs the crawl as a background job and polls it, so no single request
+  // stays open for the whole multi-page scrape.
+  static async searchSuppliers(
+    data: SearchFormData,
+    onProgress?: (job: ScrapeJob) => void
+  ): Promise<ApiResponse> {
     try {
-      const response = await fetch(`${API_BASE_URL}/scrape`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          keyword: data.keyword,
-          max_pages: data.max_pages,
-        }),
-      });
-
-      if (!response.ok) {
-        const errorData = await response.json().catch(() => ({}));
-        throw new Error(errorData.message || `HTTP error! status: ${response.status}`);
-      }
-
-      const result: ApiResponse = await response.json();
-      return result;
+      let job = await ApiService.runJob(data, onProgress);
+      job = await ApiService.getJob(job.job_id);
+
+      return { status: 'success', data: job.data || [] };
     } catch (error) {
       console.error('API call failed:', error);
       return {
@@ -32,6 +41,90 @@ export class ApiService {
     }
   }
 
+  // Polls a background job's status (without its rows) until it finishes; every scraped page
+  // is already in the supplier store, so callers read the results with querySuppliers.
+  static async runJob(
+    data: SearchFormData,
+    onProgress?: (job: ScrapeJob) => void
+  ): Promise<ScrapeJob> {
+    let job = await ApiService.createJob(data);
+    while (job.status === 'queued' || job.status === 'running') {
+      onProgress?.(job);
+      await sleep(JOB_POLL_INTERVAL_MS);
+      job = await ApiService.getJob(job.job_id, false);
+    }
+
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Scrape job failed');
+    }
+    return job;
+  }
+
+  static async createJob(data: SearchFormData): Promise<ScrapeJob> {
+    const response = await fetch(`${API_BASE_URL}/jobs`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({
+        keyword: data.keyword,
+        max_pages: data.max_pages,
+      }),
+    });
+    const result = await parseJsonResponse<{ job: ScrapeJob }>(response);
+    return result.job;
+  }
+
+  static async getJob(jobId: string, includeData = true): Promise<ScrapeJob> {
+    const response = await fetch(`${API_BASE_URL}/jobs/${jobId}?include_data=${includeData}`);
+    return parseJsonResponse<ScrapeJob>(response);
+  }
+
+  static async cancelJob(jobId: string): Promise<ScrapeJob> {
+    const response = await fetch(`${API_BASE_URL}/jobs/${jobId}`, { method: 'DELETE' });
+    return parseJsonResponse<ScrapeJob>(response);
+  }
+
+  // Server-side filtering, sorting and cursor pagination over stored suppliers
+  static async querySuppliers(query: SupplierQuery): Promise<SupplierPage> {
+    const params = new URLSearchParams();
+    const setParam = (name: string, value: string | number | null | undefined) => {
+      if (value !== undefined && value !== null && value !== '') params.set(name, String(value));
+    };
+
+    setParam('keyword', query.keyword);
+    setParam('price_min', query.priceMin);
+    setParam('price_max', query.priceMax);
+    setParam('years_min', query.yearsMin);
+    setParam('response_rate_min', query.responseRateMin);
+    setParam('sort', query.sort);
+    setParam('order', query.order);
+    setParam('limit', query.limit);
+    setParam('cursor', query.cursor);
+    query.locations?.forEach(location => params.append('location', location));
+    query.certifications?.forEach(cert => params.append('certification', cert));
+
+    try {
+      const response = await fetch(`${API_BASE_URL}/suppliers?${params.toString()}`);
+      return await parseJsonResponse<SupplierPage>(response);
+    } catch (error) {
+      console.error('Supplier query failed:', error);
+      return {
+        status: 'error',
+        data: [],
+        next_cursor: null,
+        total: 0,
+        message: error instanceof Error ? error.message : 'An unexpected error occurred',
+      };
+    }
+  }
+
+  static async getSupplierFacets(keyword?: string): Promise<SupplierFacets> {
+    const params = keyword ? `?keyword=${encodeURIComponent(keyword)}` : '';
+    const response = await fetch(`${API_BASE_URL}/suppliers/facets${params}`);
+    return parseJsonResponse<SupplierFacets>(response);
+  }
+
   static async healthCheck(): Promise<boolean> {
     try {
       const response = await fetch('http://127.0.0.1:5000/health');
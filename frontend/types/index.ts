@@ -9,6 +9,17 @@ export interface Supplier {
   min_order: string;
   certifications: string[];
   response_rate: string;
+  // Parsed once by the backend at scrape time (null when the raw text had no value)
+  price_min?: number | null;
+  price_max?: number | null;
+  currency?: string | null;
+  moq_quantity?: number | null;
+  moq_unit?: string | null;
+  years?: number | null;
+  location?: string | null;
+  rating?: number | null;
+  review_count?: number | null;
+  response_rate_pct?: number | null;
 }
 
 export interface ApiResponse {
@@ -20,4 +31,66 @@ export interface ApiResponse {
 export interface SearchFormData {
   keyword: string;
   max_pages: number;
-}
\ No newline at end of file
+}
+
+export type JobStatus = 'queued' | 'running' | 'completed' | 'failed' | 'cancelled';
+
+export interface ScrapeJob {
+  job_id: string;
+  keyword: string;
+  max_pages: number;
+  status: JobStatus;
+  progress: {
+    pages_done: number;
+    max_pages: number;
+    suppliers: number;
+  };
+  error: string | null;
+  created_at: number;
+  started_at: number | null;
+  finished_at: number | null;
+  data?: Supplier[];
+}
+
+export type SupplierSortField =
+  | 'scraped_at'
+  | 'price'
+  | 'years'
+  | 'rating'
+  | 'response_rate'
+  | 'location'
+  | 'company_name'
+  | 'product_title';
+
+export interface SupplierQuery {
+  keyword?: string;
+  priceMin?: number;
+  priceMax?: number;
+  locations?: string[];
+  yearsMin?: number;
+  certifications?: string[];
+  responseRateMin?: number;
+  sort?: SupplierSortField;
+  order?: 'asc' | 'desc';
+  limit?: number;
+  cursor?: string | null;
+}
+
+export interface StoredSupplier extends Supplier {
+  id: number;
+  keyword: string;
+  scraped_at: number;
+}
+
+export interface SupplierPage {
+  status: 'success' | 'error';
+  data: StoredSupplier[];
+  next_cursor: string | null;
+  total: number;
+  message?: string;
+}
+
+export interface SupplierFacets {
+  locations: Record<string, number>;
+  certifications: Record<string, number>;
+}